@@ -94,6 +94,19 @@ DATABASES = {
     )
 }
 
+# -------------------------------------------------
+# CACHE
+# -------------------------------------------------
+# Shared by every web worker and management command: `refresh_dashboard`
+# (cron) fills the admin dashboard snapshot the web workers serve. The table
+# is created by migration user.0017 (or `python manage.py createcachetable`).
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+        "LOCATION": os.getenv("CACHE_TABLE", "eventhub_cache"),
+    }
+}
+
 # -------------------------------------------------
 # PASSWORD VALIDATION
 # -------------------------------------------------
@@ -122,13 +135,28 @@ STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+# Rendered QR codes, keyed by sha256 of their payload (see user/utils/qr.py)
+QR_CACHE_DIR = MEDIA_ROOT / "qr_cache"
+
+# Email-sized event banner derivatives (see user/utils/banners.py)
+BANNER_CACHE_DIR = MEDIA_ROOT / "banner_cache"
+
+# Batch-rendered event ticket PDFs (see `generate_event_tickets`)
+TICKET_PDF_DIR = BASE_DIR / "generated_tickets"
+# Rendering processes a download may start when no current PDF exists
+TICKET_PDF_REQUEST_WORKERS = int(os.getenv("TICKET_PDF_REQUEST_WORKERS", "2"))
+
+# Public base URL, for links built outside a request (batch PDFs, emails)
+SITE_URL = os.getenv("SITE_URL", "http://localhost:8000")
+
 # -------------------------------------------------
 # EMAIL (GMAIL)
 # -------------------------------------------------
 EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
-EMAIL_HOST = "smtp.gmail.com"
-EMAIL_PORT = 587
-EMAIL_USE_TLS = True
+EMAIL_HOST = os.getenv("EMAIL_HOST", "smtp.gmail.com")
+EMAIL_PORT = int(os.getenv("EMAIL_PORT", "587"))
+EMAIL_USE_TLS = os.getenv("EMAIL_USE_TLS", "1") == "1"  # 0 for the local `smtp_sink`
+EMAIL_TIMEOUT = 30
 EMAIL_HOST_USER = os.getenv("EMAIL_HOST_USER")
 EMAIL_HOST_PASSWORD = os.getenv("EMAIL_HOST_PASSWORD")
 DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
@@ -139,6 +167,35 @@ DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
 RAZORPAY_KEY_ID = os.getenv("RAZORPAY_KEY_ID")
 RAZORPAY_KEY_SECRET = os.getenv("RAZORPAY_KEY_SECRET")
 RAZORPAY_WEBHOOK_SECRET = os.getenv("RAZORPAY_WEBHOOK_SECRET")
+# Point at a local stand-in (see `manage.py razorpay_stub`) for load tests
+RAZORPAY_BASE_URL = os.getenv("RAZORPAY_BASE_URL", "https://api.razorpay.com")
+# Payment links expire after this; `expire_pending_bookings` sweeps the leftovers
+PAYMENT_LINK_TTL_MINUTES = int(os.getenv("PAYMENT_LINK_TTL_MINUTES", "30"))
+# Last day (YYYY-MM-DD) QR codes holding a bare booking id are accepted at the
+# door; they predate signed ticket tokens and are trivially forged. Unset = never.
+LEGACY_TICKET_QR_UNTIL = os.getenv("LEGACY_TICKET_QR_UNTIL", "")
+
+# -------------------------------------------------
+# SMS (FAST2SMS)
+# -------------------------------------------------
+FAST2SMS_API_KEY = os.getenv("FAST2SMS_API_KEY")
+# Point at a local stand-in (see `manage.py sms_stub`) for tests
+FAST2SMS_BASE_URL = os.getenv("FAST2SMS_BASE_URL", "https://www.fast2sms.com")
+FAST2SMS_ROUTE = os.getenv("FAST2SMS_ROUTE", "q")
+# Gateway requests per second, across all numbers in a request
+SMS_RATE_PER_SECOND = float(os.getenv("SMS_RATE_PER_SECOND", "5"))
+
+# -------------------------------------------------
+# SITE NOTIFICATIONS
+# -------------------------------------------------
+# `prune_notifications` removes notifications this many days after their event
+NOTIFICATION_RETENTION_DAYS = int(os.getenv("NOTIFICATION_RETENTION_DAYS", "30"))
+
+# -------------------------------------------------
+# ADMIN DASHBOARD
+# -------------------------------------------------
+# How long the admin index serves a cached snapshot (`refresh_dashboard` rebuilds it)
+DASHBOARD_SNAPSHOT_SECONDS = int(os.getenv("DASHBOARD_SNAPSHOT_SECONDS", "300"))
 
 # -------------------------------------------------
 # SESSION
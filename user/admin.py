@@ -10,7 +10,7 @@ from django.contrib import admin
 from django.contrib.admin import AdminSite
 from django.utils import timezone
 from django.apps import apps
-from django.db.models import Sum, Count
+from django.db.models import Count
 from django.urls import path, reverse
 from django.utils.http import urlencode
 from django.contrib.auth.admin import UserAdmin as DjangoUserAdmin
@@ -22,10 +22,17 @@ from .models import (
     Booking,
     TokenTransaction,
     SavedEvent,
+    OutboundEmail,
+    EventReminder,
+    Broadcast,
+    OutboundSMS,
+    NotificationAudience,
+    EventDailyStats,
 )
 from django.contrib.auth.models import User
 
 from .form import ProfileWithUserForm
+from .utils.dashboard import get_snapshot as get_dashboard_snapshot
 
 
 class EventHubAdminSite(AdminSite):
@@ -46,117 +53,9 @@ class EventHubAdminSite(AdminSite):
         if extra_context is None:
             extra_context = {}
 
-        # ---------- BASIC COUNTS ----------
-        total_users = Profile.objects.count()
-        total_customers = Profile.objects.filter(role="customer").count()
-        total_organizers = Profile.objects.filter(role="organizer").count()
-
-        total_events = Event.objects.count()
-        today = timezone.localdate()
-        upcoming_events_count = Event.objects.filter(date__gte=today).count()
-
-        # ---------- BOOKINGS / REVENUE ----------
-        paid_bookings = Booking.objects.filter(payment_status__iexact="paid")
-
-        tickets_sold = paid_bookings.aggregate(
-            total=Sum("tickets_booked")
-        )["total"] or 0
-
-        total_revenue = paid_bookings.aggregate(
-            total=Sum("total_price")
-        )["total"] or 0
-
-        total_capacity = Event.objects.aggregate(
-            total=Sum("capacity")
-        )["total"] or 0
-
-        total_available = max((total_capacity or 0) - (tickets_sold or 0), 0)
-
-        avg_tickets_per_event = 0
-        if total_events > 0:
-            avg_tickets_per_event = round(tickets_sold / total_events, 1)
-
-        # ---------- REVENUE LAST 6 MONTHS ----------
-        today_date = timezone.now().date()
-        month_labels = []
-        month_values = []
-
-        # last 6 calendar months (including current)
-        for i in range(5, -1, -1):
-            year = today_date.year
-            month = today_date.month - i
-            while month <= 0:
-                month += 12
-                year -= 1
-
-            month_labels.append(
-                timezone.datetime(year, month, 1).strftime("%b")
-            )
-
-            month_start = timezone.datetime(year, month, 1).date()
-            if month == 12:
-                next_month = timezone.datetime(year + 1, 1, 1).date()
-            else:
-                next_month = timezone.datetime(year, month + 1, 1).date()
-
-            month_end = next_month - timezone.timedelta(days=1)
-
-            month_sum = paid_bookings.filter(
-                booking_date__date__gte=month_start,
-                booking_date__date__lte=month_end,
-            ).aggregate(total=Sum("total_price"))["total"] or 0
-
-            month_values.append(float(month_sum))
-
-        # ---------- POPULAR EVENTS (TOP 4 BY TICKETS) ----------
-        popular_events_qs = (
-            paid_bookings.values("event")
-            .annotate(total_tickets=Sum("tickets_booked"))
-            .order_by("-total_tickets")[:4]
-        )
-
-        popular_events = []
-        for row in popular_events_qs:
-            try:
-                ev = Event.objects.get(pk=row["event"])
-                popular_events.append(
-                    {
-                        "title": ev.title,
-                        "tickets": row["total_tickets"] or 0,
-                        "date": ev.date,
-                    }
-                )
-            except Event.DoesNotExist:
-                continue
-
-        # ---------- NEXT UPCOMING EVENT ----------
-        upcoming_event = (
-            Event.objects.filter(date__gte=today)
-            .order_by("date")
-            .first()
-        )
-
-        extra_context.update(
-            {
-                # cards
-                "total_users": total_users,
-                "total_customers": total_customers,
-                "total_organizers": total_organizers,
-                "total_events": total_events,
-                "upcoming_events_count": upcoming_events_count,
-                "tickets_sold": tickets_sold,
-                "total_capacity": total_capacity,
-                "total_available": total_available,
-                "total_revenue": total_revenue,
-                "avg_tickets_per_event": avg_tickets_per_event,
-                # charts
-                "revenue_labels": month_labels,
-                "revenue_values": month_values,
-                # lists
-                "popular_events": popular_events,
-                "upcoming_event": upcoming_event,
-            }
-        )
+        # Cached snapshot, recomputed at most every DASHBOARD_SNAPSHOT_SECONDS
+        # (see user/utils/dashboard.py)
+        extra_context.update(get_dashboard_snapshot())
         return super().index(request, extra_context=extra_context)
 
 
@@ -331,7 +230,8 @@ class ProfileAdmin(admin.ModelAdmin):
 # ---------- Register models on custom admin site ----------
 
 # models that just use default views
-BASIC_MODELS = (Customer, Organizer, TokenTransaction, SavedEvent)
+BASIC_MODELS = (Customer, Organizer, TokenTransaction, SavedEvent, OutboundEmail, EventReminder, Broadcast, OutboundSMS,
+               NotificationAudience, EventDailyStats)
 
 for model in BASIC_MODELS:
     try:
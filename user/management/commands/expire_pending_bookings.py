@@ -0,0 +1,99 @@
+"""
+Expire abandoned PENDING bookings.
+
+book_event creates a pending Booking on every form submission, so retries
+and abandoned payment links pile up. This sweeper marks pending bookings
+older than the payment-link TTL (+ a grace period for late webhooks) as
+"expired" with batched set-based UPDATEs and releases any seats they hold.
+
+With --archive, expired bookings are also appended to a JSON-lines file and
+deleted, keeping the Booking table (and the indexes behind the hot queries)
+small.
+
+    python manage.py expire_pending_bookings
+    python manage.py expire_pending_bookings --archive /var/archive/bookings.jsonl
+"""
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+
+from user.models import Booking, Seat
+
+
+class Command(BaseCommand):
+    help = "Expire pending bookings older than the payment-link TTL (and optionally archive them)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--ttl", type=int, default=settings.PAYMENT_LINK_TTL_MINUTES,
+                            help="Payment link lifetime in minutes.")
+        parser.add_argument("--grace", type=int, default=10,
+                            help="Extra minutes to wait for late webhooks / callbacks.")
+        parser.add_argument("--batch-size", type=int, default=1000,
+                            help="Rows per UPDATE / DELETE statement.")
+        parser.add_argument("--archive", metavar="PATH",
+                            help="Append expired bookings to this JSON-lines file and delete them.")
+        parser.add_argument("--dry-run", action="store_true",
+                            help="Only report how many bookings would be expired.")
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(minutes=options["ttl"] + options["grace"])
+        stale = Booking.objects.filter(payment_status="pending", created_at__lt=cutoff)
+
+        if options["dry_run"]:
+            self.stdout.write(f"🧹 {stale.count()} pending bookings older than {cutoff:%Y-%m-%d %H:%M} would expire")
+            return
+
+        batch_size = options["batch_size"]
+        expired = seats_released = 0
+        last_id = 0
+        while True:
+            ids = list(
+                stale.filter(id__gt=last_id).order_by("id").values_list("id", flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+            last_id = ids[-1]
+            # Short transaction per batch → no long-held locks on the table
+            with transaction.atomic():
+                # Only seats still held by a pending booking: one paid since
+                # the ids were read keeps its seats (and isn't expired below)
+                seats_released += Seat.objects.filter(
+                    booking_id__in=ids, booking__payment_status="pending"
+                ).update(booking=None)
+                expired += Booking.objects.filter(
+                    id__in=ids, payment_status="pending"
+                ).update(payment_status="expired")
+
+        archived = self.archive(options["archive"], batch_size) if options["archive"] else 0
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Expired {expired} pending bookings, released {seats_released} seats"
+            + (f", archived {archived}" if options["archive"] else "")
+        ))
+
+    def archive(self, path, batch_size):
+        """Move every expired booking into `path` (JSON lines), batch by batch."""
+        archived = 0
+        # A late payment's refund (paid_late) is still owed: keep those rows
+        expired = (
+            Booking.objects.filter(payment_status="expired")
+            .exclude(refund_status__in=["pending", "processing"])
+            .order_by("id")
+        )
+        with open(path, "a", encoding="utf-8") as out:
+            while True:
+                rows = list(expired.values()[:batch_size])
+                if not rows:
+                    break
+                for row in rows:
+                    out.write(json.dumps(row, cls=DjangoJSONEncoder) + "\n")
+                out.flush()  # on disk before the rows are deleted
+                with transaction.atomic():
+                    Booking.objects.filter(id__in=[r["id"] for r in rows]).delete()
+                archived += len(rows)
+        return archived
@@ -0,0 +1,254 @@
+"""
+End-to-end booking load test.
+
+Drives the full purchase flow for many customers concurrently:
+
+    book_event → payment link → payment_success callback → razorpay_webhook
+                                      └─ _render_ticket (timed separately)
+
+against a throw-away test database and a local Razorpay stand-in
+(user/utils/razorpay_stub.py) that signs callbacks and webhooks with the
+configured secrets. Emails go to the in-memory backend.
+
+Prints requests/sec and p50/p95/p99 per stage so workers can be sized
+before an on-sale and the stage that saturates first is obvious.
+
+    python manage.py loadtest_booking --users 200 --concurrency 16
+
+Point DATABASE_URL at PostgreSQL for numbers that match production; the
+default SQLite database serialises all writes.
+"""
+import math
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta, time as dtime
+from pathlib import Path
+
+import requests
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test import Client
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+from django.urls import reverse
+from django.utils import timezone
+
+from user import views
+from user.models import Booking, Event, Organizer, Seat
+from user.utils.razorpay_stub import RazorpayStub
+
+STAGES = ("book_event", "payment_link", "payment_success", "render_ticket", "razorpay_webhook")
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(int(math.ceil(pct / 100 * len(sorted_values))) - 1, 0)
+    return sorted_values[rank]
+
+
+class Recorder:
+    """Collects per-stage latencies from many threads."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.timings = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def record(self, stage, seconds, ok=True):
+        with self.lock:
+            self.timings[stage].append(seconds)
+            if not ok:
+                self.errors[stage] += 1
+
+    def timed(self, stage, fn, *args, check=None, **kwargs):
+        started = time.perf_counter()
+        ok = False
+        try:
+            result = fn(*args, **kwargs)
+            ok = check(result) if check else True
+            return result
+        finally:
+            self.record(stage, time.perf_counter() - started, ok)
+
+
+class Command(BaseCommand):
+    help = "Load-test the booking → payment → ticket flow against a local Razorpay stand-in."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=100,
+                            help="Number of customers, each completing one booking.")
+        parser.add_argument("--concurrency", type=int, default=8,
+                            help="Customers running the flow at the same time.")
+        parser.add_argument("--tickets", type=int, default=1,
+                            help="Tickets per booking.")
+        parser.add_argument("--price", type=int, default=250,
+                            help="Ticket price in ₹ (must be > 0 to hit the gateway).")
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        tmpdir = tempfile.TemporaryDirectory()
+        db = connections["default"].settings_dict
+        if db["ENGINE"].endswith("sqlite3"):
+            # A file DB (not :memory:) so worker threads share one database.
+            db.setdefault("TEST", {})["NAME"] = str(Path(tmpdir.name) / "loadtest.sqlite3")
+            db.setdefault("OPTIONS", {}).update({"timeout": 60, "transaction_mode": "IMMEDIATE"})
+
+        runner = DiscoverRunner(verbosity=0, interactive=False)
+        old_config = runner.setup_databases()
+        try:
+            key_secret = settings.RAZORPAY_KEY_SECRET or "loadtest_key_secret"
+            webhook_secret = settings.RAZORPAY_WEBHOOK_SECRET or "loadtest_webhook_secret"
+            with RazorpayStub(key_secret, webhook_secret) as stub, override_settings(
+                RAZORPAY_BASE_URL=stub.base_url,
+                RAZORPAY_KEY_ID=settings.RAZORPAY_KEY_ID or "rzp_test_loadtest",
+                RAZORPAY_KEY_SECRET=key_secret,
+                RAZORPAY_WEBHOOK_SECRET=webhook_secret,
+                EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend",
+                PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"],
+            ):
+                self.run(stub, options)
+        finally:
+            connections.close_all()
+            runner.teardown_databases(old_config)
+            teardown_test_environment()
+            tmpdir.cleanup()
+
+    # ---------- fixtures ----------
+    def create_fixtures(self, options):
+        organizer_user = User.objects.create_user("loadtest-organizer", "organizer@loadtest.local", "x")
+        organizer = Organizer.objects.create(user=organizer_user, phone="9876543210")
+
+        capacity = options["users"] * options["tickets"] + 10
+        event = Event.objects.create(
+            organizer=organizer,
+            title="Load Test Live",
+            description="Synthetic event for load testing.",
+            date=timezone.localdate() + timedelta(days=30),
+            time=dtime(19, 0),
+            location="Localhost Arena",
+            capacity=capacity,
+            price=options["price"],
+        )
+        Seat.objects.bulk_create(
+            [Seat(event=event, seat_no=n) for n in range(1, capacity + 1)],
+            batch_size=1000,
+        )
+
+        customers = [
+            User.objects.create_user(f"loadtest-{i}", f"customer{i}@loadtest.local", "x")
+            for i in range(options["users"])
+        ]
+        return event, customers
+
+    # ---------- one customer ----------
+    def flow(self, stub, recorder, event, user, tickets):
+        http = requests.Session()
+        client = Client()
+        client.force_login(user)
+        try:
+            book = recorder.timed(
+                "book_event", client.post,
+                reverse("book_event", args=[event.id]),
+                {
+                    "booking_name": user.username,
+                    "customer_email": user.email,
+                    "customer_phone": "9876543210",
+                    "tickets_booked": tickets,
+                    "hub_tokens_used": 0,
+                },
+                check=lambda r: r.status_code == 200,
+            )
+            link_id = (
+                Booking.objects.filter(customer=user)
+                .order_by("-id")
+                .values_list("razorpay_link_id", flat=True)
+                .first()
+            )
+            if book.status_code != 200 or not link_id:
+                return
+
+            paid = recorder.timed(
+                "payment_link", http.get, stub.links[link_id]["short_url"],
+                check=lambda r: r.status_code == 200,
+            ).json()
+
+            recorder.timed(
+                "payment_success", client.get,
+                reverse("payment_success"), paid["callback"],
+                check=lambda r: r.status_code == 200,
+            )
+            recorder.timed(
+                "razorpay_webhook", client.post,
+                reverse("razorpay_webhook"),
+                data=paid["webhook"]["body"],
+                content_type="application/json",
+                HTTP_X_RAZORPAY_SIGNATURE=paid["webhook"]["signature"],
+                check=lambda r: r.status_code == 200,
+            )
+        except Exception as e:
+            self.stderr.write(f"❌ {user.username}: {e}")
+        finally:
+            http.close()
+            connections.close_all()
+
+    def run(self, stub, options):
+        event, customers = self.create_fixtures(options)
+        recorder = Recorder()
+
+        # Time _render_ticket on its own (it runs inside payment_success).
+        render_ticket = views._render_ticket
+
+        def timed_render_ticket(request, booking):
+            return recorder.timed("render_ticket", render_ticket, request, booking)
+
+        views._render_ticket = timed_render_ticket
+        self.stdout.write(
+            f"🚀 {len(customers)} customers, concurrency {options['concurrency']}, "
+            f"gateway stub at {stub.base_url}"
+        )
+        started = time.perf_counter()
+        try:
+            with ThreadPoolExecutor(max_workers=options["concurrency"]) as pool:
+                list(pool.map(
+                    lambda u: self.flow(stub, recorder, event, u, options["tickets"]),
+                    customers,
+                ))
+        finally:
+            views._render_ticket = render_ticket
+        wall = time.perf_counter() - started
+
+        self.report(recorder, wall, event)
+
+    def report(self, recorder, wall, event):
+        header = f"{'stage':<18}{'count':>7}{'errors':>8}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}"
+        self.stdout.write(header)
+        self.stdout.write("-" * len(header))
+        slowest = None
+        for stage in STAGES:
+            values = sorted(recorder.timings.get(stage, []))
+            if not values:
+                continue
+            p95 = percentile(values, 95)
+            if slowest is None or p95 > slowest[1]:
+                slowest = (stage, p95)
+            self.stdout.write(
+                f"{stage:<18}{len(values):>7}{recorder.errors.get(stage, 0):>8}"
+                f"{len(values) / wall:>9.1f}"
+                f"{percentile(values, 50) * 1000:>9.1f}{p95 * 1000:>9.1f}"
+                f"{percentile(values, 99) * 1000:>9.1f}{values[-1] * 1000:>9.1f}"
+            )
+
+        completed = Booking.objects.filter(event=event, payment_status="paid").count()
+        self.stdout.write("-" * len(header))
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {completed} paid bookings in {wall:.1f}s ({completed / wall:.1f} flows/s)"
+        ))
+        if slowest:
+            self.stdout.write(f"🐢 Slowest stage by p95: {slowest[0]} ({slowest[1] * 1000:.1f} ms)")
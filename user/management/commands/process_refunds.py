@@ -0,0 +1,38 @@
+"""
+Send queued refunds for canceled events.
+
+Refunds are queued by the organizer "Cancel Event" action. Run this from
+cron (or by hand after a cancellation); it resumes safely after a crash.
+
+    python manage.py process_refunds --workers 8
+    python manage.py process_refunds --event 42
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from user.utils.refunds import process_refunds
+
+
+class Command(BaseCommand):
+    help = "Process queued refunds for canceled events with bounded concurrency."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--event", type=int, help="Only refunds for this event id.")
+        parser.add_argument("--workers", type=int, default=8,
+                            help="Concurrent refund requests.")
+        parser.add_argument("--batch-size", type=int, default=200,
+                            help="Bookings claimed per batch.")
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        totals = process_refunds(
+            event_id=options["event"],
+            workers=options["workers"],
+            batch_size=options["batch_size"],
+            log=self.stderr.write,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {totals['refunded']} refunded, {totals['retry']} to retry, "
+            f"{totals['failed']} failed in {time.monotonic() - started:.1f}s"
+        ))
@@ -0,0 +1,112 @@
+"""
+Retention for site notifications.
+
+Notifications are only useful until their event is over, but every poll and
+stream reads the SiteNotification table, so it shouldn't keep growing. This
+command:
+
+1. deletes notifications whose event ended more than --days ago (and
+   event-less ones created that long ago), with their audience rows;
+2. compacts NotificationAudience: a membership row is only read for
+   notifications above the member's seen watermark
+   (Profile.last_seen_notification_id), so rows at or below it are dropped.
+
+Everything runs in batches of --batch-size rows, one short transaction per
+batch, so the tables are never locked for long. With --archive, deleted
+notifications are appended to a JSON-lines file first.
+
+    python manage.py prune_notifications
+    python manage.py prune_notifications --days 90 --archive /var/archive/notifications.jsonl
+"""
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import OuterRef, Q, Subquery
+from django.utils import timezone
+
+from user.models import NotificationAudience, Profile, SiteNotification
+
+
+class Command(BaseCommand):
+    help = "Delete notifications for past events and compact notification audiences."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=settings.NOTIFICATION_RETENTION_DAYS,
+                            help="Keep notifications until this many days after their event.")
+        parser.add_argument("--batch-size", type=int, default=1000,
+                            help="Rows per DELETE statement.")
+        parser.add_argument("--archive", metavar="PATH",
+                            help="Append deleted notifications to this JSON-lines file.")
+        parser.add_argument("--dry-run", action="store_true",
+                            help="Only report how many rows would be removed.")
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options["days"])
+        expired = SiteNotification.objects.filter(
+            Q(event__date__lt=cutoff.date()) | Q(event__isnull=True, created_at__lt=cutoff)
+        )
+        seen = NotificationAudience.objects.filter(
+            notification_id__lte=Subquery(
+                Profile.objects.filter(user_id=OuterRef("user_id")).values("last_seen_notification_id")[:1]
+            )
+        )
+
+        if options["dry_run"]:
+            self.stdout.write(
+                f"🧹 {expired.count()} notifications older than {cutoff:%Y-%m-%d} "
+                f"and {seen.count()} seen audience rows would be removed"
+            )
+            return
+
+        batch_size = options["batch_size"]
+        notifications, members = self.prune(expired, batch_size, options["archive"])
+        compacted = self.delete_batches(seen, batch_size)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Removed {notifications} notifications ({members} audience rows), "
+            f"compacted {compacted} seen audience rows"
+            + (f", archived to {options['archive']}" if options["archive"] and notifications else "")
+        ))
+
+    def prune(self, expired, batch_size, archive_path):
+        """Delete `expired` notifications batch by batch. Returns (notifications, audience rows)."""
+        notifications = members = 0
+        out = open(archive_path, "a", encoding="utf-8") if archive_path else None
+        try:
+            while True:
+                rows = list(expired.order_by("id").values()[:batch_size])
+                if not rows:
+                    break
+                ids = [row["id"] for row in rows]
+                if out:
+                    for row in rows:
+                        out.write(json.dumps(row, cls=DjangoJSONEncoder) + "\n")
+                    out.flush()  # on disk before the rows are deleted
+
+                # A targeted notification can have thousands of members:
+                # clear them in their own batches before the notifications go
+                members += self.delete_batches(
+                    NotificationAudience.objects.filter(notification_id__in=ids), batch_size
+                )
+                with transaction.atomic():
+                    notifications += SiteNotification.objects.filter(id__in=ids).delete()[0]
+        finally:
+            if out:
+                out.close()
+        return notifications, members
+
+    @staticmethod
+    def delete_batches(queryset, batch_size):
+        """Delete the NotificationAudience rows in `queryset`, `batch_size` at a time."""
+        deleted = last_id = 0
+        while True:
+            ids = list(queryset.filter(id__gt=last_id).order_by("id").values_list("id", flat=True)[:batch_size])
+            if not ids:
+                return deleted
+            last_id = ids[-1]
+            with transaction.atomic():
+                deleted += NotificationAudience.objects.filter(id__in=ids).delete()[0]
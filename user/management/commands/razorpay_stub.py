@@ -0,0 +1,36 @@
+"""
+Run the local Razorpay stand-in in the foreground.
+
+    python manage.py razorpay_stub --port 8765
+    RAZORPAY_BASE_URL=http://127.0.0.1:8765 python manage.py runserver
+
+Open a link's short_url (/pay/<link_id>) to "pay" it; the response holds the
+signed callback params and webhook body the real gateway would send.
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from user.utils.razorpay_stub import RazorpayStub
+
+
+class Command(BaseCommand):
+    help = "Serve a local Razorpay stand-in that signs callbacks and webhooks."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8765)
+
+    def handle(self, *args, **options):
+        stub = RazorpayStub(
+            key_secret=settings.RAZORPAY_KEY_SECRET or "",
+            webhook_secret=settings.RAZORPAY_WEBHOOK_SECRET or "",
+            host=options["host"],
+            port=options["port"],
+        )
+        self.stdout.write(self.style.SUCCESS(f"🧪 Razorpay stub listening on {stub.base_url}"))
+        try:
+            stub.server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            stub.server.server_close()
@@ -0,0 +1,32 @@
+"""
+Rebuild the EventDailyStats rollup from bookings.
+
+The rollup is kept up to date incrementally (see user/utils/stats.py); run
+this once after deploying it, or to repair it after bookings were changed
+outside the app (raw SQL, restores).
+
+    python manage.py rebuild_event_stats
+    python manage.py rebuild_event_stats --event 42 --event 43
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from user.utils.stats import rebuild
+
+
+class Command(BaseCommand):
+    help = "Recompute per-event daily booking stats from the Booking table."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--event", type=int, action="append", dest="events",
+                            help="Only rebuild this event (repeatable).")
+        parser.add_argument("--batch-size", type=int, default=1000,
+                            help="Rows per INSERT.")
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        rows = rebuild(options["events"], batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Rebuilt {rows} daily stats rows in {time.monotonic() - started:.1f}s"
+        ))
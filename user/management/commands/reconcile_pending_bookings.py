@@ -0,0 +1,170 @@
+"""
+Reconcile PENDING bookings whose Razorpay webhook / callback never arrived.
+
+Finds pending bookings that have a payment link and are older than
+--older-than minutes, fetches the link status from Razorpay with a bounded
+thread pool + rate limit, and applies the results in bulk:
+
+  - link "paid"                → complete_payment(): booking marked paid,
+                                 HUB tokens settled, seats assigned (or, if
+                                 it expired meanwhile, a refund queued)
+  - link "expired"/"cancelled" → booking marked failed
+  - anything else              → left pending for the next run
+
+Every write is conditional on the booking still being pending (or, for
+paid links, goes through complete_payment(), which does its work once), so
+the command is idempotent and safe to schedule every minute (overlapping runs
+only cost duplicate fetches).
+
+    python manage.py reconcile_pending_bookings --older-than 15 --workers 8 --rate 10
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from user.models import Booking
+from user.utils.booking import SeatAssignmentError, complete_payment
+from user.utils.payments import get_razorpay_client
+from user.utils.ratelimit import RateLimiter
+
+
+class Command(BaseCommand):
+    help = "Reconcile pending bookings against their Razorpay payment link status."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--older-than", type=int, default=15,
+                            help="Only check bookings created more than N minutes ago.")
+        parser.add_argument("--max-age", type=int, default=7 * 24 * 60,
+                            help="Skip bookings older than N minutes (left to the expiry sweeper).")
+        parser.add_argument("--workers", type=int, default=8,
+                            help="Concurrent Razorpay requests.")
+        parser.add_argument("--rate", type=float, default=10.0,
+                            help="Max Razorpay requests per second (0 = unlimited).")
+        parser.add_argument("--batch-size", type=int, default=500,
+                            help="Bookings fetched and applied per batch.")
+        parser.add_argument("--limit", type=int, default=0,
+                            help="Stop after checking N bookings (0 = no limit).")
+        parser.add_argument("--dry-run", action="store_true",
+                            help="Fetch statuses but do not write anything.")
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        candidates = (
+            Booking.objects.filter(
+                payment_status="pending",
+                razorpay_link_id__isnull=False,
+                created_at__lt=now - timedelta(minutes=options["older_than"]),
+                created_at__gte=now - timedelta(minutes=options["max_age"]),
+            )
+            .exclude(razorpay_link_id="")
+            .order_by("id")
+        )
+
+        client = get_razorpay_client()
+        limiter = RateLimiter(options["rate"])
+        batch_size = options["batch_size"]
+        limit = options["limit"]
+
+        def fetch(row):
+            booking_id, link_id = row
+            limiter.wait()
+            try:
+                return booking_id, client.payment_link.fetch(link_id)
+            except Exception as e:
+                self.stderr.write(f"❌ {link_id}: {e}")
+                return booking_id, None
+
+        totals = {"checked": 0, "paid": 0, "failed": 0, "unchanged": 0, "errors": 0}
+        started = time.monotonic()
+        last_id = 0
+
+        with ThreadPoolExecutor(max_workers=options["workers"]) as pool:
+            while True:
+                # Keyset pagination: cheap on large tables and stable while we write.
+                size = batch_size
+                if limit:
+                    size = min(size, limit - totals["checked"])
+                    if size <= 0:
+                        break
+                rows = list(
+                    candidates.filter(id__gt=last_id)
+                    .values_list("id", "razorpay_link_id")[:size]
+                )
+                if not rows:
+                    break
+                last_id = rows[-1][0]
+
+                results = list(pool.map(fetch, rows))
+                totals["checked"] += len(rows)
+                counts = self.apply(results, dry_run=options["dry_run"])
+                for key, value in counts.items():
+                    totals[key] += value
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Checked {totals['checked']} bookings in {elapsed:.1f}s: "
+            f"{totals['paid']} paid, {totals['failed']} failed, "
+            f"{totals['unchanged']} still pending, {totals['errors']} errors"
+            + (" (dry run)" if options["dry_run"] else "")
+        ))
+
+    def apply(self, results, dry_run=False):
+        """Write one batch of fetched link statuses with set-based updates."""
+        paid = {}
+        failed_ids = []
+        counts = {"paid": 0, "failed": 0, "unchanged": 0, "errors": 0}
+
+        for booking_id, link in results:
+            if link is None:
+                counts["errors"] += 1
+                continue
+            status = link.get("status")
+            if status == "paid":
+                payments = link.get("payments") or []
+                captured = [p for p in payments if p.get("status") == "captured"] or payments
+                paid[booking_id] = captured[-1] if captured else {}
+            elif status in ("expired", "cancelled"):
+                failed_ids.append(booking_id)
+            else:
+                counts["unchanged"] += 1
+
+        if dry_run:
+            counts["paid"] = len(paid)
+            counts["failed"] = len(failed_ids)
+            return counts
+
+        if failed_ids:
+            counts["failed"] = Booking.objects.filter(
+                id__in=failed_ids, payment_status="pending"
+            ).update(payment_status="failed")
+
+        # Same path as the payment callback: tokens, seats, and (through
+        # Booking.save()) the sales counters and daily stats
+        for booking in Booking.objects.filter(id__in=list(paid), payment_status="pending"):
+            payment = paid[booking.id]
+            try:
+                booking, _, transitioned = complete_payment(
+                    booking,
+                    payment_id=payment.get("payment_id") or payment.get("id"),
+                    method=payment.get("method"),
+                )
+            except SeatAssignmentError as e:
+                self.stderr.write(f"⚠️ Booking {booking.id} paid, but seats not assigned: {e}")
+                transitioned = e.transitioned
+            except ValueError as e:
+                # Rolled back: still pending, retried on the next run
+                self.stderr.write(f"❌ Booking {booking.id} not marked paid: {e}")
+                counts["errors"] += 1
+                continue
+            else:
+                if booking.paid_late:
+                    self.stderr.write(f"⚠️ Booking {booking.id} was paid after it was canceled or expired, refund queued")
+            if transitioned:
+                counts["paid"] += 1
+            else:
+                counts["unchanged"] += 1  # completed or canceled by someone else meanwhile
+
+        return counts
@@ -0,0 +1,67 @@
+"""
+Deliver queued organizer broadcasts.
+
+    python manage.py send_broadcasts                 # send queued broadcasts once
+    python manage.py send_broadcasts --loop          # long-running worker
+    python manage.py send_broadcasts --resume        # also pick up interrupted ones
+"""
+import smtplib
+import time
+
+from django.core.management.base import BaseCommand
+
+from user.models import Broadcast
+from user.utils.broadcast import claim_broadcast, claimable, send_broadcast
+
+
+class Command(BaseCommand):
+    help = "Send queued organizer broadcasts in chunks over pooled SMTP connections."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=4,
+                            help="Parallel SMTP connections.")
+        parser.add_argument("--chunk-size", type=int, default=200,
+                            help="Recipients per chunk (progress is saved after each).")
+        parser.add_argument("--resume", action="store_true",
+                            help="Also resume 'sending' broadcasts whose worker lease ran out.")
+        parser.add_argument("--loop", action="store_true",
+                            help="Keep polling for new broadcasts.")
+        parser.add_argument("--interval", type=float, default=5.0,
+                            help="Seconds between polls (--loop).")
+
+    def handle(self, *args, **options):
+        resume = options["resume"]
+        try:
+            while True:
+                broadcast = claimable(resume).select_related("event").order_by("id").first()
+                if broadcast is None:
+                    if not options["loop"]:
+                        break
+                    time.sleep(options["interval"])
+                    continue
+
+                # Take the lease; if another worker got there first, move on
+                if not claim_broadcast(broadcast, resume):
+                    continue
+
+                started = time.monotonic()
+                try:
+                    broadcast = send_broadcast(
+                        broadcast, workers=options["workers"], chunk_size=options["chunk_size"]
+                    )
+                except (OSError, smtplib.SMTPException) as e:
+                    # SMTP unavailable: requeue, the cursor keeps what was already sent
+                    Broadcast.objects.filter(pk=broadcast.pk).update(status="queued", claimed_at=None)
+                    self.stderr.write(f"❌ Broadcast {broadcast.pk} interrupted: {e}")
+                    if not options["loop"]:
+                        break
+                    time.sleep(options["interval"])
+                    continue
+                elapsed = time.monotonic() - started
+                self.stdout.write(self.style.SUCCESS(
+                    f"📣 '{broadcast.subject}' ({broadcast.event.title}): "
+                    f"{broadcast.sent_count}/{broadcast.total} sent, {broadcast.failed_count} failed "
+                    f"in {elapsed:.1f}s ({broadcast.sent_count / max(elapsed, 1e-6):.0f} msg/s)"
+                ))
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,42 @@
+"""
+Queue due saved-event reminders into the email outbox.
+
+Run every few minutes from cron (or with --loop as a worker) alongside
+`send_queued_emails`, which does the actual SMTP delivery.
+
+    python manage.py send_event_reminders
+    python manage.py send_event_reminders --loop --interval 60
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from user.utils.reminders import queue_due_reminders
+
+
+class Command(BaseCommand):
+    help = "Move due event reminders into the outbound email queue."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500,
+                            help="Reminders handled per transaction.")
+        parser.add_argument("--loop", action="store_true",
+                            help="Keep checking for due reminders.")
+        parser.add_argument("--interval", type=float, default=60,
+                            help="Seconds between checks (--loop).")
+
+    def handle(self, *args, **options):
+        total = 0
+        try:
+            while True:
+                handled = queue_due_reminders(batch_size=options["batch_size"])
+                total += handled
+                if handled:
+                    continue
+                if not options["loop"]:
+                    break
+                time.sleep(options["interval"])
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(self.style.SUCCESS(f"⏰ Queued {total} reminders"))
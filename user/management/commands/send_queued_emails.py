@@ -0,0 +1,119 @@
+"""
+Deliver the outbound email queue.
+
+Claims due emails in priority order (OTPs and tickets first), sends each
+batch over one reused SMTP connection (reconnecting every --per-connection
+messages to stay under provider limits) and retries failures with
+exponential backoff. Prints throughput and queue latency per email type.
+
+    python manage.py send_queued_emails            # drain once (cron)
+    python manage.py send_queued_emails --loop     # long-running worker
+"""
+import smtplib
+import time
+from collections import Counter, defaultdict
+
+from django.core.mail import get_connection
+from django.core.management.base import BaseCommand
+
+from user.utils.mail import MAX_ATTEMPTS, claim_batch, deliver
+
+
+def _percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+class Command(BaseCommand):
+    help = "Send queued emails in batches over a reused SMTP connection."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=100,
+                            help="Emails claimed per batch.")
+        parser.add_argument("--per-connection", type=int, default=100,
+                            help="Reconnect after this many messages.")
+        parser.add_argument("--max-attempts", type=int, default=MAX_ATTEMPTS,
+                            help="Give up on an email after this many failed sends.")
+        parser.add_argument("--loop", action="store_true",
+                            help="Keep polling for new emails instead of exiting when the queue is empty.")
+        parser.add_argument("--idle-sleep", type=float, default=2.0,
+                            help="Seconds to wait between polls of an empty queue (--loop).")
+
+    def handle(self, *args, **options):
+        self.stats = defaultdict(Counter)
+        self.latencies = defaultdict(list)
+        self.started = time.monotonic()
+
+        connection = None
+        on_connection = 0
+        try:
+            while True:
+                rows = claim_batch(options["batch_size"])
+                if not rows:
+                    if connection is not None:
+                        connection.close()  # don't hold an idle SMTP session
+                        connection = None
+                    if not options["loop"]:
+                        break
+                    time.sleep(options["idle_sleep"])
+                    continue
+
+                if connection is None or on_connection >= options["per_connection"]:
+                    if connection is not None:
+                        connection.close()
+                    connection = get_connection(fail_silently=False)
+                    on_connection = 0
+                    try:
+                        connection.open()
+                    except (OSError, smtplib.SMTPException) as e:
+                        # Claimed rows become due again when their lease expires
+                        self.stderr.write(f"❌ SMTP connection failed: {e}")
+                        connection = None
+                        if not options["loop"]:
+                            break
+                        time.sleep(options["idle_sleep"])
+                        continue
+
+                deliver(rows, connection, max_attempts=options["max_attempts"])
+                on_connection += len(rows)
+                self.record(rows)
+                if options["loop"]:
+                    self.report(final=False)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if connection is not None:
+                connection.close()
+
+        self.report(final=True)
+
+    def record(self, rows):
+        for row in rows:
+            if row.status == "sent":
+                self.stats[row.kind]["sent"] += 1
+                self.latencies[row.kind].append((row.sent_at - row.created_at).total_seconds())
+            elif row.status == "failed":
+                self.stats[row.kind]["failed"] += 1
+            else:
+                self.stats[row.kind]["retry"] += 1
+
+    def report(self, final):
+        elapsed = max(time.monotonic() - self.started, 1e-6)
+        totals = sum(self.stats.values(), Counter())
+        line = (
+            f"📬 {totals['sent']} sent, {totals['retry']} to retry, {totals['failed']} failed "
+            f"in {elapsed:.1f}s ({totals['sent'] / elapsed:.1f} msg/s)"
+        )
+        if not final:
+            self.stdout.write(line)
+            return
+
+        self.stdout.write(self.style.SUCCESS(line))
+        for kind in sorted(self.stats):
+            s, lat = self.stats[kind], self.latencies[kind]
+            self.stdout.write(
+                f"  {kind:<12} sent={s['sent']:<6} retry={s['retry']:<5} failed={s['failed']:<5} "
+                f"latency p50={_percentile(lat, 50):.1f}s p95={_percentile(lat, 95):.1f}s"
+            )
@@ -0,0 +1,61 @@
+"""
+Deliver the outbound SMS queue.
+
+Claims due messages, sends identical ones together in bulk gateway requests
+(rate limited, over one pooled session) and retries failures with
+exponential backoff.
+
+    python manage.py send_queued_sms            # drain once (cron)
+    python manage.py send_queued_sms --loop     # long-running worker
+"""
+import time
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+
+from user.utils.mail import MAX_ATTEMPTS
+from user.utils.sms import NUMBERS_PER_REQUEST, claim_batch, deliver, get_client
+
+
+class Command(BaseCommand):
+    help = "Send queued SMS in bulk gateway requests over a pooled session."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500,
+                            help="Messages claimed per batch.")
+        parser.add_argument("--per-request", type=int, default=NUMBERS_PER_REQUEST,
+                            help="Numbers per gateway request.")
+        parser.add_argument("--max-attempts", type=int, default=MAX_ATTEMPTS,
+                            help="Give up on a message after this many failed sends.")
+        parser.add_argument("--loop", action="store_true",
+                            help="Keep polling for new messages instead of exiting when the queue is empty.")
+        parser.add_argument("--idle-sleep", type=float, default=2.0,
+                            help="Seconds to wait between polls of an empty queue (--loop).")
+
+    def handle(self, *args, **options):
+        client = get_client()
+        totals = Counter()
+        started = time.monotonic()
+        try:
+            while True:
+                rows = claim_batch(options["batch_size"])
+                if not rows:
+                    if not options["loop"]:
+                        break
+                    time.sleep(options["idle_sleep"])
+                    continue
+
+                totals["requests"] += deliver(
+                    rows, client,
+                    max_attempts=options["max_attempts"],
+                    per_request=options["per_request"],
+                )
+                totals.update(row.status if row.status != "queued" else "retry" for row in rows)
+        except KeyboardInterrupt:
+            pass
+
+        elapsed = max(time.monotonic() - started, 1e-6)
+        self.stdout.write(self.style.SUCCESS(
+            f"📱 {totals['sent']} sent, {totals['retry']} to retry, {totals['failed']} failed "
+            f"in {totals['requests']} requests, {elapsed:.1f}s ({totals['sent'] / elapsed:.1f} sms/s)"
+        ))
@@ -0,0 +1,46 @@
+"""
+Run the local Fast2SMS stand-in in the foreground.
+
+    python manage.py sms_stub --port 8766
+    FAST2SMS_BASE_URL=http://127.0.0.1:8766 python manage.py send_queued_sms
+
+Every accepted SMS is printed as it arrives.
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from user.utils.sms_stub import Fast2SMSStub
+
+
+class Command(BaseCommand):
+    help = "Serve a local Fast2SMS stand-in that accepts and prints every SMS."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8766)
+        parser.add_argument("--fail-every", type=int, default=0,
+                            help="Answer every Nth request with a 500.")
+
+    def handle(self, *args, **options):
+        stub = Fast2SMSStub(
+            api_key=settings.FAST2SMS_API_KEY or "",
+            host=options["host"],
+            port=options["port"],
+            fail_every=options["fail_every"],
+        )
+        bulk = stub.bulk
+
+        def logged_bulk(authorization, form):
+            status, data = bulk(authorization, form)
+            self.stdout.write(f"{status} → {form.get('numbers', '')}: {form.get('message', '')[:60]}")
+            return status, data
+
+        stub.bulk = logged_bulk
+        self.stdout.write(self.style.SUCCESS(f"🧪 Fast2SMS stub listening on {stub.base_url}"))
+        try:
+            stub.server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            stub.server.server_close()
+            self.stdout.write(f"Received {len(stub.messages)} messages")
@@ -0,0 +1,32 @@
+"""
+Run a local SMTP sink in the foreground.
+
+    python manage.py smtp_sink --port 1025 --out /tmp/mails
+    EMAIL_HOST=127.0.0.1 EMAIL_PORT=1025 EMAIL_USE_TLS=0 python manage.py send_queued_emails
+
+Every message is accepted and, with --out, saved as an .eml file.
+"""
+from django.core.management.base import BaseCommand
+
+from user.utils.smtp_sink import SMTPSink
+
+
+class Command(BaseCommand):
+    help = "Serve a local SMTP server that accepts and stores every message."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=1025)
+        parser.add_argument("--out", metavar="DIR", help="Save each message as an .eml file here.")
+
+    def handle(self, *args, **options):
+        sink = SMTPSink(host=options["host"], port=options["port"], out_dir=options["out"])
+        host, port = sink.address
+        self.stdout.write(self.style.SUCCESS(f"📭 SMTP sink listening on {host}:{port}"))
+        try:
+            sink.server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            sink.server.server_close()
+            self.stdout.write(f"Received {len(sink.messages)} messages")
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.4 on 2026-10-19 09:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0002_booking_order_id'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='booking',
+            name='refund_attempts',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='canceled_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='booking',
+            name='refund_status',
+            field=models.CharField(choices=[('not_applicable', 'Not Applicable'), ('pending', 'Pending'), ('processing', 'Processing'), ('refunded', 'Refunded'), ('failed', 'Failed')], default='not_applicable', max_length=20),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-19 10:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0008_outbound_sms'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='booking',
+            name='attended_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='booking',
+            name='checkin_batch',
+            field=models.CharField(blank=True, max_length=36),
+        ),
+    ]
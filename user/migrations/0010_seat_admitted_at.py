@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-19 11:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0009_booking_checkin'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='seat',
+            name='admitted_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.4 on 2026-10-19 11:40
+
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def seen_by_to_watermark(apps, schema_editor):
+    """Each user's watermark starts at the newest notification they had seen."""
+    Profile = apps.get_model('user', 'Profile')
+    Seen = apps.get_model('user', 'SiteNotification').seen_by.through
+
+    latest = Seen.objects.values('user_id').annotate(last=Max('sitenotification_id'))
+    for row in latest.iterator():
+        Profile.objects.filter(user_id=row['user_id']).update(last_seen_notification_id=row['last'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0010_seat_admitted_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='last_seen_notification_id',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.RunPython(seen_by_to_watermark, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='sitenotification',
+            name='seen_by',
+        ),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 5.2.4 on 2026-10-19 12:15
+
+from django.db import migrations, models
+from django.db.models import F, Sum
+
+
+def backfill_counters(apps, schema_editor):
+    """Start the counters from current paid bookings; existing popular notices count as fired."""
+    Booking = apps.get_model('user', 'Booking')
+    Event = apps.get_model('user', 'Event')
+    SiteNotification = apps.get_model('user', 'SiteNotification')
+
+    sold = (
+        Booking.objects.filter(payment_status='paid')
+        .values('event_id')
+        .annotate(tickets=Sum(F('tickets_booked') - F('canceled_tickets')))
+    )
+    for row in sold.iterator():
+        Event.objects.filter(pk=row['event_id']).update(tickets_sold=max(row['tickets'] or 0, 0))
+
+    popular = SiteNotification.objects.filter(
+        notification_type='popular_event', event__isnull=False
+    ).values_list('event_id', flat=True)
+    Event.objects.filter(pk__in=list(popular)).update(fired_rules=['popular'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0011_notification_watermark'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='tickets_sold',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='sales_window_start',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='sales_this_window',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='sales_prev_window',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='fired_rules',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AlterField(
+            model_name='sitenotification',
+            name='notification_type',
+            field=models.CharField(choices=[('new_event', 'New Event'), ('popular_event', 'Popular Event'), ('selling_fast', 'Selling Fast'), ('last_seats', 'Last Seats')], max_length=20),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
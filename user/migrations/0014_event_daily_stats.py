@@ -0,0 +1,88 @@
+# Generated by Django 5.2.4 on 2026-10-19 14:05
+
+import django.db.models.deletion
+from collections import defaultdict
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Coalesce, TruncDate
+
+STAT_FIELDS = (
+    'bookings', 'bookings_canceled', 'tickets_sold', 'tickets_canceled',
+    'revenue', 'refunds', 'refunded_amount', 'admissions',
+)
+
+
+def backfill_stats(apps, schema_editor):
+    """Roll existing bookings up into daily rows, the same way rebuild_event_stats does."""
+    Booking = apps.get_model('user', 'Booking')
+    EventDailyStats = apps.get_model('user', 'EventDailyStats')
+
+    rows = defaultdict(dict)
+    was_paid = Q(payment_status='paid') | (
+        Q(payment_status='canceled') & (Q(razorpay_payment_id__gt='') | Q(amount_to_pay=0))
+    )
+    sales = (
+        Booking.objects.filter(was_paid)
+        .annotate(day=TruncDate('booking_date'))
+        .values('event_id', 'day')
+        .annotate(
+            bookings=Count('id'),
+            bookings_canceled=Count('id', filter=Q(payment_status='canceled')),
+            tickets_sold=Sum('tickets_booked'),
+            tickets_canceled=Sum('canceled_tickets'),
+            revenue=Sum('total_price'),
+            refunds=Count('id', filter=Q(refund_amount__gt=0)),
+            refunded_amount=Sum('refund_amount'),
+        )
+        .order_by()
+    )
+    for row in sales.iterator():
+        rows[row.pop('event_id'), row.pop('day')].update(row)
+
+    admissions = (
+        Booking.objects.filter(attended=True)
+        .annotate(day=TruncDate(Coalesce('attended_at', 'booking_date')))
+        .values('event_id', 'day')
+        .annotate(admissions=Count('id'))
+        .order_by()
+    )
+    for row in admissions.iterator():
+        rows[row['event_id'], row['day']]['admissions'] = row['admissions']
+
+    EventDailyStats.objects.bulk_create([
+        EventDailyStats(event_id=event_id, day=day,
+                        **{field: values.get(field) or 0 for field in STAT_FIELDS})
+        for (event_id, day), values in rows.items()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0013_notification_audience'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('bookings', models.PositiveIntegerField(default=0)),
+                ('bookings_canceled', models.PositiveIntegerField(default=0)),
+                ('tickets_sold', models.PositiveIntegerField(default=0)),
+                ('tickets_canceled', models.PositiveIntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('refunds', models.PositiveIntegerField(default=0)),
+                ('refunded_amount', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('admissions', models.PositiveIntegerField(default=0)),
+                ('event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='user.event')),
+            ],
+            options={
+                'verbose_name_plural': 'event daily stats',
+                'unique_together': {('event', 'day')},
+            },
+        ),
+        migrations.RunPython(backfill_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-19 16:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0014_event_daily_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='broadcast',
+            name='claimed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-19 16:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0015_broadcast_claimed_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='seat',
+            name='checkin_batch',
+            field=models.CharField(blank=True, max_length=36),
+        ),
+    ]
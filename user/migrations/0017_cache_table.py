@@ -0,0 +1,21 @@
+# Generated by Django 5.2.4 on 2026-10-19 17:10
+
+from django.core.management import call_command
+from django.db import migrations
+
+
+def create_cache_table(apps, schema_editor):
+    # The database cache backend (settings.CACHES) keeps its rows outside the
+    # ORM; createcachetable is a no-op if the table already exists
+    call_command("createcachetable", database=schema_editor.connection.alias, verbosity=0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0016_seat_checkin_batch'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_cache_table, migrations.RunPython.noop),
+    ]
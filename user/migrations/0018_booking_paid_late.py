@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-19 17:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0017_cache_table'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='booking',
+            name='paid_late',
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-19 17:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0018_booking_paid_late'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='booking',
+            name='refund_claimed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
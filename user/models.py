@@ -19,6 +19,8 @@ class Profile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     role = models.CharField(max_length=10, choices=ROLE_CHOICES, default='customer')
     hub_tokens = models.PositiveIntegerField(default=0)  # 🪙 new field for HUB tokens
+    # SiteNotifications with id <= this have been shown to the user
+    last_seen_notification_id = models.PositiveBigIntegerField(default=0)
 
 
     def __str__(self):
@@ -112,7 +114,15 @@ class Event(models.Model):
     price = models.DecimalField(max_digits=8, decimal_places=2, default=0.00)
     terms_and_conditions = models.TextField(blank=True, null=True)
     registration_deadline = models.DateField(blank=True, null=True)
-    registrations_count = models.PositiveIntegerField(default=0)  # auto-updated when someone registers
+    registrations_count = models.PositiveIntegerField(default=0)  # paid bookings, kept by user/utils/rules.py
+
+    # Incremental sales counters for the threshold rules (user/utils/rules.py)
+    tickets_sold = models.PositiveIntegerField(default=0)
+    sales_window_start = models.DateTimeField(blank=True, null=True)
+    sales_this_window = models.PositiveIntegerField(default=0)   # tickets sold since sales_window_start
+    sales_prev_window = models.PositiveIntegerField(default=0)   # ... in the hour before that
+    fired_rules = models.JSONField(default=list, blank=True)     # rule names already notified
+    canceled_at = models.DateTimeField(blank=True, null=True)  # set when organizer cancels the event
 
     def __str__(self):
         return self.title
@@ -139,6 +149,10 @@ class Event(models.Model):
     def is_full(self):
         return self.available_seats <= 0
 
+    @property
+    def is_canceled(self):
+        return self.canceled_at is not None
+
     @property
     def duration(self):
         """🕒 Calculate event duration in hours and minutes"""
@@ -202,7 +216,7 @@ class Booking(models.Model):
 
     payment_status = models.CharField(
         max_length=20,
-        choices=[("pending", "Pending"), ("paid", "Paid"),("canceled", "Canceled"),],
+        choices=[("pending", "Pending"), ("paid", "Paid"),("canceled", "Canceled"),("expired", "Expired"),],
         default="pending",
     )
 
@@ -210,6 +224,7 @@ class Booking(models.Model):
     REFUND_STATUS_CHOICES = [
         ("not_applicable", "Not Applicable"),
         ("pending", "Pending"),
+        ("processing", "Processing"),  # refund request in flight (bulk refund engine)
         ("refunded", "Refunded"),
         ("failed", "Failed"),
     ]
@@ -226,17 +241,29 @@ class Booking(models.Model):
 
     razorpay_refund_id = models.CharField(max_length=100, blank=True, null=True)  
     refund_amount = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    refund_attempts = models.PositiveSmallIntegerField(default=0)
+    refund_claimed_at = models.DateTimeField(blank=True, null=True)  # lease on a "processing" refund
+    paid_late = models.BooleanField(default=False)  # paid after it was canceled/expired: refunded, never sold
     payment_method = models.CharField(max_length=50, blank=True, null=True)
 
     created_at = models.DateTimeField(auto_now_add=True)
 
     attended = models.BooleanField(default=False)  # Track attendance
+    attended_at = models.DateTimeField(blank=True, null=True)
+    checkin_batch = models.CharField(max_length=36, blank=True)  # scanner batch that admitted it (idempotent retries)
 
+    class Meta:
+        indexes = [
+            # pending-booking sweeps (reconcile / expire) filter on both
+            models.Index(fields=["payment_status", "created_at"], name="booking_status_created_idx"),
+        ]
 
-    def save(self, *args, **kwargs):
+
+    def save(self, *args, check_seats=True, **kwargs):
+        # check_seats=False: caller already checked availability under a lock
         if self.event and self.tickets_booked:
             # Check seat availability (for paid bookings)
-            if self.payment_status == "paid" and self.tickets_booked > self.event.available_seats:
+            if check_seats and self.payment_status == "paid" and self.tickets_booked > self.event.available_seats:
                 raise ValueError("Not enough seats available for this booking.")
 
             # Auto calculate price
@@ -262,6 +289,8 @@ class Seat(models.Model):
         blank=True,
         related_name="seats",
     )
+    admitted_at = models.DateTimeField(blank=True, null=True)  # gate scan that let this seat in
+    checkin_batch = models.CharField(max_length=36, blank=True)  # offline scanner batch that admitted it
 
     class Meta:
         unique_together = ("event", "seat_no")
@@ -271,6 +300,33 @@ class Seat(models.Model):
         return f"{self.event.title} - Seat {self.seat_no}"
 
 
+# -------------------------------
+# Event Daily Stats (rollup)
+# Per-event, per-day booking figures, incremented as bookings change (see
+# user/utils/stats.py) so dashboards don't re-aggregate raw bookings.
+# `rebuild_event_stats` recomputes them from scratch.
+# -------------------------------
+class EventDailyStats(models.Model):
+    event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name="daily_stats")
+    day = models.DateField()
+
+    bookings = models.PositiveIntegerField(default=0)           # bookings paid that day
+    bookings_canceled = models.PositiveIntegerField(default=0)  # paid bookings fully canceled
+    tickets_sold = models.PositiveIntegerField(default=0)
+    tickets_canceled = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal("0.00"))
+    refunds = models.PositiveIntegerField(default=0)
+    refunded_amount = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal("0.00"))
+    admissions = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ("event", "day")
+        verbose_name_plural = "event daily stats"
+
+    def __str__(self):
+        return f"{self.event_id} @ {self.day}"
+
+
 class SavedEvent(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="saved_events")
     event = models.ForeignKey("Event", on_delete=models.CASCADE, related_name="saved_by")
@@ -300,6 +356,8 @@ class SiteNotification(models.Model):
     NOTIFICATION_TYPES = (
         ("new_event", "New Event"),
         ("popular_event", "Popular Event"),
+        ("selling_fast", "Selling Fast"),
+        ("last_seats", "Last Seats"),
     )
 
     title = models.CharField(max_length=255)
@@ -315,9 +373,199 @@ class SiteNotification(models.Model):
 
     created_at = models.DateTimeField(auto_now_add=True)
 
-    # users who already saw this notification
-    seen_by = models.ManyToManyField(User, blank=True, related_name="seen_notifications")
+    # Who it is for: {} = everyone, else any of {"categories": [...], "cities": [...],
+    # "organizer_bookers": <organizer id>}. Members are precomputed into
+    # NotificationAudience when the notification is created.
+    audience = models.JSONField(default=dict, blank=True)
+    targeted = models.BooleanField(default=False, editable=False)
+
+    # Who has seen what is a per-user watermark: Profile.last_seen_notification_id
+
+    def save(self, *args, **kwargs):
+        self.targeted = bool(self.audience)
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.title} ({self.notification_type})"
+
+
+# -------------------------------
+# Notification Audience
+# Precomputed members of a targeted SiteNotification, so fetching a user's
+# notifications is one indexed lookup instead of interest matching.
+# -------------------------------
+class NotificationAudience(models.Model):
+    notification = models.ForeignKey(SiteNotification, on_delete=models.CASCADE, related_name="members")
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="+")
+
+    class Meta:
+        unique_together = ("user", "notification")  # (user, notification) index for the fetch path
+
+    def __str__(self):
+        return f"{self.notification_id} → {self.user_id}"
     
+
+# -------------------------------
+# Outbound Email (outbox)
+# Views queue emails here; `send_queued_emails` delivers them in batches
+# over one SMTP connection with retry + backoff.
+# -------------------------------
+class OutboundEmail(models.Model):
+    KIND_CHOICES = [
+        ("otp", "Password OTP"),
+        ("ticket", "Ticket"),
+        ("contact", "Contact"),
+        ("register", "Welcome"),
+        ("saved_event", "Saved Event"),
+        ("reminder", "Reminder"),
+        ("login", "Login Notice"),
+        ("other", "Other"),
+    ]
+    # lower = sent first
+    PRIORITY = {
+        "otp": 0,
+        "ticket": 10,
+        "contact": 20,
+        "register": 30,
+        "saved_event": 40,
+        "reminder": 50,
+        "login": 90,
+        "other": 60,
+    }
+    STATUS_CHOICES = [
+        ("queued", "Queued"),
+        ("sent", "Sent"),
+        ("failed", "Failed"),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES, default="other")
+    priority = models.PositiveSmallIntegerField(default=60)
+    subject = models.CharField(max_length=255)
+    body = models.TextField(blank=True)
+    html = models.TextField(blank=True)
+    from_email = models.CharField(max_length=255, blank=True)
+    to = models.JSONField(default=list)
+    # [{"filename", "mimetype", "content" (base64) | "storage_path", "inline"}]
+    attachments = models.JSONField(default=list, blank=True)
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="queued")
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)  # also the worker's claim lease
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "priority", "next_attempt_at"], name="outbox_queue_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.kind}: {self.subject} → {', '.join(self.to)} ({self.status})"
+
+
+# -------------------------------
+# Event Reminder
+# One row per (user, event, days_before); `send_event_reminders` queues the
+# due ones into the outbox. Replaces in-process threading.Timer reminders.
+# -------------------------------
+class EventReminder(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="event_reminders")
+    event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name="reminders")
+    days_before = models.PositiveSmallIntegerField()
+    send_at = models.DateTimeField()
+    sent_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        unique_together = ("user", "event", "days_before")
+        indexes = [
+            # only unsent reminders are ever scanned
+            models.Index(
+                fields=["send_at"],
+                name="reminder_due_idx",
+                condition=models.Q(sent_at__isnull=True),
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} – {self.event.title} ({self.days_before}d before)"
+
+
+# -------------------------------
+# Broadcast
+# Organizer message to everyone with a paid booking for an event.
+# Delivered by `send_broadcasts`; `cursor` is the last recipient email
+# sent, so an interrupted broadcast resumes where it stopped.
+# -------------------------------
+class Broadcast(models.Model):
+    STATUS_CHOICES = [
+        ("queued", "Queued"),
+        ("sending", "Sending"),
+        ("sent", "Sent"),
+        ("failed", "Failed"),
+    ]
+
+    event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name="broadcasts")
+    sender = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    subject = models.CharField(max_length=200)
+    message = models.TextField()
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="queued")
+    total = models.PositiveIntegerField(default=0)
+    sent_count = models.PositiveIntegerField(default=0)
+    failed_count = models.PositiveIntegerField(default=0)
+    cursor = models.CharField(max_length=254, blank=True)
+    # Worker lease: set when a worker claims the broadcast, renewed after every chunk
+    claimed_at = models.DateTimeField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    @property
+    def progress(self):
+        if not self.total:
+            return 100 if self.status == "sent" else 0
+        return min(100, round(100 * (self.sent_count + self.failed_count) / self.total))
+
+    def __str__(self):
+        return f"{self.event.title}: {self.subject} ({self.status})"
+
+
+# -------------------------------
+# Outbound SMS (outbox)
+# One row per (message, number). `send_queued_sms` sends identical
+# messages together through the gateway's comma-separated `numbers` field.
+# -------------------------------
+class OutboundSMS(models.Model):
+    KIND_CHOICES = [
+        ("ticket", "Ticket"),
+        ("reminder", "Reminder"),
+        ("other", "Other"),
+    ]
+    STATUS_CHOICES = [
+        ("queued", "Queued"),
+        ("sent", "Sent"),
+        ("failed", "Failed"),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES, default="other")
+    phone = models.CharField(max_length=15)  # normalised 10-digit number
+    message = models.TextField()
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="queued")
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)  # also the worker's claim lease
+    last_error = models.TextField(blank=True)
+    request_id = models.CharField(max_length=100, blank=True)  # gateway's id for the bulk send
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        verbose_name = "outbound SMS"
+        verbose_name_plural = "outbound SMS"
+        indexes = [
+            models.Index(fields=["status", "next_attempt_at"], name="sms_queue_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.kind}: {self.phone} ({self.status})"
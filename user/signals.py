@@ -1,12 +1,17 @@
 # signals.py
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_init, post_save
 from django.contrib.auth.models import User
 from django.dispatch import receiver
 from .models import Organizer, Profile
 from django.db.models.signals import post_save
 from django.dispatch import receiver
+from django.db import transaction
 
 from .models import Event, Booking, SiteNotification
+from .utils.notifications import FIELDS as NOTIFICATION_FIELDS, hub as notification_hub, materialize_audience
+from .utils.dashboard import invalidate_snapshot as invalidate_dashboard
+from .utils.rules import record_sales
+from .utils.stats import UNSAVED, booking_deltas, booking_state, record_stats
 
 
 @receiver(post_save, sender=User)
@@ -14,7 +19,10 @@ def create_or_update_profile(sender, instance, created, **kwargs):
     if created:
         Profile.objects.create(user=instance)
     else:
-        instance.profile.save()
+        # Only make sure it exists: saving a cached instance.profile would
+        # write back stale HUB tokens and notification watermarks (every
+        # login saves the user)
+        Profile.objects.get_or_create(user=instance)
 
 
 
@@ -34,41 +42,94 @@ def notify_new_event(sender, instance, created, **kwargs):
             notification_type="new_event",
             defaults={
                 "title": "🎉 New Event Live",
-                "message": f"{instance.title} is now open for registration."
+                "message": f"{instance.title} is now open for registration.",
+                # Interested customers and past bookers of this organizer
+                "audience": {"categories": [instance.category], "organizer_bookers": instance.organizer_id},
             }
         )
 
 
 # ===============================
-# POPULAR EVENT NOTIFICATION
+# ADMIN DASHBOARD SNAPSHOT
+# ===============================
+@receiver(post_save, sender=Event)
+@receiver(post_delete, sender=Event)
+def drop_dashboard_snapshot(sender, instance, created=True, **kwargs):
+    """New and deleted events change every dashboard card: don't wait for the snapshot to expire."""
+    if created:
+        transaction.on_commit(invalidate_dashboard)
+
+
+# ===============================
+# PUSH NEW NOTIFICATIONS
+# ===============================
+@receiver(post_save, sender=SiteNotification)
+def push_site_notification(sender, instance, created, **kwargs):
+    """
+    Fan new notifications out to this process's open notification streams
+    (other processes pick them up on their next hub tick). Targeted ones get
+    their audience stored first, in the same transaction.
+    """
+    if created:
+        materialize_audience(instance)
+        row = {field: getattr(instance, field) for field in NOTIFICATION_FIELDS}
+        transaction.on_commit(lambda: notification_hub.publish(row))
+
+
+# ===============================
+# SALES COUNTERS + THRESHOLD RULES
 # ===============================
+def _paid_tickets(booking):
+    """(paid tickets, is paid) as counted by the sales counters, or None if not loaded."""
+    if {"payment_status", "tickets_booked", "canceled_tickets"} & booking.get_deferred_fields():
+        return None
+    if booking.payment_status != "paid":
+        return 0, 0
+    return booking.tickets_booked - booking.canceled_tickets, 1
+
+
+@receiver(post_init, sender=Booking)
+def remember_paid_tickets(sender, instance, **kwargs):
+    instance._counted = _paid_tickets(instance) if instance.pk else (0, 0)
+
+
 @receiver(post_save, sender=Booking)
-def notify_popular_event(sender, instance, created, **kwargs):
+def update_sales_counters(sender, instance, created, **kwargs):
     """
-    Trigger when event becomes popular (based on PAID bookings)
+    Feed the change in paid tickets to the rules engine. Deferred until
+    commit so the event row lock stays out of the booking transaction
+    (runs immediately when not in one).
     """
-    if instance.payment_status != "paid":
+    before = (0, 0) if created else getattr(instance, "_counted", None)
+    after = _paid_tickets(instance)
+    if before is None or after is None:
         return
+    instance._counted = after
 
-    event = instance.event
+    tickets, bookings = after[0] - before[0], after[1] - before[1]
+    if tickets or bookings:
+        event_id = instance.event_id
+        transaction.on_commit(lambda: record_sales(event_id, tickets, bookings))
 
-    # Count real paid bookings
-    paid_count = Booking.objects.filter(
-        event=event,
-        payment_status="paid"
-    ).count()
 
-    event.registrations_count = paid_count
-    event.save(update_fields=["registrations_count"])
+# ===============================
+# DAILY STATS ROLLUP
+# ===============================
+@receiver(post_init, sender=Booking)
+def remember_stats_state(sender, instance, **kwargs):
+    instance._stats_state = booking_state(instance) if instance.pk else UNSAVED
 
-    POPULAR_THRESHOLD = 50  # change if needed
 
-    if paid_count >= POPULAR_THRESHOLD:
-        SiteNotification.objects.get_or_create(
-            event=event,
-            notification_type="popular_event",
-            defaults={
-                "title": "🔥 Popular Event",
-                "message": f"{event.title} is filling fast. Book now!"
-            }
-        )
+@receiver(post_save, sender=Booking)
+def update_daily_stats(sender, instance, created, **kwargs):
+    """Add this save's changes to the event's EventDailyStats row once committed."""
+    before = UNSAVED if created else getattr(instance, "_stats_state", None)
+    after = booking_state(instance)
+    if before is None or after is None:
+        return
+    instance._stats_state = after
+
+    deltas = booking_deltas(before, after)
+    if deltas:
+        event_id = instance.event_id
+        transaction.on_commit(lambda: record_stats(event_id, **deltas))
@@ -1,3 +1,755 @@
-from django.test import TestCase
+from datetime import date, time, timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from .models import Booking, Event, Organizer, Profile, Seat
+
+
+def make_user(username, **customer):
+    user = User.objects.create_user(username, f"{username}@example.com", "pw")
+    if customer:
+        from .models import Customer
+        Customer.objects.create(user=user, **customer)
+    return user
+
+
+def make_event(organizer=None, capacity=10, price="100.00", seats=True, **fields):
+    if organizer is None:
+        organizer = Organizer.objects.create(user=make_user(f"org{Organizer.objects.count()}"), phone="9999999999")
+    event = Event.objects.create(
+        organizer=organizer,
+        title=fields.pop("title", "Test Event"),
+        description="",
+        date=fields.pop("date", date.today() + timedelta(days=30)),
+        time=time(18, 0),
+        location="Hall",
+        capacity=capacity,
+        price=Decimal(price),
+        **fields,
+    )
+    if seats:
+        Seat.objects.bulk_create([Seat(event=event, seat_no=n) for n in range(1, capacity + 1)])
+    return event
+
+
+def make_booking(event, customer=None, tickets=1, **fields):
+    return Booking.objects.create(
+        event=event,
+        customer=customer,
+        booking_name="Guest",
+        customer_email="guest@example.com",
+        tickets_booked=tickets,
+        amount_to_pay=fields.pop("amount_to_pay", Decimal(tickets) * event.price),
+        **fields,
+    )
+
+
+class ReconcilePendingBookingsTests(TestCase):
+    def test_reconciled_booking_is_completed_like_the_payment_callback(self):
+        from .management.commands.reconcile_pending_bookings import Command
+
+        customer = make_user("buyer")
+        Profile.objects.filter(user=customer).update(hub_tokens=30)
+        event = make_event(price="100.00")
+        booking = make_booking(event, customer, tickets=2, hub_tokens_used=20,
+                               amount_to_pay=Decimal("180.00"), razorpay_link_id="plink_1")
+
+        link = {"status": "paid", "payments": [{"payment_id": "pay_1", "status": "captured", "method": "upi"}]}
+        counts = Command().apply([(booking.id, link)])
+        # A second run (or a late callback) changes nothing
+        Command().apply([(booking.id, link)])
+
+        booking.refresh_from_db()
+        self.assertEqual(counts["paid"], 1)
+        self.assertEqual(booking.payment_status, "paid")
+        self.assertEqual(booking.razorpay_payment_id, "pay_1")
+        self.assertEqual(booking.seats.count(), 2)
+        # 30 - 20 spent + 3 earned (₹180 / 50)
+        self.assertEqual(Profile.objects.get(user=customer).hub_tokens, 13)
+        self.assertEqual(booking.hub_tokens_awarded, 3)
+
+
+    def test_booking_that_cannot_be_saved_as_paid_is_not_counted(self):
+        from .management.commands.reconcile_pending_bookings import Command
+        from .utils.booking import assign_seats_for_booking
+
+        event = make_event(capacity=1)
+        assign_seats_for_booking(make_booking(event, payment_status="paid"))
+        booking = make_booking(event, razorpay_link_id="plink_1")
+
+        link = {"status": "paid", "payments": [{"payment_id": "pay_1", "status": "captured"}]}
+        counts = Command(stderr=mock.Mock()).apply([(booking.id, link)])
+
+        booking.refresh_from_db()
+        self.assertEqual((counts["paid"], counts["errors"]), (0, 1))
+        self.assertEqual(booking.payment_status, "pending")
+
+
+class LatePaymentTests(TestCase):
+    def test_payment_after_cancellation_is_refunded_not_sold(self):
+        from .models import EventDailyStats
+        from .utils.booking import complete_payment
+        from .utils.refunds import cancel_event, process_refunds
+        from .utils.stats import TOTALS, rebuild
+
+        customer = make_user("buyer")
+        event = make_event()
+        booking = make_booking(event, customer, tickets=2, razorpay_link_id="plink_1")
+        cancel_event(event)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            booking, earned, transitioned = complete_payment(booking, payment_id="pay_late")
+            # The webhook after the callback changes nothing
+            complete_payment(booking, payment_id="pay_late")
+
+        event.refresh_from_db()
+        self.assertFalse(transitioned)
+        self.assertEqual(earned, 0)
+        self.assertEqual(booking.payment_status, "canceled")
+        self.assertEqual((booking.refund_status, booking.razorpay_payment_id), ("pending", "pay_late"))
+        self.assertEqual(booking.seats.count(), 0)
+        self.assertEqual(event.tickets_sold, 0)
+        self.assertEqual(Profile.objects.get(user=customer).hub_tokens, 0)
+
+        client = FakeRazorpay()
+        with mock.patch("user.utils.refunds.get_razorpay_client", return_value=client), \
+                mock.patch("user.utils.refunds.live_refunds_enabled", return_value=True):
+            process_refunds(event_id=event.id, workers=1)
+        booking.refresh_from_db()
+        self.assertEqual(booking.refund_status, "refunded")
+        self.assertEqual(len(client.refunds), 1)
+
+        incremental = EventDailyStats.objects.filter(event=event).aggregate(**TOTALS)
+        self.assertEqual(incremental, {"paid_bookings": 0, "tickets": 0, "tickets_canceled": 0,
+                                       "net_revenue": 0, "admissions": 0})
+        rebuild([event.id])
+        self.assertEqual(EventDailyStats.objects.filter(event=event).aggregate(**TOTALS), incremental)
+
+
+class PlaceBookingTests(TestCase):
+    def test_tokens_spent_since_the_profile_was_read_reject_the_booking(self):
+        from .utils.booking import BookingError, place_booking
+
+        customer = make_user("buyer")
+        Profile.objects.filter(user=customer).update(hub_tokens=100)
+        profile = Profile.objects.get(user=customer)
+        event = make_event(price="100.00")
+        # A concurrent booking spends them after this request read the profile
+        Profile.objects.filter(pk=profile.pk).update(hub_tokens=30)
+
+        booking = Booking(customer=customer, booking_name="Guest",
+                          customer_email="guest@example.com", tickets_booked=1)
+        with self.assertRaises(BookingError):
+            place_booking(booking, event, profile, tokens_used=100)
+
+        self.assertFalse(Booking.objects.filter(event=event).exists())
+        self.assertEqual(Profile.objects.get(pk=profile.pk).hub_tokens, 30)
+
+
+class FakeRazorpay:
+    """Records refunds; the first call can be made to fail after Razorpay accepted it."""
+
+    def __init__(self, fail_first=False):
+        self.payment = self
+        self.refunds = []
+        self.fail_first = fail_first
+
+    def refund(self, payment_id, data):
+        self.refunds.append(data)
+        if self.fail_first:
+            self.fail_first = False
+            raise TimeoutError("read timed out")
+        return {"id": f"rfnd_{len(self.refunds)}"}
+
+    def fetch_multiple_refund(self, payment_id):
+        return {"items": [{"id": f"rfnd_{i + 1}", "receipt": r["receipt"]} for i, r in enumerate(self.refunds)]}
+
+
+class RefundRetryTests(TestCase):
+    def setUp(self):
+        from .utils.refunds import cancel_event
+
+        self.event = make_event(price="100.00")
+        self.booking = make_booking(self.event, make_user("buyer"), tickets=2,
+                                    payment_status="paid", razorpay_payment_id="pay_1")
+        cancel_event(self.event)
+
+    def run_refunds(self, client):
+        from .utils.refunds import process_refunds
+
+        with mock.patch("user.utils.refunds.get_razorpay_client", return_value=client), \
+                mock.patch("user.utils.refunds.live_refunds_enabled", return_value=True):
+            return process_refunds(event_id=self.event.id, workers=1)
+
+    def test_refund_that_timed_out_is_not_sent_again(self):
+        client = FakeRazorpay(fail_first=True)
+        self.assertEqual(self.run_refunds(client)["retry"], 1)
+        self.booking.refresh_from_db()
+        self.assertEqual(self.booking.refund_status, "pending")
+
+        # Razorpay did accept the first call: the retry must find it by receipt
+        self.assertEqual(self.run_refunds(client)["refunded"], 1)
+        self.booking.refresh_from_db()
+        self.assertEqual(len(client.refunds), 1)
+        self.assertEqual(self.booking.refund_status, "refunded")
+        self.assertEqual(self.booking.razorpay_refund_id, "rfnd_1")
+        self.assertEqual(self.booking.refund_amount, Decimal("200.00"))
+
+    def test_first_attempt_refunds_once(self):
+        client = FakeRazorpay()
+        self.assertEqual(self.run_refunds(client)["refunded"], 1)
+        self.assertEqual(self.run_refunds(client)["refunded"], 0)
+        self.assertEqual(len(client.refunds), 1)
+
+    def test_refund_in_flight_is_only_taken_over_after_its_lease(self):
+        from .utils.refunds import REFUND_CLAIM_LEASE
+
+        # Another worker claimed it a minute ago and is still sending it
+        claimed = Booking.objects.filter(pk=self.booking.pk)
+        claimed.update(refund_status="processing", refund_attempts=1,
+                       refund_claimed_at=timezone.now() - timedelta(minutes=1))
+        client = FakeRazorpay()
+        self.assertEqual(self.run_refunds(client), {"refunded": 0, "retry": 0, "failed": 0})
+        self.assertEqual(client.refunds, [])
+
+        # That worker crashed: once the lease runs out the refund is resumed
+        claimed.update(refund_claimed_at=timezone.now() - REFUND_CLAIM_LEASE - timedelta(minutes=1))
+        self.assertEqual(self.run_refunds(client)["refunded"], 1)
+        self.booking.refresh_from_db()
+        self.assertEqual((self.booking.refund_status, self.booking.refund_claimed_at), ("refunded", None))
+
+
+class ExpirePendingBookingsTests(TestCase):
+    def test_only_stale_pending_bookings_expire_and_owed_refunds_stay(self):
+        import os
+        import tempfile
+
+        from django.core.management import call_command
+
+        from .utils.booking import assign_seats_for_booking
+
+        event = make_event()
+        stale = make_booking(event)
+        fresh = make_booking(event)
+        paid = make_booking(event, payment_status="paid")
+        assign_seats_for_booking(paid)
+        refund_owed = make_booking(event, payment_status="expired", paid_late=True,
+                                   razorpay_payment_id="pay_late", refund_status="pending")
+        Booking.objects.filter(pk__in=[stale.pk, paid.pk, refund_owed.pk]).update(
+            created_at=timezone.now() - timedelta(days=1))
+
+        fd, path = tempfile.mkstemp(suffix=".jsonl")
+        os.close(fd)
+        self.addCleanup(os.remove, path)
+        call_command("expire_pending_bookings", archive=path, stdout=mock.Mock())
+
+        self.assertFalse(Booking.objects.filter(pk=stale.pk).exists())  # expired, then archived
+        self.assertEqual(Booking.objects.get(pk=fresh.pk).payment_status, "pending")
+        self.assertEqual(Booking.objects.get(pk=paid.pk).seats.count(), 1)
+        self.assertEqual(Booking.objects.get(pk=refund_owed.pk).refund_status, "pending")
+        with open(path, encoding="utf-8") as archive:
+            self.assertEqual(len(archive.readlines()), 1)
+
+
+class QrCacheTests(TestCase):
+    def test_one_off_payment_qrs_are_not_stored(self):
+        import tempfile
+        from pathlib import Path
+
+        from .utils.qr import qr_data_uri, qr_url
+
+        with tempfile.TemporaryDirectory() as tmp, override_settings(QR_CACHE_DIR=Path(tmp)):
+            self.assertTrue(qr_data_uri("https://rzp.io/i/once").startswith("data:image/png;base64,"))
+            self.assertEqual(list(Path(tmp).iterdir()), [])
+            qr_url("https://example.com/ticket/1")
+            self.assertEqual(len(list(Path(tmp).glob("*.png"))), 1)
+
+
+class TicketTokenTests(TestCase):
+    def setUp(self):
+        from .utils.tickets import pack_ticket_token
+
+        self.expires = 2_000_000_000
+        self.token = pack_ticket_token(42, 7, 3, 4, self.expires)
+
+    def read(self, token, **kwargs):
+        from .utils.tickets import read_ticket_token
+        return read_ticket_token(token, now=self.expires - 1, **kwargs)
+
+    def test_valid_token_round_trips(self):
+        claims = self.read(self.token, event_id="7")
+        self.assertEqual((claims.booking_id, claims.event_id, claims.seat_range), (42, 7, (3, 4)))
+
+    def test_forged_token_is_rejected(self):
+        from .utils.tickets import InvalidTicket, _b64decode, _b64encode, _LAYOUT
+
+        raw = bytearray(_b64decode(self.token))
+        raw[1:9] = (43).to_bytes(8, "big")  # another booking id, same MAC
+        with self.assertRaises(InvalidTicket):
+            self.read(_b64encode(bytes(raw)))
+        with self.assertRaises(InvalidTicket):
+            self.read(self.token[:-2])
+        with self.assertRaises(InvalidTicket):
+            self.read(_b64encode(_LAYOUT.pack(1, 42, 7, 3, 4, self.expires) + b"\0" * 12))
+
+    def test_expired_token_is_rejected(self):
+        from .utils.tickets import InvalidTicket, read_ticket_token
+
+        with self.assertRaisesMessage(InvalidTicket, "expired"):
+            read_ticket_token(self.token, now=self.expires + 1)
+
+    def test_wrong_event_is_rejected(self):
+        from .utils.tickets import InvalidTicket
+
+        with self.assertRaisesMessage(InvalidTicket, "different event"):
+            self.read(self.token, event_id=8)
+        with self.assertRaises(InvalidTicket):
+            self.read(self.token, event_id="abc")
+
+    def test_bare_booking_ids_are_rejected_unless_enabled(self):
+        from .utils.checkin import booking_id_from_code
+        from .utils.tickets import InvalidTicket
+
+        with self.assertRaises(InvalidTicket):
+            booking_id_from_code("https://example.com/organizer/verify-customers/qr/42/", 7)
+        with override_settings(LEGACY_TICKET_QR_UNTIL=(date.today() - timedelta(days=1)).isoformat()):
+            with self.assertRaises(InvalidTicket):
+                booking_id_from_code("42", 7)
+        with override_settings(LEGACY_TICKET_QR_UNTIL=date.today().isoformat()):
+            self.assertEqual(booking_id_from_code("42", 7), 42)
+
+
+class TicketViewTests(TestCase):
+    def test_only_the_customer_and_the_organizer_see_a_ticket(self):
+        from django.urls import reverse
+
+        customer = make_user("buyer")
+        event = make_event()
+        booking = make_booking(event, customer, payment_status="paid")
+        url = reverse("ticket_view", args=[booking.id])
+
+        self.assertEqual(self.client.get(url).status_code, 302)  # to the login page
+        self.client.force_login(make_user("stranger"))
+        self.assertEqual(self.client.get(url).status_code, 404)
+        for user in (customer, event.organizer.user):
+            self.client.force_login(user)
+            self.assertEqual(self.client.get(url).status_code, 200)
+
+
+class EventTicketsPdfTests(TestCase):
+    def test_second_render_of_the_same_event_waits_for_the_first(self):
+        import tempfile
+        from .utils.pdf_tickets import RenderInProgress, build_event_tickets, event_render_lock
+
+        event = make_event()
+        with tempfile.TemporaryDirectory() as tmp, override_settings(TICKET_PDF_DIR=tmp):
+            with event_render_lock(event):
+                with self.assertRaises(RenderInProgress):
+                    build_event_tickets(event, "http://testserver", workers=1)
+            path = build_event_tickets(event, "http://testserver", workers=1)
+            self.assertTrue(path.exists())
+
+    def test_editing_printed_event_details_changes_the_fingerprint(self):
+        from .utils.pdf_tickets import event_tickets_fingerprint
+
+        event = make_event()
+        make_booking(event, payment_status="paid")
+        before = event_tickets_fingerprint(event)
+        self.assertEqual(event_tickets_fingerprint(event), before)
+
+        Event.objects.filter(pk=event.pk).update(location="New Hall")
+        self.assertNotEqual(event_tickets_fingerprint(event), before)
+
+
+class FakeConnection:
+    """SMTP connection whose send_messages() raises the queued errors in turn."""
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.sent = []
+
+    def send_messages(self, messages):
+        error = self.errors.pop(0) if self.errors else None
+        if error:
+            raise error
+        self.sent.extend(messages)
+
+    def close(self):
+        pass
+
+    def open(self):
+        pass
+
+
+class EmailOutboxTests(TestCase):
+    def test_claim_leases_rows_in_priority_order(self):
+        from .utils.mail import CLAIM_LEASE, claim_batch, queue_email
+
+        login = queue_email("login", "New login", "a@example.com")
+        otp = queue_email("otp", "Your code", "b@example.com")
+        queue_email("reminder", "Tomorrow", "c@example.com", send_at=timezone.now() + timedelta(hours=1))
+
+        self.assertEqual([r.id for r in claim_batch(10)], [otp.id, login.id])
+        # Leased: a second worker finds nothing due
+        self.assertEqual(claim_batch(10), [])
+        # A crashed worker's lease runs out and the rows become due again
+        with mock.patch("user.utils.mail.timezone.now", return_value=timezone.now() + CLAIM_LEASE * 2):
+            self.assertEqual([r.id for r in claim_batch(10)], [otp.id, login.id])
+
+    def test_transient_failures_back_off_and_permanent_ones_stop(self):
+        import smtplib
+        from .utils.mail import BACKOFF_BASE, MAX_ATTEMPTS, claim_batch, deliver, queue_email
+
+        queue_email("ticket", "Ticket", "a@example.com")
+        queue_email("ticket", "Ticket", "b@example.com")
+        before = timezone.now()
+        connection = FakeConnection(
+            smtplib.SMTPResponseException(451, b"try later"),
+            smtplib.SMTPRecipientsRefused({"b@example.com": (550, b"no such user")}),
+        )
+        retry, bounced = deliver(claim_batch(10), connection)
+
+        retry.refresh_from_db()
+        bounced.refresh_from_db()
+        self.assertEqual((retry.status, retry.attempts), ("queued", 1))
+        self.assertGreaterEqual(retry.next_attempt_at, before + timedelta(seconds=BACKOFF_BASE * 0.8))
+        self.assertEqual(bounced.status, "failed")
+
+        retry.attempts = MAX_ATTEMPTS - 1
+        retry.next_attempt_at = before
+        retry.save()
+        deliver(claim_batch(10), FakeConnection(smtplib.SMTPResponseException(451, b"try later")))
+        retry.refresh_from_db()
+        self.assertEqual((retry.status, retry.attempts), ("failed", MAX_ATTEMPTS))
+
+    def test_backoff_doubles_up_to_the_cap(self):
+        from .utils.mail import BACKOFF_BASE, BACKOFF_MAX, backoff
+
+        with mock.patch("user.utils.mail.random.uniform", return_value=1):
+            self.assertEqual(backoff(1).total_seconds(), BACKOFF_BASE)
+            self.assertEqual(backoff(3).total_seconds(), BACKOFF_BASE * 4)
+            self.assertEqual(backoff(30).total_seconds(), BACKOFF_MAX)
+
+
+class BroadcastClaimTests(TestCase):
+    def test_a_broadcast_being_sent_is_not_claimed_twice(self):
+        from .models import Broadcast
+        from .utils.broadcast import CLAIM_LEASE, claim_broadcast
+
+        broadcast = Broadcast.objects.create(event=make_event(), subject="Doors open", message="See you")
+        self.assertTrue(claim_broadcast(broadcast))
+        # A second worker, even with --resume, leaves a live lease alone
+        self.assertFalse(claim_broadcast(broadcast))
+        self.assertFalse(claim_broadcast(broadcast, resume=True))
+
+        Broadcast.objects.filter(pk=broadcast.pk).update(claimed_at=timezone.now() - CLAIM_LEASE * 2)
+        self.assertFalse(claim_broadcast(broadcast))
+        self.assertTrue(claim_broadcast(broadcast, resume=True))
+
+
+@override_settings(RAZORPAY_WEBHOOK_SECRET="whsec", RAZORPAY_KEY_SECRET="ksec")
+class TicketConfirmationTests(TestCase):
+    def test_confirmation_is_queued_once_whoever_completes_the_payment(self):
+        import hashlib
+        import hmac
+        import json
+
+        from django.urls import reverse
+
+        from .models import OutboundSMS
+
+        customer = make_user("buyer")
+        booking = make_booking(make_event(), customer, razorpay_link_id="plink_1",
+                               customer_phone="9876543210")
+
+        payload = json.dumps({"event": "payment.captured", "payload": {"payment": {"entity": {
+            "id": "pay_1", "payment_link_id": "plink_1", "method": "upi"}}}}).encode()
+        signature = hmac.new(b"whsec", payload, hashlib.sha256).hexdigest()
+        for _ in range(2):  # Razorpay redelivers webhooks
+            self.client.post(reverse("razorpay_webhook"), payload, content_type="application/json",
+                             HTTP_X_RAZORPAY_SIGNATURE=signature)
+
+        callback = {"razorpay_payment_link_id": "plink_1", "razorpay_payment_id": "pay_1",
+                    "razorpay_payment_link_reference_id": "", "razorpay_payment_link_status": "paid"}
+        callback["razorpay_signature"] = hmac.new(
+            b"ksec", "plink_1||paid|pay_1".encode(), hashlib.sha256).hexdigest()
+        self.client.force_login(customer)
+        client = mock.Mock()
+        client.payment.fetch.return_value = {"method": "upi"}
+        with mock.patch("user.views.get_razorpay_client", return_value=client):
+            for _ in range(2):  # the customer reloads the success page
+                self.assertEqual(self.client.get(reverse("payment_success"), callback).status_code, 200)
+
+        booking.refresh_from_db()
+        self.assertEqual(booking.payment_status, "paid")
+        self.assertEqual(OutboundSMS.objects.filter(kind="ticket").count(), 1)
+
+
+class CheckinManifestTests(TestCase):
+    def test_manifest_is_valid_json_with_one_row_per_paid_booking(self):
+        import json
+        from .utils.checkin import manifest_chunks
+
+        event = make_event()
+        paid = make_booking(event, tickets=2, payment_status="paid")
+        make_booking(event, payment_status="pending")
+
+        manifest = json.loads(b"".join(manifest_chunks(event)))
+        self.assertEqual(manifest["event"], event.id)
+        self.assertFalse(manifest["legacy_codes"])
+        self.assertEqual([row[0] for row in manifest["tickets"]], [paid.id])
+
+
+class AdmissionTests(TestCase):
+    """Every check-in path admits seats through user/utils/checkin.py."""
+
+    def setUp(self):
+        from .utils.booking import assign_seats_for_booking
+        from .utils.tickets import make_ticket_token
+
+        self.event = make_event()
+        self.organizer = self.event.organizer.user
+        self.booking = make_booking(self.event, tickets=3, payment_status="paid")
+        assign_seats_for_booking(self.booking)
+        self.code = make_ticket_token(self.booking, [s.seat_no for s in self.booking.seats.all()])
+
+    def admitted(self):
+        return self.booking.seats.filter(admitted_at__isnull=False).count()
+
+    def test_offline_batch_admits_one_seat_per_scan_and_retries_are_idempotent(self):
+        from .utils.checkin import sync_scans
+
+        results = sync_scans(self.organizer, self.event, [self.code, self.code], "batch-1")
+        self.assertEqual([r["status"] for r in results], ["ok", "ok"])
+        self.assertEqual(self.admitted(), 2)
+
+        # The scanner never got the answer and sends the batch again
+        results = sync_scans(self.organizer, self.event, [self.code, self.code], "batch-1")
+        self.assertEqual([r["status"] for r in results], ["ok", "ok"])
+        self.assertEqual(self.admitted(), 2)
+
+        results = sync_scans(self.organizer, self.event, [self.code, self.code], "batch-2")
+        self.assertEqual([r["status"] for r in results], ["ok", "already-used"])
+        self.assertEqual(self.admitted(), 3)
+        self.booking.refresh_from_db()
+        self.assertTrue(self.booking.attended)
+
+    def test_gate_scans_and_offline_scans_share_the_seat_count(self):
+        from .utils.checkin import admit_seat, sync_scans
+
+        self.assertEqual(admit_seat(self.organizer, self.event.id, self.booking.id)["status"], "admitted")
+        results = sync_scans(self.organizer, self.event, [self.code] * 3, "batch-1")
+        self.assertEqual([r["status"] for r in results], ["ok", "ok", "already-used"])
+        self.assertEqual(admit_seat(self.organizer, self.event.id, self.booking.id)["status"], "already-used")
+
+    def test_manual_check_in_admits_the_remaining_seats(self):
+        from .utils.checkin import admit_booking, admit_seat
+
+        admit_seat(self.organizer, self.event.id, self.booking.id)
+        result = admit_booking(self.organizer, self.event.id, self.booking.id)
+        self.assertEqual((result["status"], result["remaining"]), ("admitted", 0))
+        self.assertEqual(self.admitted(), 3)
+
+    def test_manifest_reports_seats_used(self):
+        import json
+        from .utils.checkin import MANIFEST_FIELDS, admit_seat, manifest_chunks
+
+        admit_seat(self.organizer, self.event.id, self.booking.id)
+        row = dict(zip(MANIFEST_FIELDS, json.loads(b"".join(manifest_chunks(self.event)))["tickets"][0]))
+        self.assertEqual((row["seats"], row["admitted"]), (3, 1))
+
+    def test_qr_link_admits_one_seat(self):
+        from django.urls import reverse
+
+        self.client.login(username=self.organizer.username, password="pw")
+        self.client.get(reverse("verify_ticket_token", args=[self.code]))
+        self.client.get(reverse("verify_ticket_token", args=[self.code]))
+        self.assertEqual(self.admitted(), 2)
+
+
+class LiveCountersTests(TestCase):
+    def test_admitted_counts_seats_admitted_on_any_path(self):
+        from .utils.booking import assign_seats_for_booking
+        from .utils.checkin import admit_booking, admit_seat
+        from .utils.live import fetch_counters
+
+        event = make_event()
+        organizer = event.organizer.user
+        seated = make_booking(event, tickets=3, payment_status="paid")
+        assign_seats_for_booking(seated)
+        seatless = make_booking(event, tickets=2, payment_status="paid")
+
+        admit_seat(organizer, event.id, seated.id)
+        admit_booking(organizer, event.id, seatless.id)
+        counters = fetch_counters([event.id])[event.id]
+        self.assertEqual((counters["sold"], counters["admitted"]), (3, 3))
+
+
+class PopularityRulesTests(TestCase):
+    def notifications(self, event):
+        from .models import SiteNotification
+        rules = SiteNotification.objects.filter(event=event).exclude(notification_type="new_event")
+        return sorted(rules.values_list("notification_type", flat=True))
+
+    def test_each_rule_fires_exactly_once(self):
+        from .utils.rules import record_sales
+
+        event = make_event(capacity=100, seats=False)
+        now = timezone.now()
+        self.assertEqual(record_sales(event.id, tickets=10, bookings=1, now=now), [])
+        self.assertEqual(record_sales(event.id, tickets=40, bookings=1, now=now), ["popular", "selling_fast"])
+        # Still popular and selling fast: nothing new
+        self.assertEqual(record_sales(event.id, tickets=20, bookings=1, now=now), [])
+        self.assertEqual(record_sales(event.id, tickets=25, bookings=1, now=now), ["last_seats"])
+        # Cancellations and new sales never fire a rule twice
+        record_sales(event.id, tickets=-60, bookings=-2, now=now)
+        self.assertEqual(record_sales(event.id, tickets=60, bookings=2, now=now + timedelta(hours=3)), [])
+
+        self.assertEqual(self.notifications(event), ["last_seats", "popular_event", "selling_fast"])
+
+    def test_paid_bookings_feed_the_rules_once_committed(self):
+        event = make_event(capacity=4)
+        with self.captureOnCommitCallbacks(execute=True):
+            booking = make_booking(event, tickets=2, payment_status="paid")
+        with self.captureOnCommitCallbacks(execute=True):
+            booking.save()  # nothing changed: nothing recorded
+
+        event.refresh_from_db()
+        self.assertEqual((event.tickets_sold, event.registrations_count), (2, 1))
+        self.assertEqual(self.notifications(event), ["last_seats", "popular_event"])
+
+
+class TargetedNotificationTests(TestCase):
+    def test_fetch_only_returns_notifications_the_user_is_an_audience_member_of(self):
+        from django.urls import reverse
+        from .models import SiteNotification
+
+        music_fan = make_user("fan", city="Pune", interests="art, music")
+        stranger = make_user("stranger", city="Delhi", interests="sports")
+        for_everyone = SiteNotification.objects.create(title="Hello", message="-", notification_type="new_event")
+        for_fans = SiteNotification.objects.create(
+            title="Gig", message="-", notification_type="new_event", audience={"categories": ["Music"]},
+        )
+        self.assertTrue(for_fans.targeted)
+
+        def fetch(user):
+            self.client.force_login(user)
+            response = self.client.get(reverse("fetch_site_notifications"))
+            return [n["id"] for n in response.json()["notifications"]]
+
+        self.assertEqual(fetch(music_fan), [for_everyone.id, for_fans.id])
+        self.assertEqual(fetch(stranger), [for_everyone.id])
+        # Both were marked seen: nothing comes back twice
+        self.assertEqual(fetch(music_fan), [])
+
+    def test_a_backlog_is_delivered_oldest_first_over_several_fetches(self):
+        from django.urls import reverse
+        from .models import SiteNotification
+        from .utils.notifications import UNSEEN_BATCH
+
+        user = make_user("reader")
+        ids = [SiteNotification.objects.create(title=f"N{i}", message="-", notification_type="new_event").id
+               for i in range(UNSEEN_BATCH + 2)]
+        self.client.force_login(user)
+
+        first = self.client.get(reverse("fetch_site_notifications")).json()
+        self.assertEqual([n["id"] for n in first["notifications"]], ids[:UNSEEN_BATCH])
+        second = self.client.get(reverse("fetch_site_notifications"), {"after": first["latest"]}).json()
+        self.assertEqual([n["id"] for n in second["notifications"]], ids[UNSEEN_BATCH:])
+
+
+class DashboardSnapshotTests(TestCase):
+    def test_snapshot_is_shared_and_dropped_when_sales_change(self):
+        from django.core.cache import cache, caches
+        from django.core.cache.backends.db import DatabaseCache
+        from .utils.dashboard import CACHE_KEY, get_snapshot, refresh_snapshot
+
+        event = make_event(price="100.00")
+        refresh_snapshot()
+        # Stored in the shared (database) cache, not per process
+        self.assertIsInstance(caches["default"], DatabaseCache)
+        self.assertIsNotNone(cache.get(CACHE_KEY))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            make_booking(event, tickets=2, payment_status="paid")
+        self.assertIsNone(cache.get(CACHE_KEY))
+        self.assertEqual(get_snapshot()["tickets_sold"], 2)
+
+
+class DailyStatsTests(TestCase):
+    def rollup(self):
+        from .models import EventDailyStats
+        from .utils.stats import STAT_FIELDS
+        return sorted(EventDailyStats.objects.values_list("event_id", "day", *STAT_FIELDS))
+
+    def test_incremental_deltas_match_a_rebuild(self):
+        from .utils.booking import assign_seats_for_booking
+        from .utils.checkin import admit_seat
+        from .utils.refunds import cancel_event, process_refunds
+        from .utils.stats import rebuild
+
+        event, other = make_event(price="100.00"), make_event(price="50.00")
+        with self.captureOnCommitCallbacks(execute=True):
+            paid = make_booking(event, tickets=3, payment_status="paid", razorpay_payment_id="pay_1")
+            assign_seats_for_booking(paid)
+            make_booking(event, tickets=2)  # pending: not counted
+            partly = make_booking(event, tickets=2, payment_status="paid", razorpay_payment_id="pay_2")
+            partly.canceled_tickets = 1
+            partly.save()
+            admit_seat(event.organizer.user, event.id, paid.id)
+            make_booking(other, tickets=4, payment_status="paid", razorpay_payment_id="pay_3")
+            cancel_event(other)
+        with self.captureOnCommitCallbacks(execute=True), \
+                mock.patch("user.utils.refunds.get_razorpay_client", return_value=FakeRazorpay()), \
+                mock.patch("user.utils.refunds.live_refunds_enabled", return_value=True):
+            self.assertEqual(process_refunds(event_id=other.id, workers=1)["refunded"], 1)
+
+        incremental = self.rollup()
+        self.assertTrue(incremental)
+        rebuild()
+        self.assertEqual(self.rollup(), incremental)
+
+    def test_a_booking_refunded_twice_counts_as_one_refund_on_both_paths(self):
+        from .models import EventDailyStats
+        from .utils.refunds import cancel_event, process_refunds
+        from .utils.stats import rebuild
+
+        event = make_event(price="100.00")
+        with self.captureOnCommitCallbacks(execute=True):
+            booking = make_booking(event, tickets=2, payment_status="paid", razorpay_payment_id="pay_1")
+            # The customer cancels one ticket (refunded at 90%), then the event is canceled
+            booking.canceled_tickets = 1
+            booking.refund_amount = Decimal("90.00")
+            booking.refund_status = "refunded"
+            booking.save()
+            cancel_event(event)
+        with self.captureOnCommitCallbacks(execute=True), \
+                mock.patch("user.utils.refunds.get_razorpay_client", return_value=FakeRazorpay()), \
+                mock.patch("user.utils.refunds.live_refunds_enabled", return_value=True):
+            self.assertEqual(process_refunds(event_id=event.id, workers=1)["refunded"], 1)
+
+        incremental = self.rollup()
+        figures = EventDailyStats.objects.get(event=event)
+        self.assertEqual((figures.refunds, figures.refunded_amount), (1, Decimal("200.00")))
+        rebuild([event.id])
+        self.assertEqual(self.rollup(), incremental)
+
+    def test_organizer_bookings_lists_events_without_paid_bookings(self):
+        from django.urls import reverse
+
+        event = make_event(price="100.00")
+        quiet = make_event(organizer=event.organizer, title="Quiet Event")
+        with self.captureOnCommitCallbacks(execute=True):
+            make_booking(event, tickets=2, payment_status="paid")
+            make_booking(quiet, tickets=1)  # pending only
+
+        self.client.force_login(event.organizer.user)
+        response = self.client.get(reverse("organizer_bookings"))
+        rows = {e["event"].id: e for e in response.context["event_data"]}
+        self.assertEqual(set(rows), {event.id, quiet.id})
+        self.assertEqual((rows[event.id]["paid_bookings"], rows[event.id]["total_tickets"]), (1, 2))
+        self.assertEqual((rows[quiet.id]["paid_bookings"], rows[quiet.id]["total_revenue"]), (0, 0))
@@ -48,7 +48,13 @@ urlpatterns = [
     path("organizer/events/select-update/", views.select_event_to_update, name="select_event_to_update"), # Select event to update
     path("organizer/event/<int:event_id>/delete/", views.delete_event, name="delete_event"),  # Delete event
     path("organizer/event/<int:event_id>/delete/confirm/", views.confirm_delete_event, name="confirm_delete_event"), # Confirm delete
+    path("organizer/event/<int:event_id>/cancel/", views.cancel_event, name="cancel_event"),  # Cancel event + refund all
+    path("organizer/event/<int:event_id>/tickets.pdf", views.event_tickets_pdf, name="event_tickets_pdf"),  # All tickets (PDF)
+    path("organizer/event/<int:event_id>/broadcast/", views.event_broadcast, name="event_broadcast"),  # Email all attendees
+    path("organizer/event/<int:event_id>/live/", views.event_live_counters, name="event_live_counters"),  # SSE counters
+    path("organizer/broadcast/<int:broadcast_id>/progress/", views.broadcast_progress, name="broadcast_progress"),
     path("organizer/bookings/", views.organizer_bookings, name="organizer_bookings"),
+    path("organizer/bookings/<int:event_id>/", views.organizer_event_bookings, name="organizer_event_bookings"),  # One page / CSV
     path("organizer/reviews/", views.organizer_reviews, name="organizer_reviews"),
 
 
@@ -81,6 +87,8 @@ path('user/recommended/', views.recommended_events, name='recommended_events'),
     # ==========================
     path("my_bookings/", views.my_bookings, name="my_bookings"),         # Show all user bookings
     path("ticket/<int:booking_id>/", views.ticket_view, name="ticket_view"), # Ticket view page
+    path("ticket/<int:booking_id>/pdf/", views.ticket_pdf, name="ticket_pdf"), # PDF ticket
+    path("qr/<str:key>.png", views.qr_image, name="qr_image"),           # Cached QR image
     path("cancel-booking/<int:booking_id>/", views.cancel_tickets, name="cancel_tickets"), #cancel ticket
 
     # path("verify_ticket/<int:booking_id>/", views.verify_ticket, name="verify_ticket"), # (Optional) ticket verification
@@ -92,13 +100,18 @@ path('user/recommended/', views.recommended_events, name='recommended_events'),
     path("organizer/verify-customers/", views.verify_customers, name="verify_customers"),
     path("organizer/verify-customers/<int:event_id>/", views.verify_event_customers, name="verify_event_customers"),
     path("organizer/verify-customers/mark/<int:booking_id>/", views.mark_attended, name="mark_attended"),
-    path("organizer/verify-customers/qr/<int:booking_id>/", views.verify_ticket_qr, name="verify_ticket_qr"),
+    path("organizer/verify-customers/qr/<int:booking_id>/", views.verify_ticket_qr, name="verify_ticket_qr"),  # legacy QR codes
+    path("organizer/verify-customers/t/<str:token>/", views.verify_ticket_token, name="verify_ticket_token"),
     path("organizer/scan-qr/<int:event_id>/", views.scan_qr_page, name="scan_qr_page"),
+    path("organizer/scan-qr/<int:event_id>/manifest.json", views.checkin_manifest, name="checkin_manifest"),  # Offline scanner data
+    path("organizer/scan-qr/<int:event_id>/sync/", views.sync_attendance, name="sync_attendance"),  # Queued offline admissions
+    path("organizer/scan-qr/<int:event_id>/gate/", views.gate_scan, name="gate_scan"),  # One seat per scan (JSON)
     path("organizer/verify-ticket/", views.verify_ticket, name="verify_ticket"),
     path('user/organizer/reviews/', views.organizer_reviews, name='organizer-reviews'),
     path("organizer/scan-qr/", views.scan_qr_dashboard, name="scan_qr_dashboard"),
 
     path("notifications/fetch/", views.fetch_site_notifications, name="fetch_site_notifications"),
+    path("notifications/stream/", views.notification_stream, name="notification_stream"),  # SSE (ASGI)
     path("privacy-policy/", views.privacy_policy, name="privacy_policy"),
 
     path("upcoming-features/", views.upcoming_features, name="upcoming_features"),
@@ -0,0 +1,82 @@
+"""
+Email-sized event banners.
+
+Uploaded banners can be multi-megabyte screenshots in any format, so emails
+attach a derivative instead: resized to EMAIL_BANNER_WIDTH, flattened onto
+white and recompressed as JPEG. Each derivative is rendered once, stored as
+<sha256(path, mtime, size)>.jpg under BANNER_CACHE_DIR and kept in a small
+in-process LRU. Re-uploading a banner changes its mtime, so the old
+derivative is simply never looked up again.
+"""
+import hashlib
+import os
+import tempfile
+from functools import lru_cache
+from io import BytesIO
+from pathlib import Path
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+EMAIL_BANNER_WIDTH = 1200   # 2x the 600px email body, sharp on retina screens
+EMAIL_BANNER_QUALITY = 80
+MIMETYPE = "image/jpeg"
+
+
+def cache_dir():
+    return Path(getattr(settings, "BANNER_CACHE_DIR", Path(settings.MEDIA_ROOT) / "banner_cache"))
+
+
+def _modified(path):
+    """Storage mtime of `path`; storages without mtimes fall back to size only."""
+    try:
+        return default_storage.get_modified_time(path).timestamp()
+    except NotImplementedError:
+        return default_storage.size(path)
+
+
+def banner_key(path, width=EMAIL_BANNER_WIDTH):
+    raw = f"{path}|{_modified(path)}|{width}|{EMAIL_BANNER_QUALITY}"
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def _render(data, width):
+    image = ImageOps.exif_transpose(Image.open(BytesIO(data)))
+    image.thumbnail((width, width * 4))
+    if image.mode in ("RGBA", "LA", "P"):
+        image = image.convert("RGBA")
+        background = Image.new("RGB", image.size, "white")
+        background.paste(image, mask=image.getchannel("A"))
+        image = background
+    elif image.mode != "RGB":
+        image = image.convert("RGB")
+
+    buffer = BytesIO()
+    image.save(buffer, format="JPEG", quality=EMAIL_BANNER_QUALITY, optimize=True, progressive=True)
+    return buffer.getvalue()
+
+
+@lru_cache(maxsize=128)
+def _derivative(key, path, width):
+    file = cache_dir() / f"{key}.jpg"
+    try:
+        return file.read_bytes()
+    except FileNotFoundError:
+        pass
+
+    with default_storage.open(path, "rb") as f:
+        jpeg = _render(f.read(), width)
+    directory = cache_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    # Write to a temp file and rename so readers never see a partial JPEG
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        f.write(jpeg)
+    os.replace(tmp, file)
+    return jpeg
+
+
+def email_banner(path, width=EMAIL_BANNER_WIDTH):
+    """JPEG bytes of the email-sized derivative of banner `path` in default_storage."""
+    return _derivative(banner_key(path, width), path, width)
@@ -0,0 +1,271 @@
+"""
+Booking pipeline used by `book_event`.
+
+`place_booking()` validates, prices, applies HUB tokens, assigns the order id
+and inserts the Booking with a single write inside one transaction. The event
+row is locked for the duration so availability is checked exactly once and
+concurrent bookings for the same event cannot oversell it.
+
+`complete_payment()` is the one place a booking becomes paid, whoever learns
+about the payment first (callback, webhook or `reconcile_pending_bookings`):
+it spends the booking's HUB tokens, credits the earned ones and assigns
+seats, exactly once per booking. A payment for a booking that was canceled
+or expired in the meantime is queued for a refund instead.
+"""
+import time
+import uuid
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+
+from ..models import Booking, Event, Profile, Seat
+from .payments import get_razorpay_client
+
+# Token reward rate: 1 token per ₹50 spent
+HUB_TOKEN_RATE = Decimal("50.0")
+
+# Statuses a payment can still complete ("failed" is set by a failed attempt
+# on the same payment link, which the customer may retry)
+PAYABLE_STATUSES = ("pending", "failed")
+
+
+class BookingError(Exception):
+    """A booking request that cannot be accepted (message is user-facing)."""
+
+
+class SeatAssignmentError(ValueError):
+    """A payment was recorded, but the booking's seats couldn't be assigned."""
+
+    def __init__(self, message, transitioned=False):
+        super().__init__(message)
+        self.transitioned = transitioned  # this call made the booking paid
+
+
+def new_order_id():
+    return f"EVT-{uuid.uuid4().hex[:10].upper()}"
+
+
+def place_booking(booking, event, profile, tokens_used=0):
+    """
+    Insert `booking` (an unsaved instance with the customer fields filled in)
+    for `event`, spending `tokens_used` HUB tokens from `profile`.
+
+    Returns the saved booking. It is already "paid" when tokens cover the
+    whole amount, otherwise "pending" and waiting for a payment link.
+    Raises BookingError if the seats or tokens are not available.
+    """
+    tokens_used = max(int(tokens_used or 0), 0)
+
+    with transaction.atomic():
+        # Lock the event row: serialises bookings for this event so the
+        # single availability check below stays valid until commit.
+        event = Event.objects.select_for_update().get(pk=event.pk)
+
+        if event.is_canceled:
+            raise BookingError("⚠️ This event has been canceled.")
+
+        available = event.available_seats
+        if booking.tickets_booked > available:
+            raise BookingError(f"Only {available} seats left.")
+
+        if tokens_used > profile.hub_tokens:
+            raise BookingError(f"⚠️ You only have {profile.hub_tokens} HUB tokens.")
+
+        total_price = Decimal(booking.tickets_booked) * Decimal(event.price)
+
+        booking.event = event
+        booking.order_id = booking.order_id or new_order_id()
+        booking.total_price = total_price
+        booking.hub_tokens_used = tokens_used
+        booking.amount_to_pay = max(total_price - Decimal(tokens_used), Decimal("0.00"))
+        booking.payment_status = "paid" if booking.amount_to_pay == 0 else "pending"
+
+        # Fully covered by tokens → spend them now, only if the balance still
+        # covers them (a concurrent booking may have spent them since the
+        # check above, which read an unlocked profile)
+        if booking.payment_status == "paid" and tokens_used > 0:
+            spent = Profile.objects.filter(pk=profile.pk, hub_tokens__gte=tokens_used).update(
+                hub_tokens=F("hub_tokens") - tokens_used
+            )
+            if not spent:
+                profile.refresh_from_db(fields=["hub_tokens"])
+                raise BookingError(f"⚠️ You only have {profile.hub_tokens} HUB tokens.")
+            profile.refresh_from_db(fields=["hub_tokens"])
+
+        # One INSERT; seats were already checked under the lock above.
+        booking.save(check_seats=False)
+
+    return booking
+
+
+def create_payment_link(booking, callback_url):
+    """
+    Create the Razorpay payment link for a pending booking and store its id
+    with a single UPDATE (no full save / signals).
+    """
+    payment_link = get_razorpay_client().payment_link.create(
+        {
+            "amount": int(booking.amount_to_pay * 100),
+            "currency": "INR",
+            "description": f"Booking for {booking.event.title}",
+            "customer": {
+                "name": booking.booking_name,
+                "email": booking.customer_email,
+                "contact": booking.customer_phone,  # cleaned 10-digit
+            },
+            "notify": {"sms": True, "email": True},
+            "callback_url": callback_url,
+            "callback_method": "get",
+            # Unpaid links die with the booking (see expire_pending_bookings)
+            "expire_by": int(time.time()) + settings.PAYMENT_LINK_TTL_MINUTES * 60,
+        }
+    )
+
+    booking.razorpay_link_id = payment_link["id"]
+    Booking.objects.filter(pk=booking.pk).update(razorpay_link_id=booking.razorpay_link_id)
+    return payment_link
+
+
+def complete_payment(booking, payment_id=None, method=None, signature=None):
+    """
+    Mark `booking` paid and do the post-payment work: spend the HUB tokens it
+    used, credit the tokens it earns and assign its seats.
+
+    Only a pending (or failed) booking becomes paid. Safe to call for one that
+    is already paid (a reloaded callback, a webhook after the callback,
+    reconciliation after either): tokens only move on that transition, and
+    seats are only assigned once. A payment that arrives after the booking
+    was canceled or expired is recorded and queued for a refund instead
+    (`paid_late`, see process_refunds); the booking is never sold.
+
+    Returns (booking, tokens earned by this call, whether this call made it
+    paid). Raises ValueError if the booking couldn't be saved as paid
+    (nothing is recorded), or SeatAssignmentError after the payment is
+    recorded if seats couldn't be assigned.
+    """
+    earned = 0
+    transitioned = False
+    with transaction.atomic():
+        booking = Booking.objects.select_for_update().select_related("event").get(pk=booking.pk)
+        if booking.payment_status in PAYABLE_STATUSES:
+            booking.payment_status = "paid"
+            booking.razorpay_payment_id = payment_id or booking.razorpay_payment_id
+            booking.payment_method = method or booking.payment_method
+            booking.razorpay_signature = signature or booking.razorpay_signature
+            earned = int(booking.amount_to_pay / HUB_TOKEN_RATE)
+            booking.hub_tokens_awarded = earned
+            booking.save()
+            transitioned = True
+
+            if booking.customer_id and (earned or booking.hub_tokens_used):
+                Profile.objects.filter(user_id=booking.customer_id).update(
+                    hub_tokens=Greatest(F("hub_tokens") - booking.hub_tokens_used, Value(0)) + earned
+                )
+        elif booking.payment_status in ("canceled", "expired") and payment_id and not booking.razorpay_payment_id:
+            # Paid after it stopped holding seats: give the money back
+            booking.razorpay_payment_id = payment_id
+            booking.payment_method = method or booking.payment_method
+            booking.razorpay_signature = signature or booking.razorpay_signature
+            booking.paid_late = True
+            booking.refund_status = "pending"
+            booking.refund_attempts = 0
+            booking.save(update_fields=[
+                "razorpay_payment_id", "payment_method", "razorpay_signature",
+                "paid_late", "refund_status", "refund_attempts",
+            ])
+
+    try:
+        with transaction.atomic():
+            assign_seats_for_booking(booking)
+    except ValueError as e:
+        raise SeatAssignmentError(str(e), transitioned) from e
+    return booking, earned, transitioned
+
+
+def assign_seats_for_booking(booking):
+    """
+    Allocate concrete seat numbers for this booking.
+
+    ✅ Works only for PAID bookings
+    ✅ If seats already assigned, do nothing
+    ✅ Tries to find ONE CONTINUOUS BLOCK of `required` seats
+
+    Example:
+      Free seats:  [9, 10, 21, 22, 23, 24, 25, 26, 27, 28, ...]
+      required=10
+
+      → Skips [9,10] (only 2 seats)
+      → Finds [21..30] (10 seats) and assigns those
+    """
+    # Only for paid bookings
+    if booking.payment_status != "paid":
+        return
+
+    # prevent double assignment
+    if booking.seats.exists():
+        return
+
+    event = booking.event
+
+    # You already use this in your code:
+    # active_tickets = tickets_booked - canceled_tickets
+    required = booking.active_tickets
+
+    if required <= 0:
+        return
+
+    # lock free seats for this event
+    free_qs = (
+        Seat.objects
+        .select_for_update()
+        .filter(event=event, booking__isnull=True)
+        .order_by("seat_no")
+    )
+    free_seats = list(free_qs)
+
+    if len(free_seats) < required:
+        # safety guard – should not happen since we check capacity
+        raise ValueError("Not enough free seats to assign for this booking.")
+
+    # ---------------------------------------
+    # 1️⃣ Try to find ONE continuous block
+    # ---------------------------------------
+    n = len(free_seats)
+    best_start_idx = None
+    run_start_idx = 0
+    run_length = 1
+
+    for i in range(1, n):
+        if free_seats[i].seat_no == free_seats[i - 1].seat_no + 1:
+            # still consecutive
+            run_length += 1
+        else:
+            # gap here → close previous run
+            if run_length >= required:
+                best_start_idx = run_start_idx
+                break  # we found first big-enough block
+            # start new run from current index
+            run_start_idx = i
+            run_length = 1
+
+    # after loop, also check the last run
+    if best_start_idx is None and run_length >= required:
+        best_start_idx = n - run_length
+
+    if best_start_idx is not None:
+        # ✅ Assign one continuous block
+        chosen_seats = free_seats[best_start_idx: best_start_idx + required]
+    else:
+        # ---------------------------------------
+        # 2️⃣ Fallback: not enough continuous block
+        #    but enough total seats → just take first N
+        # ---------------------------------------
+        chosen_seats = free_seats[:required]
+
+    # A seat freed by a deleted booking may still carry its admission
+    Seat.objects.filter(id__in=[s.id for s in chosen_seats]).update(
+        booking=booking, admitted_at=None, checkin_batch="",
+    )
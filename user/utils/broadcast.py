@@ -0,0 +1,175 @@
+"""
+Organizer broadcasts to every paid attendee of an event.
+
+The email template is rendered once per broadcast with a placeholder for the
+recipient's name, which is substituted per message. Recipients are streamed
+from the database (distinct emails, ordered) with .iterator() and sent in
+chunks by a small thread pool, each thread reusing its own SMTP connection.
+Only a bounded number of chunks is in flight at a time, so memory stays flat
+however many attendees an event has.
+
+Progress (sent / failed counts and the last email sent) is written after
+every chunk; an interrupted broadcast resumes after its cursor.
+
+A worker owns a broadcast through a lease: claim_broadcast() sets
+`claimed_at` in a conditional UPDATE and every recorded chunk renews it. A
+"sending" broadcast can only be taken over once its lease has run out, i.e.
+its worker crashed.
+"""
+import smtplib
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from itertools import islice
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db.models import F, Max, Q
+from django.template.loader import render_to_string
+from django.utils import timezone
+from django.utils.html import escape
+
+from ..models import Booking, Broadcast
+
+PLACEHOLDER = "__EVENTHUB_RECIPIENT__"
+CLAIM_LEASE = timedelta(minutes=5)
+
+
+def claimable(resume=False, now=None):
+    """Broadcasts a worker may claim: queued ones, plus (with `resume`) abandoned ones."""
+    condition = Q(status="queued")
+    if resume:
+        expired = (now or timezone.now()) - CLAIM_LEASE
+        condition |= Q(status="sending") & (Q(claimed_at__isnull=True) | Q(claimed_at__lt=expired))
+    return Broadcast.objects.filter(condition)
+
+
+def claim_broadcast(broadcast, resume=False):
+    """Take the lease on `broadcast`. False if another worker got it first."""
+    now = timezone.now()
+    claimed = claimable(resume, now).filter(pk=broadcast.pk).update(status="sending", claimed_at=now)
+    return claimed == 1
+
+
+def recipients(event, after=""):
+    """Stream (email, name) for each distinct paid attendee, ordered by email."""
+    return (
+        Booking.objects.filter(event=event, payment_status="paid", customer_email__gt=after)
+        .values("customer_email")
+        .annotate(name=Max("booking_name"))
+        .order_by("customer_email")
+        .values_list("customer_email", "name")
+        .iterator(chunk_size=2000)
+    )
+
+
+def recipient_count(event):
+    return (
+        Booking.objects.filter(event=event, payment_status="paid", customer_email__gt="")
+        .values("customer_email").distinct().count()
+    )
+
+
+def render_broadcast(broadcast):
+    """HTML for all recipients, with PLACEHOLDER where the name goes."""
+    return render_to_string("emails/broadcast_email.html", {
+        "event": broadcast.event,
+        "broadcast": broadcast,
+        "recipient_name": PLACEHOLDER,
+    })
+
+
+class _ConnectionPool:
+    """One open SMTP connection per worker thread."""
+
+    def __init__(self):
+        self.local = threading.local()
+        self.connections = []
+        self.lock = threading.Lock()
+
+    def get(self):
+        connection = getattr(self.local, "connection", None)
+        if connection is None:
+            connection = get_connection(fail_silently=False)
+            connection.open()
+            self.local.connection = connection
+            with self.lock:
+                self.connections.append(connection)
+        return connection
+
+    def close(self):
+        for connection in self.connections:
+            connection.close()
+
+
+def _send_chunk(pool, chunk, subject, text, html, from_email):
+    """Worker thread: send one chunk, no ORM access. Returns (sent, failed)."""
+    connection = pool.get()
+    sent = failed = 0
+    for email, name in chunk:
+        msg = EmailMultiAlternatives(subject, text, from_email, [email], connection=connection)
+        msg.attach_alternative(html.replace(PLACEHOLDER, escape(name or "there")), "text/html")
+        try:
+            connection.send_messages([msg])
+            sent += 1
+        except (smtplib.SMTPServerDisconnected, OSError):
+            failed += 1
+            connection.close()
+            connection.open()
+        except smtplib.SMTPException:
+            failed += 1
+    return sent, failed
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def send_broadcast(broadcast, workers=4, chunk_size=200):
+    """Deliver `broadcast` (resuming after its cursor). Returns the refreshed row."""
+    now = timezone.now()
+    if broadcast.started_at is None:
+        broadcast.total = recipient_count(broadcast.event)
+        broadcast.started_at = now
+    broadcast.status = "sending"
+    broadcast.save(update_fields=["total", "started_at", "status"])
+
+    html = render_broadcast(broadcast)
+    from_email = settings.DEFAULT_FROM_EMAIL
+    pool = _ConnectionPool()
+    in_flight = deque()
+
+    def record(future, last_email):
+        sent, failed = future.result()
+        Broadcast.objects.filter(pk=broadcast.pk).update(
+            sent_count=F("sent_count") + sent,
+            failed_count=F("failed_count") + failed,
+            cursor=last_email,
+            claimed_at=timezone.now(),
+        )
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for chunk in _chunks(recipients(broadcast.event, broadcast.cursor), chunk_size):
+                in_flight.append((
+                    executor.submit(_send_chunk, pool, chunk, broadcast.subject,
+                                    broadcast.message, html, from_email),
+                    chunk[-1][0],
+                ))
+                # Bounded read-ahead; results are recorded in order so the
+                # cursor never skips past an unsent chunk
+                if len(in_flight) >= workers * 2:
+                    record(*in_flight.popleft())
+            while in_flight:
+                record(*in_flight.popleft())
+    finally:
+        pool.close()
+
+    broadcast.refresh_from_db()
+    broadcast.status = "failed" if broadcast.failed_count and not broadcast.sent_count else "sent"
+    broadcast.finished_at = timezone.now()
+    broadcast.save(update_fields=["status", "finished_at"])
+    return broadcast
@@ -0,0 +1,263 @@
+"""
+Offline check-in for door scanners.
+
+manifest_chunks() streams a compact JSON manifest of an event's paid
+bookings, one row per booking:
+
+    [booking_id, ticket_hash, first_seat, last_seat, tickets, seats, admitted, name]
+
+`ticket_hash` is the first 16 hex chars of sha256(ticket token). Tokens are
+deterministic, so the scanner page hashes a scanned token and looks it up
+without a round trip (legacy QR codes carry the bare booking id and are only
+looked up while the header's `legacy_codes` is true). The rows
+come from a single streaming query. The manifest is only served to the
+event's organizer; the scanner page caches it as received and the server
+re-checks every code when the scans are synced.
+
+Admission is recorded per seat (Seat.admitted_at): every scan lets one
+person in, so a ticket admits as many people as it has seats. Every check-in
+path goes through this module: online gates and QR links use admit_seat(),
+the organizer's manual check-in uses admit_booking() (all remaining seats),
+and scanners queue the codes they admit offline and hand them back in
+batches to sync_scans() once they are online again; retrying a batch is
+safe. Booking.attended is set alongside the first admitted seat. Bookings
+without seat rows have no per-seat record and are admitted as a whole.
+"""
+import hashlib
+import json
+import time
+from collections import Counter
+
+from django.db.models import Count, Max, Min, Q, Subquery
+from django.utils import timezone
+
+from ..models import Booking, Seat
+from .stats import record_stats
+from .tickets import (
+    LEGACY_REJECTED, InvalidTicket, legacy_codes_accepted, pack_ticket_token, read_ticket_token, ticket_expiry,
+)
+
+MANIFEST_VERSION = 2
+# seats = admissions the ticket allows (0: no seat rows, admitted as a whole);
+# admitted = how many of them were already used when the manifest was made
+MANIFEST_FIELDS = ["id", "hash", "first_seat", "last_seat", "tickets", "seats", "admitted", "name"]
+HASH_CHARS = 16
+MAX_SCAN_BATCH = 500   # codes accepted per sync request
+
+
+def ticket_hash(token):
+    return hashlib.sha256(token.encode()).hexdigest()[:HASH_CHARS]
+
+
+def manifest_rows(event):
+    """Stream one manifest row per paid booking of `event`."""
+    expires = ticket_expiry(event)
+    rows = (
+        Booking.objects.filter(event=event, payment_status="paid")
+        .annotate(
+            first_seat=Min("seats__seat_no"), last_seat=Max("seats__seat_no"),
+            seat_count=Count("seats"), admitted=Count("seats__admitted_at"),
+        )
+        .order_by("id")
+        .values_list("id", "first_seat", "last_seat", "tickets_booked", "canceled_tickets",
+                     "seat_count", "admitted", "attended", "booking_name")
+        .iterator(chunk_size=2000)
+    )
+    for booking_id, first, last, booked, canceled, seats, admitted, attended, name in rows:
+        token = pack_ticket_token(booking_id, event.id, first, last, expires)
+        yield [booking_id, ticket_hash(token), first or 0, last or 0, booked - canceled,
+               seats, admitted if seats else int(attended), (name or "")[:40]]
+
+
+def manifest_chunks(event):
+    """Yield the manifest for `event` as bytes, a chunk at a time."""
+    header = json.dumps({
+        "v": MANIFEST_VERSION,
+        "event": event.id,
+        "title": event.title,
+        "generated_at": int(time.time()),
+        "expires": ticket_expiry(event),
+        "legacy_codes": legacy_codes_accepted(),
+        "fields": MANIFEST_FIELDS,
+    }, separators=(",", ":"))
+    yield header[:-1].encode() + b',"tickets":['
+
+    batch, first = [], True
+    for row in manifest_rows(event):
+        batch.append(("" if first else ",") + json.dumps(row, separators=(",", ":")))
+        first = False
+        if len(batch) >= 500:
+            yield "".join(batch).encode()
+            batch = []
+    yield "".join(batch).encode() + b"]}"
+
+
+def booking_id_from_code(code, event_id):
+    """
+    Booking id a scanned QR code refers to: a signed ticket token (checked
+    without the DB) or, while legacy codes are accepted, a bare booking id.
+    Raises InvalidTicket.
+    """
+    segment = (code or "").strip().strip("/").split("/")[-1]
+    if segment.isdigit():
+        if not legacy_codes_accepted():
+            raise InvalidTicket(LEGACY_REJECTED)
+        return int(segment)
+    return read_ticket_token(segment, event_id=event_id).booking_id
+
+
+def sync_scans(user, event, codes, batch_id):
+    """
+    Admit a scanner's batch of ticket codes and return one result per code,
+    in order:
+
+        {"code", "booking_id", "status": ok | already-used | invalid, "message"}
+
+    Each scan of a code admits one more seat of its booking, the same as a
+    gate scan. The seats are claimed with ONE conditional UPDATE and tagged
+    with `batch_id`, so retrying the same batch reports them "ok" again
+    instead of admitting more seats or answering "already-used".
+    """
+    resolved = []
+    for code in codes:
+        try:
+            resolved.append((code, booking_id_from_code(code, event.id), ""))
+        except InvalidTicket as e:
+            resolved.append((code, None, str(e)))
+
+    ids = {booking_id for _, booking_id, _ in resolved if booking_id}
+    valid = Booking.objects.filter(
+        id__in=ids, event=event, event__organizer__user=user, payment_status="paid",
+    )
+    names = dict(valid.values_list("id", "booking_name")) if ids else {}
+    admitted = _admit_batch(event.id, names, Counter(b for _, b, _ in resolved if b in names), batch_id)
+
+    results = []
+    for code, booking_id, error in resolved:
+        if booking_id not in names:
+            status, message = "invalid", error or "❌ Not a valid ticket for this event."
+        elif admitted[booking_id] > 0:
+            admitted[booking_id] -= 1
+            status, message = "ok", f"✅ {names[booking_id] or f'Ticket #{booking_id}'} verified!"
+        else:
+            status, message = "already-used", f"ℹ️ Ticket #{booking_id} already verified."
+        results.append({"code": code, "booking_id": booking_id, "status": status, "message": message})
+    return results
+
+
+def _admit_batch(event_id, names, scans, batch_id):
+    """
+    Admit up to scans[booking_id] seats of each booking for `batch_id`.
+    Returns a Counter of the seats (or seatless bookings) this batch admitted,
+    including those a previous attempt of the same batch already admitted.
+    """
+    if not scans:
+        return Counter()
+    now = timezone.now()
+    seats = Seat.objects.filter(booking_id__in=scans, event_id=event_id)
+    done = Counter(seats.filter(checkin_batch=batch_id).values_list("booking_id", flat=True))
+
+    # Pick the next free seats of each booking, then claim them all at once
+    wanted = {booking_id: n - done[booking_id] for booking_id, n in scans.items()}
+    chosen = []
+    for pk, booking_id in seats.filter(admitted_at__isnull=True).order_by("booking_id", "seat_no").values_list("pk", "booking_id"):
+        if wanted[booking_id] > 0:
+            wanted[booking_id] -= 1
+            chosen.append(pk)
+    if chosen:
+        Seat.objects.filter(pk__in=chosen, admitted_at__isnull=True).update(admitted_at=now, checkin_batch=batch_id)
+    admitted = Counter(seats.filter(checkin_batch=batch_id).values_list("booking_id", flat=True))
+
+    # Bookings without seat rows are admitted as a whole
+    seated = set(seats.values_list("booking_id", flat=True).distinct())
+    seatless = Booking.objects.filter(id__in=set(scans) - seated)
+    first_admissions = seatless.filter(attended=False).update(attended=True, attended_at=now, checkin_batch=batch_id)
+    admitted.update(seatless.filter(checkin_batch=batch_id).values_list("id", flat=True))
+
+    first_admissions += Booking.objects.filter(id__in=set(admitted) & seated, attended=False).update(
+        attended=True, attended_at=now, checkin_batch=batch_id,
+    )
+    record_stats(event_id, admissions=first_admissions)
+    return admitted
+
+
+def admit_seat(user, event_id, booking_id):
+    """
+    Gate scan: let ONE more person in on `booking_id`.
+
+    The next unadmitted seat of the booking is claimed with a single
+    UPDATE ... WHERE pk = (first free seat) AND admitted_at IS NULL, so two
+    gates scanning the same ticket never admit the same seat twice. Returns
+
+        {"status": admitted | already-used | invalid, "message",
+         "booking_id", "seat", "admitted", "remaining"}
+    """
+    return _admit(user, event_id, booking_id, whole_booking=False)
+
+
+def admit_booking(user, event_id, booking_id):
+    """Manual check-in: admit every remaining seat of `booking_id` at once. Returns like admit_seat()."""
+    return _admit(user, event_id, booking_id, whole_booking=True)
+
+
+def _admit(user, event_id, booking_id, whole_booking):
+    now = timezone.now()
+    seats = Seat.objects.filter(
+        booking_id=booking_id,
+        event_id=event_id,
+        booking__payment_status="paid",
+        booking__event__organizer__user=user,
+    )
+    free = seats.filter(admitted_at__isnull=True)
+
+    updated = 0
+    if whole_booking:
+        updated = Seat.objects.filter(pk__in=free.values("pk"), admitted_at__isnull=True).update(admitted_at=now)
+    else:
+        next_seat = free.order_by("seat_no").values("pk")[:1]
+        for _ in range(3):  # lost a race for the same seat: try the next one
+            updated = Seat.objects.filter(pk=Subquery(next_seat), admitted_at__isnull=True).update(admitted_at=now)
+            if updated or not free.exists():
+                break
+
+    counts = seats.aggregate(
+        total=Count("pk"),
+        admitted=Count("admitted_at"),
+        seat=Max("seat_no", filter=Q(admitted_at=now)),
+    )
+    if not counts["total"]:
+        return _admit_seatless(user, event_id, booking_id, now)
+
+    result = {
+        "booking_id": booking_id,
+        "seat": counts["seat"] if updated == 1 else None,
+        "admitted": counts["admitted"],
+        "remaining": counts["total"] - counts["admitted"],
+    }
+    if not updated:
+        return {**result, "status": "already-used",
+                "message": f"ℹ️ All {counts['total']} seat(s) on ticket #{booking_id} already admitted."}
+
+    if Booking.objects.filter(pk=booking_id, attended=False).update(attended=True, attended_at=now):
+        record_stats(event_id, admissions=1)
+    if updated == 1:
+        message = f"✅ Seat {counts['seat']} admitted ({result['remaining']} left on this ticket)."
+    else:
+        message = f"✅ {updated} seats on ticket #{booking_id} admitted."
+    return {**result, "status": "admitted", "message": message}
+
+
+def _admit_seatless(user, event_id, booking_id, now):
+    """Slow path: bookings without seat rows are admitted as a whole."""
+    booking = Booking.objects.filter(
+        pk=booking_id, event_id=event_id, payment_status="paid", event__organizer__user=user,
+    )
+    result = {"booking_id": booking_id, "seat": None, "admitted": 0, "remaining": 0}
+    if booking.filter(attended=False).update(attended=True, attended_at=now):
+        record_stats(event_id, admissions=1)
+        return {**result, "status": "admitted", "admitted": 1,
+                "message": f"✅ Ticket #{booking_id} admitted."}
+    if booking.exists():
+        return {**result, "status": "already-used", "admitted": 1,
+                "message": f"ℹ️ Ticket #{booking_id} already admitted."}
+    return {**result, "status": "invalid", "message": "❌ Not a valid ticket for this event."}
@@ -0,0 +1,127 @@
+"""
+Admin dashboard metrics.
+
+The admin index shows site-wide totals that are expensive to compute and
+don't need to be live. compute_snapshot() gathers all of them in five
+grouped queries, the booking figures from the EventDailyStats rollup
+(monthly revenue via TruncMonth, popular events via one annotated query),
+and get_snapshot() serves the result from the cache for
+DASHBOARD_SNAPSHOT_SECONDS, so reloading the dashboard doesn't touch the
+database. Only one thread per process recomputes an expired snapshot.
+
+`refresh_dashboard` recomputes it on a schedule (cron) so admins never wait
+for it. The cache is shared by all processes (a database cache, see
+settings.CACHES), and the snapshot is dropped whenever the figures change:
+on event creation and deletion (signals.py) and whenever record_stats()
+applies booking, payment or refund changes.
+"""
+import threading
+from datetime import date
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from ..models import Event, EventDailyStats, Profile
+from .stats import TOTALS
+
+CACHE_KEY = "eventhub:admin-dashboard"
+REVENUE_MONTHS = 6
+POPULAR_EVENTS = 4
+
+_lock = threading.Lock()
+
+
+def _last_months(today, count):
+    """First day of the last `count` calendar months, oldest first (including this one)."""
+    months = []
+    year, month = today.year, today.month
+    for _ in range(count):
+        months.append(date(year, month, 1))
+        year, month = (year, month - 1) if month > 1 else (year - 1, 12)
+    return months[::-1]
+
+
+def compute_snapshot():
+    today = timezone.localdate()
+
+    profiles = Profile.objects.aggregate(
+        users=Count("id"),
+        customers=Count("id", filter=Q(role="customer")),
+        organizers=Count("id", filter=Q(role="organizer")),
+    )
+    events = Event.objects.aggregate(
+        total=Count("id"),
+        upcoming=Count("id", filter=Q(date__gte=today)),
+        capacity=Sum("capacity"),
+    )
+
+    # One row per month with sales; all-time totals are their sum
+    monthly = (
+        EventDailyStats.objects.annotate(month=TruncMonth("day"))
+        .values("month")
+        .annotate(tickets=TOTALS["tickets"], revenue=TOTALS["net_revenue"])
+        .order_by()
+    )
+    revenue_by_month, tickets_sold, total_revenue = {}, 0, 0
+    for row in monthly:
+        month = row["month"]
+        key = (month.year, month.month)
+        revenue_by_month[key] = revenue_by_month.get(key, 0) + (row["revenue"] or 0)
+        tickets_sold += row["tickets"] or 0
+        total_revenue += row["revenue"] or 0
+    months = _last_months(today, REVENUE_MONTHS)
+
+    popular = (
+        EventDailyStats.objects.values("event")
+        .annotate(tickets=TOTALS["tickets"], title=F("event__title"), date=F("event__date"))
+        .filter(tickets__gt=0)
+        .order_by("-tickets")
+        .values("title", "tickets", "date")[:POPULAR_EVENTS]
+    )
+    upcoming_event = (
+        Event.objects.filter(date__gte=today).order_by("date")
+        .values("title", "date", "location").first()
+    )
+
+    capacity = events["capacity"] or 0
+    return {
+        # cards
+        "total_users": profiles["users"],
+        "total_customers": profiles["customers"],
+        "total_organizers": profiles["organizers"],
+        "total_events": events["total"],
+        "upcoming_events_count": events["upcoming"],
+        "tickets_sold": tickets_sold,
+        "total_capacity": capacity,
+        "total_available": max(capacity - tickets_sold, 0),
+        "total_revenue": total_revenue,
+        "avg_tickets_per_event": round(tickets_sold / events["total"], 1) if events["total"] else 0,
+        # charts
+        "revenue_labels": [m.strftime("%b") for m in months],
+        "revenue_values": [float(revenue_by_month.get((m.year, m.month), 0)) for m in months],
+        # lists
+        "popular_events": list(popular),
+        "upcoming_event": upcoming_event,
+        "generated_at": timezone.now(),
+    }
+
+
+def refresh_snapshot():
+    snapshot = compute_snapshot()
+    cache.set(CACHE_KEY, snapshot, settings.DASHBOARD_SNAPSHOT_SECONDS)
+    return snapshot
+
+
+def get_snapshot():
+    snapshot = cache.get(CACHE_KEY)
+    if snapshot is None:
+        with _lock:  # concurrent reloads wait for one computation
+            snapshot = cache.get(CACHE_KEY) or refresh_snapshot()
+    return snapshot
+
+
+def invalidate_snapshot():
+    cache.delete(CACHE_KEY)
@@ -0,0 +1,117 @@
+"""
+Live event counters for organizer dashboards.
+
+`event_live_counters` streams server-sent events to every open dashboard
+tab. Tabs don't query anything themselves: one CounterHub per server process
+polls the counters of every event that currently has a subscriber with a
+single grouped query per tick, and pushes a snapshot to that event's
+subscribers only when it changed. 100 tabs watching an event cost one query
+every TICK_SECONDS.
+
+Needs an ASGI server (uvicorn EventHub.asgi:application) to hold streams
+open; under WSGI the view sends one snapshot and lets EventSource reconnect.
+"""
+import asyncio
+import logging
+from collections import defaultdict
+
+from asgiref.sync import sync_to_async
+from django.db import DatabaseError
+from django.db.models import Count, DecimalField, F, OuterRef, Q, Subquery, Sum
+
+from ..models import Booking, Event
+
+logger = logging.getLogger(__name__)
+
+TICK_SECONDS = 2.0
+KEEPALIVE_SECONDS = 15.0
+
+
+def fetch_counters(event_ids):
+    """{event_id: {"sold", "admitted", "remaining", "bookings", "revenue"}} in one query."""
+    paid = Booking.objects.filter(event=OuterRef("pk"), payment_status="paid").order_by().values("event")
+    # Admissions are recorded per seat (see checkin.py); bookings without
+    # seat rows are admitted as a whole
+    seatless_admitted = paid.filter(attended=True, seats__isnull=True)
+    rows = (
+        Event.objects.filter(id__in=event_ids)
+        .annotate(
+            sold=Count("seats", filter=Q(seats__booking__payment_status="paid")),
+            admitted_seats=Count(
+                "seats", filter=Q(seats__booking__payment_status="paid", seats__admitted_at__isnull=False),
+            ),
+            admitted_seatless=Subquery(
+                seatless_admitted.annotate(n=Sum(F("tickets_booked") - F("canceled_tickets"))).values("n")
+            ),
+            booking_count=Subquery(paid.annotate(n=Count("pk")).values("n")),
+            revenue=Subquery(
+                paid.annotate(total=Sum("amount_to_pay")).values("total"),
+                output_field=DecimalField(max_digits=12, decimal_places=2),
+            ),
+        )
+        .values_list("id", "capacity", "sold", "admitted_seats", "admitted_seatless", "booking_count", "revenue")
+    )
+    return {
+        event_id: {
+            "sold": sold,
+            "admitted": seats + (seatless or 0),
+            "remaining": max(0, capacity - sold),
+            "bookings": bookings or 0,
+            "revenue": str(revenue or 0),
+        }
+        for event_id, capacity, sold, seats, seatless, bookings, revenue in rows
+    }
+
+
+def _offer(queue, snapshot):
+    """Replace whatever a slow subscriber hasn't read yet: only the latest counts matter."""
+    if queue.full():
+        queue.get_nowait()
+    queue.put_nowait(snapshot)
+
+
+class CounterHub:
+    """Per-process fan-out of event counters, polled while anyone is subscribed."""
+
+    def __init__(self, interval=TICK_SECONDS):
+        self.interval = interval
+        self.subscribers = defaultdict(set)  # event_id -> {asyncio.Queue}
+        self.latest = {}
+        self.task = None
+
+    def subscribe(self, event_id):
+        queue = asyncio.Queue(maxsize=1)
+        self.subscribers[event_id].add(queue)
+        if event_id in self.latest:
+            queue.put_nowait(self.latest[event_id])
+        if self.task is None or self.task.done():
+            self.task = asyncio.get_running_loop().create_task(self._run())
+        return queue
+
+    def unsubscribe(self, event_id, queue):
+        subscribers = self.subscribers.get(event_id)
+        if subscribers is None:
+            return
+        subscribers.discard(queue)
+        if not subscribers:
+            del self.subscribers[event_id]
+            self.latest.pop(event_id, None)
+
+    async def _run(self):
+        while self.subscribers:
+            try:
+                counters = await sync_to_async(fetch_counters)(list(self.subscribers))
+            except DatabaseError:
+                logger.exception("Live counters query failed")
+                counters = {}
+
+            for event_id, snapshot in counters.items():
+                if self.latest.get(event_id) == snapshot or event_id not in self.subscribers:
+                    continue
+                self.latest[event_id] = snapshot
+                for queue in self.subscribers[event_id]:
+                    _offer(queue, snapshot)
+            await asyncio.sleep(self.interval)
+
+
+hub = CounterHub()
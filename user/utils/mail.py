@@ -0,0 +1,208 @@
+"""
+Outbound email queue.
+
+Views call queue_email() / queue_template_email(), which only insert an
+OutboundEmail row, so no request ever waits on SMTP. `send_queued_emails`
+claims due rows in priority order and sends them over one reused SMTP
+connection, retrying transient failures with exponential backoff.
+
+A worker claims rows by pushing `next_attempt_at` forward by CLAIM_LEASE,
+so a crashed worker's batch simply becomes due again once the lease runs out.
+"""
+import base64
+import random
+import smtplib
+from datetime import timedelta
+from email.mime.image import MIMEImage
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.mail import EmailMultiAlternatives
+from django.db import transaction
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from ..models import OutboundEmail
+from .banners import MIMETYPE as email_banner_mimetype, email_banner
+
+MAX_ATTEMPTS = 5
+BACKOFF_BASE = 30      # seconds before the first retry, doubled per attempt
+BACKOFF_MAX = 3600
+CLAIM_LEASE = timedelta(minutes=5)
+
+
+# ---------- enqueue ----------
+def attachment(filename, content=None, mimetype=None, storage_path=None, inline=False, variant=None):
+    """
+    Attachment spec for queue_email(). Pass raw bytes as `content`, or a
+    `storage_path` to read the file from default_storage at send time.
+    `variant` names a derivative from VARIANTS to attach instead of the
+    stored file. Inline images are referenced from the HTML as cid:<filename>.
+    """
+    spec = {"filename": filename, "mimetype": mimetype, "inline": inline}
+    if storage_path:
+        spec["storage_path"] = storage_path
+        if variant:
+            spec["variant"] = variant
+    else:
+        spec["content"] = base64.b64encode(content).decode()
+    return spec
+
+
+def build_email(kind, subject, to, html="", body="", from_email=None,
+                attachments=(), priority=None, send_at=None):
+    """Unsaved OutboundEmail, for callers that bulk_create many at once."""
+    if isinstance(to, str):
+        to = [to]
+    return OutboundEmail(
+        kind=kind,
+        priority=OutboundEmail.PRIORITY.get(kind, 60) if priority is None else priority,
+        subject=subject,
+        body=body,
+        html=html,
+        from_email=from_email or "",
+        to=[addr for addr in to if addr],
+        attachments=list(attachments),
+        next_attempt_at=send_at or timezone.now(),
+    )
+
+
+def queue_email(kind, subject, to, **kwargs):
+    """Add an email to the outbox. Returns the OutboundEmail row."""
+    email = build_email(kind, subject, to, **kwargs)
+    email.save()
+    return email
+
+
+def queue_template_email(kind, subject, template, context, to, **kwargs):
+    """queue_email() with the HTML part rendered from `template`."""
+    return queue_email(kind, subject, to, html=render_to_string(template, context), **kwargs)
+
+
+def banner_attachment(event, filename="banner.jpg"):
+    """Inline email-sized banner of `event`, as a list (empty without a banner)."""
+    if not event.banner:
+        return []
+    return [attachment(filename, mimetype=email_banner_mimetype, storage_path=event.banner.name,
+                       inline=True, variant="email_banner")]
+
+
+# ---------- delivery ----------
+# Derivatives an attachment spec can ask for: storage path -> bytes
+VARIANTS = {
+    "email_banner": email_banner,
+}
+
+
+def _read_storage(path):
+    with default_storage.open(path, "rb") as f:
+        return f.read()
+
+
+def _attachment_bytes(spec, files=None):
+    if "storage_path" in spec:
+        variant = spec.get("variant")
+        key = (spec["storage_path"], variant)
+        if files is not None and key in files:
+            return files[key]
+        data = VARIANTS.get(variant, _read_storage)(spec["storage_path"])
+        if files is not None:
+            files[key] = data
+        return data
+    return base64.b64decode(spec["content"])
+
+
+def build_message(row, connection=None, files=None):
+    """EmailMultiAlternatives for `row`; `files` caches storage reads across a batch."""
+    msg = EmailMultiAlternatives(
+        row.subject,
+        row.body,
+        row.from_email or settings.DEFAULT_FROM_EMAIL,
+        row.to,
+        connection=connection,
+    )
+    if row.html:
+        msg.attach_alternative(row.html, "text/html")
+
+    for spec in row.attachments:
+        data = _attachment_bytes(spec, files)
+        if spec.get("inline"):
+            image = MIMEImage(data)
+            image.add_header("Content-ID", f"<{spec['filename']}>")
+            image.add_header("Content-Disposition", "inline", filename=spec["filename"])
+            msg.attach(image)
+            msg.mixed_subtype = "related"
+        else:
+            msg.attach(spec["filename"], data, spec.get("mimetype"))
+    return msg
+
+
+def backoff(attempts):
+    """Delay before retry number `attempts` (with jitter so retries spread out)."""
+    delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** max(attempts - 1, 0))
+    return timedelta(seconds=delay * random.uniform(0.8, 1.2))
+
+
+def is_permanent(error):
+    """5xx SMTP replies (bad mailbox, rejected message) are not worth retrying."""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(code >= 500 for code, _ in error.recipients.values())
+    if isinstance(error, smtplib.SMTPResponseException):
+        return error.smtp_code >= 500
+    return False
+
+
+def claim_batch(batch_size):
+    """Lock and lease up to `batch_size` due emails, highest priority first."""
+    now = timezone.now()
+    with transaction.atomic():
+        rows = list(
+            OutboundEmail.objects.select_for_update(skip_locked=True)
+            .filter(status="queued", next_attempt_at__lte=now)
+            .order_by("priority", "next_attempt_at", "id")[:batch_size]
+        )
+        if rows:
+            OutboundEmail.objects.filter(id__in=[r.id for r in rows]).update(
+                next_attempt_at=now + CLAIM_LEASE
+            )
+    return rows
+
+
+def deliver(rows, connection, max_attempts=MAX_ATTEMPTS):
+    """
+    Send claimed rows over an already open `connection` and record the
+    outcome of each with one bulk UPDATE. Returns the rows.
+    """
+    connected = True
+    files = {}  # e.g. an event banner shared by every reminder in the batch
+    for row in rows:
+        if not connected:
+            # Server unreachable: put the rest back without burning an attempt
+            row.next_attempt_at = timezone.now() + backoff(1)
+            continue
+
+        row.attempts += 1
+        try:
+            connection.send_messages([build_message(row, connection, files)])
+        except Exception as e:
+            row.last_error = f"{type(e).__name__}: {e}"[:1000]
+            if is_permanent(e) or row.attempts >= max_attempts:
+                row.status = "failed"
+            else:
+                row.next_attempt_at = timezone.now() + backoff(row.attempts)
+            if isinstance(e, (smtplib.SMTPServerDisconnected, OSError)):
+                # Dropped connection: reopen once and carry on with the batch
+                connection.close()
+                try:
+                    connection.open()
+                except (OSError, smtplib.SMTPException):
+                    connected = False
+        else:
+            row.status = "sent"
+            row.sent_at = timezone.now()
+            row.last_error = ""
+
+    OutboundEmail.objects.bulk_update(
+        rows, ["status", "attempts", "next_attempt_at", "last_error", "sent_at"]
+    )
+    return rows
@@ -0,0 +1,168 @@
+"""
+Site notification delivery.
+
+Each server process keeps a NotificationHub that knows the newest
+SiteNotification id. Rows created in this process are published to it on
+commit; rows created elsewhere (other workers, management commands) are
+picked up by at most one small query per TICK_SECONDS, however many clients
+are connected. That gives two cheap paths:
+
+* `notification_stream` (ASGI): server-sent events; new notifications are
+  fanned out to every open stream from memory.
+* `fetch_site_notifications?after=<id>`: answers 204 without touching the
+  notification table when nothing newer than `after` exists.
+
+Seen state is the per-user Profile.last_seen_notification_id watermark.
+
+Targeted notifications (non-empty `audience`) have their members
+precomputed into NotificationAudience by materialize_audience() when they
+are created; reads only check membership through its (user, notification)
+index and never match interests.
+"""
+import asyncio
+import re
+import threading
+import time
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.db.models import Exists, Max, OuterRef, Q
+
+from ..models import Booking, NotificationAudience, Profile, SiteNotification
+
+TICK_SECONDS = 5.0
+KEEPALIVE_SECONDS = 15.0
+FIELDS = ("id", "title", "message", "notification_type", "targeted")
+AUDIENCE_BATCH = 2000
+UNSEEN_BATCH = 3  # notifications handed out per fetch
+
+
+def as_payload(row):
+    return {"id": row["id"], "title": row["title"], "message": row["message"],
+            "type": row["notification_type"], "targeted": row["targeted"]}
+
+
+# ---------- audiences ----------
+def audience_users(audience):
+    """Ids of users matching ANY criterion of an audience definition."""
+    match = Q()
+    for category in audience.get("categories", []):
+        # interests are free text: "music, tech, art"
+        match |= Q(customer__interests__iregex=rf"(^|,)\s*{re.escape(category)}\s*(,|$)")
+    for city in audience.get("cities", []):
+        match |= Q(customer__city__iexact=city)
+    if audience.get("organizer_bookers"):
+        match |= Q(id__in=Booking.objects.filter(
+            event__organizer_id=audience["organizer_bookers"], payment_status="paid",
+        ).values("customer_id"))
+    if not match:
+        return User.objects.none()
+    return User.objects.filter(match).order_by().values_list("id", flat=True).distinct()
+
+
+def materialize_audience(notification):
+    """Store the members of a targeted notification. Returns how many."""
+    if not notification.targeted:
+        return 0
+    members, total = [], 0
+    for user_id in audience_users(notification.audience).iterator(chunk_size=AUDIENCE_BATCH):
+        members.append(NotificationAudience(notification_id=notification.id, user_id=user_id))
+        if len(members) >= AUDIENCE_BATCH:
+            NotificationAudience.objects.bulk_create(members, ignore_conflicts=True)
+            total, members = total + len(members), []
+    NotificationAudience.objects.bulk_create(members, ignore_conflicts=True)
+    return total + len(members)
+
+
+def is_member(user, notification_id):
+    return NotificationAudience.objects.filter(user=user, notification_id=notification_id).exists()
+
+
+# ---------- reading ----------
+def visible_to(user):
+    """Notifications `user` may see: untargeted ones, plus those they are a member of."""
+    members = NotificationAudience.objects.filter(user=user, notification=OuterRef("pk"))
+    return SiteNotification.objects.filter(Q(targeted=False) | Exists(members))
+
+
+def take_unseen(user, limit=UNSEEN_BATCH):
+    """
+    Oldest `limit` notifications above `user`'s watermark, marked seen with
+    one UPDATE. The watermark only moves past rows actually returned, so a
+    backlog is delivered over successive calls instead of skipped.
+    """
+    watermark = Profile.objects.filter(user=user).values_list("last_seen_notification_id", flat=True).first() or 0
+    rows = list(
+        visible_to(user).filter(id__gt=watermark).order_by("id").values(*FIELDS)[:limit]
+    )
+    if rows:
+        mark_seen(user, rows[-1]["id"])
+    return [as_payload(row) for row in rows]
+
+
+def mark_seen(user, notification_id):
+    # Never move the watermark backwards (several tabs may race)
+    Profile.objects.filter(user=user, last_seen_notification_id__lt=notification_id).update(
+        last_seen_notification_id=notification_id
+    )
+
+
+class NotificationHub:
+    """Newest notification id for this process, plus in-process fan-out."""
+
+    def __init__(self, interval=TICK_SECONDS):
+        self.interval = interval
+        self.latest = None
+        self.checked_at = 0.0
+        self.lock = threading.Lock()
+        self.subscribers = set()  # (loop, asyncio.Queue)
+        self.task = None
+
+    def latest_id(self):
+        """Newest notification id; queries the DB at most once per interval."""
+        if self.latest is None or time.monotonic() - self.checked_at > self.interval:
+            self.refresh()
+        return self.latest
+
+    def refresh(self):
+        if self.latest is None:
+            latest = SiteNotification.objects.aggregate(latest=Max("id"))["latest"] or 0
+            with self.lock:
+                self.latest = max(self.latest or 0, latest)
+        else:
+            for row in SiteNotification.objects.filter(id__gt=self.latest).order_by("id").values(*FIELDS):
+                self.publish(row)
+        self.checked_at = time.monotonic()
+
+    def publish(self, row):
+        """Record a new notification and push it to every open stream (any thread)."""
+        with self.lock:
+            if self.latest is not None and row["id"] <= self.latest:
+                return
+            self.latest = row["id"]
+            subscribers = list(self.subscribers)
+        payload = as_payload(row)
+        for loop, queue in subscribers:
+            loop.call_soon_threadsafe(queue.put_nowait, payload)
+
+    def subscribe(self):
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+        with self.lock:
+            self.subscribers.add((loop, queue))
+        if self.task is None or self.task.done():
+            self.task = loop.create_task(self._run())
+        return queue
+
+    def unsubscribe(self, queue):
+        with self.lock:
+            self.subscribers = {(loop, q) for loop, q in self.subscribers if q is not queue}
+
+    async def _run(self):
+        # Picks up notifications created by other processes
+        while self.subscribers:
+            await sync_to_async(self.refresh)()
+            await asyncio.sleep(self.interval)
+
+
+hub = NotificationHub()
@@ -0,0 +1,45 @@
+"""
+Shared Razorpay client.
+
+razorpay.Client keeps a requests.Session internally, so building it once per
+process lets every caller (views, management commands, worker threads) reuse
+the same pooled HTTPS connections instead of opening a new one per call.
+"""
+import threading
+
+import razorpay
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from requests.adapters import HTTPAdapter
+
+# Enough pooled connections for the concurrent management commands.
+POOL_SIZE = 32
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_razorpay_client():
+    """Return the process-wide Razorpay client, creating it on first use."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                client = razorpay.Client(
+                    auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET),
+                    base_url=settings.RAZORPAY_BASE_URL,
+                )
+                adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+                client.session.mount("https://", adapter)
+                client.session.mount("http://", adapter)
+                _client = client
+    return _client
+
+
+@receiver(setting_changed)
+def _reset_client(setting, **kwargs):
+    """Rebuild the client when tests / load tests override Razorpay settings."""
+    global _client
+    if setting.startswith("RAZORPAY_"):
+        _client = None
@@ -0,0 +1,350 @@
+"""
+PDF tickets with ReportLab.
+
+The static part of the ticket (frame, header band, logo, labels) is drawn
+once per document as a Form XObject and stamped on every page, and logos are
+decoded once per process, so a page only costs its text and a vector QR.
+
+Batch rendering streams bookings out of the database, hands plain dicts to a
+process pool in chunks and writes either one PDF per booking or a single
+merged PDF (chunks are joined with PyMuPDF).
+
+build_event_tickets() renders the merged PDF the download link serves. It
+holds a per-event lock file while it works, so concurrent downloads and the
+`generate_event_tickets` command never render the same event twice; whoever
+finds the lock taken gets RenderInProgress.
+"""
+import hashlib
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from functools import lru_cache
+from io import BytesIO
+from pathlib import Path
+
+import pymupdf
+import qrcode
+from django.conf import settings
+from django.db.models import Count, Max, Sum
+from django.urls import reverse
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A6, landscape
+from reportlab.lib.units import mm
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfgen import canvas
+
+from .tickets import make_ticket_token
+
+PAGE_SIZE = landscape(A6)
+QR_SIZE = 42 * mm
+ACCENT = colors.HexColor("#ffc107")
+DARK = colors.HexColor("#1f1f2e")
+# A lock older than this was left behind by a render that crashed
+RENDER_LOCK_STALE_SECONDS = 15 * 60
+
+
+class RenderInProgress(Exception):
+    """Another request or process is rendering this event's tickets right now."""
+
+
+# ---------- data ----------
+def ticket_payload(booking, verify_url, seat_numbers):
+    """Everything needed to draw one ticket, as a picklable dict."""
+    event = booking.event
+    return {
+        "id": booking.id,
+        "order_id": booking.order_id or f"#{booking.id}",
+        "name": booking.booking_name or "",
+        "event": event.title,
+        "date": event.date.strftime("%d %b %Y"),
+        "time": event.time.strftime("%I:%M %p") if event.time else "",
+        "location": event.location,
+        "tickets": booking.active_tickets,
+        "seats": _seat_text(seat_numbers),
+        "verify_url": verify_url,
+    }
+
+
+def _seat_text(seat_numbers):
+    if not seat_numbers:
+        return "General admission"
+    seat_numbers = sorted(seat_numbers)
+    if seat_numbers[-1] - seat_numbers[0] + 1 == len(seat_numbers) and len(seat_numbers) > 1:
+        return f"{seat_numbers[0]}–{seat_numbers[-1]}"
+    return ", ".join(str(n) for n in seat_numbers)
+
+
+def event_ticket_payloads(event, base_url, chunk_size=2000):
+    """Stream ticket dicts for every paid booking of `event`."""
+    from ..models import Booking  # avoid import cycle at module load
+
+    bookings = (
+        Booking.objects.filter(event=event, payment_status="paid")
+        .select_related("event")
+        .prefetch_related("seats")
+        .order_by("id")
+    )
+    base_url = base_url.rstrip("/")
+    for booking in bookings.iterator(chunk_size=chunk_size):
+        seat_numbers = [s.seat_no for s in booking.seats.all()]
+        token = make_ticket_token(booking, seat_numbers)
+        verify_url = f"{base_url}{reverse('verify_ticket_token', args=[token])}"
+        yield ticket_payload(booking, verify_url, seat_numbers)
+
+
+# ---------- drawing ----------
+@lru_cache(maxsize=32)
+def _logo(path):
+    """Decoded logo, once per process (None if missing / unreadable)."""
+    if not path:
+        return None
+    try:
+        return ImageReader(path)
+    except Exception:
+        return None
+
+
+def _define_layout(c, logo_path):
+    """Static ticket artwork, emitted once per PDF and reused by every page."""
+    width, height = PAGE_SIZE
+    c.beginForm("ticket_layout")
+    c.setFillColor(colors.white)
+    c.rect(0, 0, width, height, stroke=0, fill=1)
+    c.setFillColor(DARK)
+    c.rect(0, height - 18 * mm, width, 18 * mm, stroke=0, fill=1)
+    c.setStrokeColor(ACCENT)
+    c.setLineWidth(2)
+    c.rect(4 * mm, 4 * mm, width - 8 * mm, height - 8 * mm, stroke=1, fill=0)
+
+    logo = _logo(logo_path)
+    if logo is not None:
+        c.drawImage(logo, 7 * mm, height - 16 * mm, 14 * mm, 14 * mm,
+                    preserveAspectRatio=True, mask="auto")
+
+    c.setFillColor(ACCENT)
+    c.setFont("Helvetica-Bold", 14)
+    c.drawString(24 * mm, height - 11.5 * mm, "EventHub Ticket")
+
+    c.setFillColor(colors.grey)
+    c.setFont("Helvetica", 7)
+    for label, y in (("DATE & TIME", 62), ("VENUE", 50), ("NAME", 38), ("TICKETS / SEATS", 26)):
+        c.drawString(9 * mm, y * mm, label)
+    c.drawRightString(width - 9 * mm, 8 * mm, "Show this QR code at the entrance")
+    c.endForm()
+
+
+def _draw_qr(c, data, x, y, size):
+    """Vector QR as a single path: one rectangle per horizontal run of modules."""
+    code = qrcode.QRCode(border=0)
+    code.add_data(data)
+    code.make(fit=True)
+    matrix = code.get_matrix()
+    cell = size / len(matrix)
+
+    path = c.beginPath()
+    for r, row in enumerate(matrix):
+        top = y + size - (r + 1) * cell
+        start = None
+        for col, dark in enumerate(row + [False]):
+            if dark and start is None:
+                start = col
+            elif not dark and start is not None:
+                path.rect(x + start * cell, top, (col - start) * cell, cell)
+                start = None
+    c.setFillColor(colors.black)
+    c.drawPath(path, stroke=0, fill=1)
+
+
+def _draw_ticket(c, t):
+    width, height = PAGE_SIZE
+    c.doForm("ticket_layout")
+
+    c.setFillColor(DARK)
+    c.setFont("Helvetica-Bold", 12)
+    c.drawString(9 * mm, height - 27 * mm, t["event"][:48])
+    c.setFont("Helvetica", 9)
+    c.drawString(9 * mm, 57 * mm, f"{t['date']}  {t['time']}")
+    c.drawString(9 * mm, 45 * mm, t["location"][:52])
+    c.drawString(9 * mm, 33 * mm, t["name"][:40])
+    c.drawString(9 * mm, 21 * mm, f"{t['tickets']}  ·  {t['seats']}"[:52])
+    c.setFont("Helvetica", 7)
+    c.drawString(9 * mm, 12 * mm, f"Order {t['order_id']}")
+
+    _draw_qr(c, t["verify_url"], width - QR_SIZE - 8 * mm, 14 * mm, QR_SIZE)
+
+
+def render_tickets(tickets, logo_path=None):
+    """Render ticket dicts to one PDF (one page each) and return its bytes."""
+    buffer = BytesIO()
+    c = canvas.Canvas(buffer, pagesize=PAGE_SIZE, pageCompression=1)
+    c.setTitle("EventHub Tickets")
+    _define_layout(c, logo_path)
+    for t in tickets:
+        _draw_ticket(c, t)
+        c.showPage()
+    c.save()
+    return buffer.getvalue()
+
+
+def _render_chunk(args):
+    """Process-pool entry point (no ORM access in workers)."""
+    tickets, logo_path, out_dir = args
+    if out_dir is None:
+        return len(tickets), render_tickets(tickets, logo_path)
+    for t in tickets:
+        (Path(out_dir) / ticket_filename(t)).write_bytes(render_tickets([t], logo_path))
+    return len(tickets), None
+
+
+def ticket_filename(t):
+    return f"ticket_{t['id']}.pdf"
+
+
+def _chunks(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def event_logo_path(event):
+    logo = getattr(event.organizer, "logo", None)
+    if not logo:
+        return None
+    try:
+        return logo.path
+    except (NotImplementedError, ValueError):
+        return None
+
+
+def merge_pdfs(parts, out_path):
+    """Concatenate PDF byte strings into `out_path`."""
+    merged = pymupdf.open()
+    for part in parts:
+        with pymupdf.open(stream=part, filetype="pdf") as doc:
+            merged.insert_pdf(doc)
+    merged.save(str(out_path), garbage=1, deflate=True)
+    merged.close()
+
+
+def render_event_tickets(event, base_url, out_path=None, out_dir=None, workers=None, chunk_size=250):
+    """
+    Render all paid tickets of `event` in a process pool.
+
+    Either a merged PDF at `out_path` or one PDF per booking in `out_dir`.
+    Returns the number of tickets rendered.
+    """
+    logo_path = event_logo_path(event)
+    workers = workers or os.cpu_count() or 1
+    if out_dir is not None:
+        Path(out_dir).mkdir(parents=True, exist_ok=True)
+
+    jobs = (
+        (chunk, logo_path, str(out_dir) if out_dir is not None else None)
+        for chunk in _chunks(event_ticket_payloads(event, base_url), chunk_size)
+    )
+
+    count = 0
+    parts = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for rendered, pdf in pool.map(_render_chunk, jobs):
+            count += rendered
+            if pdf is not None:
+                parts.append(pdf)
+
+    if out_dir is None:
+        out_path = Path(out_path)
+        out_path.parent.mkdir(parents=True, exist_ok=True)
+        # Write next to the target and rename, so downloads never see half a
+        # file; the temp name is unique, so concurrent renders can't collide
+        fd, tmp_name = tempfile.mkstemp(dir=out_path.parent, prefix=f".{out_path.stem}.", suffix=".tmp")
+        os.close(fd)
+        tmp_path = Path(tmp_name)
+        try:
+            if len(parts) > 1:
+                merge_pdfs(parts, tmp_path)
+            else:
+                tmp_path.write_bytes(parts[0] if parts else render_tickets([], logo_path))
+            os.replace(tmp_path, out_path)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+    return count
+
+
+def event_tickets_fingerprint(event):
+    """
+    Changes whenever a booking is paid, (partly) canceled or removed, or the
+    organizer edits anything printed on the tickets (title, date, time,
+    location, logo).
+    """
+    from ..models import Booking, Event
+
+    stats = Booking.objects.filter(event=event, payment_status="paid").aggregate(
+        n=Count("id"), last=Max("id"), canceled=Sum("canceled_tickets")
+    )
+    # Read from the database: `event` may predate an edit
+    printed = Event.objects.filter(pk=event.pk).values_list(
+        "title", "date", "time", "location", "organizer__logo"
+    ).first()
+    details = hashlib.sha256(repr(printed).encode()).hexdigest()[:12]
+    return f"{stats['n']}-{stats['last'] or 0}-{stats['canceled'] or 0}-{details}"
+
+
+def event_tickets_path(event, fingerprint=None):
+    """Where an event's merged PDF lives for the current set of paid bookings."""
+    fingerprint = fingerprint or event_tickets_fingerprint(event)
+    return Path(settings.TICKET_PDF_DIR) / f"event_{event.id}_{fingerprint}.pdf"
+
+
+def prune_event_tickets(event, keep):
+    """Drop merged PDFs of `event` rendered for an older set of bookings."""
+    for path in Path(settings.TICKET_PDF_DIR).glob(f"event_{event.id}_*.pdf"):
+        if path != keep:
+            path.unlink(missing_ok=True)
+
+
+@contextmanager
+def event_render_lock(event):
+    """Per-event lock file, shared by every process that renders into TICKET_PDF_DIR."""
+    directory = Path(settings.TICKET_PDF_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"event_{event.id}.lock"
+    try:
+        fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        try:
+            stale = time.time() - path.stat().st_mtime > RENDER_LOCK_STALE_SECONDS
+        except FileNotFoundError:
+            stale = True  # released while we looked
+        if not stale:
+            raise RenderInProgress(event.id)
+        path.unlink(missing_ok=True)
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            raise RenderInProgress(event.id)
+    os.close(fd)
+    try:
+        yield
+    finally:
+        path.unlink(missing_ok=True)
+
+
+def build_event_tickets(event, base_url, workers=None, chunk_size=250):
+    """
+    Render the merged PDF the download link serves, unless it is already
+    current. Returns its path; raises RenderInProgress if another render of
+    this event holds the lock.
+    """
+    with event_render_lock(event):
+        path = event_tickets_path(event)
+        if not path.exists():
+            render_event_tickets(event, base_url, out_path=path, workers=workers, chunk_size=chunk_size)
+            prune_event_tickets(event, keep=path)
+    return path
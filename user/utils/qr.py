@@ -0,0 +1,85 @@
+"""
+Content-addressed QR code cache.
+
+A QR image is a pure function of its payload, so it is rendered once, stored
+as <sha256(payload)>.png under QR_CACHE_DIR and kept in a small in-process
+LRU. Pages link to it through the `qr_image` URL, which serves the file with
+long-lived immutable cache headers instead of re-rendering and base64-inlining
+the PNG on every request.
+
+Only payloads that are shown again belong in the cache (ticket links). A
+one-off payload such as a payment link is shown once and then dies, so
+qr_data_uri() renders it inline without storing anything.
+"""
+import base64
+import hashlib
+import os
+import re
+import tempfile
+from functools import lru_cache
+from io import BytesIO
+from pathlib import Path
+
+import qrcode
+from django.conf import settings
+from django.urls import reverse
+
+KEY_RE = re.compile(r"^[0-9a-f]{64}$")
+
+
+def cache_dir():
+    return Path(getattr(settings, "QR_CACHE_DIR", Path(settings.MEDIA_ROOT) / "qr_cache"))
+
+
+def qr_key(payload):
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _render(payload):
+    buffer = BytesIO()
+    qrcode.make(payload).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+@lru_cache(maxsize=1024)
+def _read(key):
+    # Misses raise, and lru_cache never caches exceptions
+    return (cache_dir() / f"{key}.png").read_bytes()
+
+
+def load_qr(key):
+    """PNG bytes for an already stored key, or None if it is not on disk."""
+    try:
+        return _read(key)
+    except FileNotFoundError:
+        return None
+
+
+@lru_cache(maxsize=1024)
+def qr_png(payload):
+    """PNG bytes for `payload`, rendered at most once per payload."""
+    key = qr_key(payload)
+    png = load_qr(key)
+    if png is not None:
+        return png
+
+    png = _render(payload)
+    directory = cache_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    # Write to a temp file and rename so readers never see a partial PNG
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        f.write(png)
+    os.replace(tmp, directory / f"{key}.png")
+    return png
+
+
+def qr_data_uri(payload):
+    """Inline `data:` URL for a one-off payload; nothing is written to disk."""
+    return "data:image/png;base64," + base64.b64encode(_render(payload)).decode()
+
+
+def qr_url(payload):
+    """URL of the cached QR image for `payload` (renders it if needed)."""
+    qr_png(payload)
+    return reverse("qr_image", args=[qr_key(payload)])
@@ -0,0 +1,25 @@
+"""
+Client-side rate limiting for calls to third-party APIs (Razorpay, the SMS
+gateway), shared by the worker threads of a command or client.
+"""
+import threading
+import time
+
+
+class RateLimiter:
+    """Thread-safe limiter that spaces calls evenly at `rate` per second (0 = unlimited)."""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self.lock = threading.Lock()
+        self.next_at = time.monotonic()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self.lock:
+            now = time.monotonic()
+            at = max(self.next_at, now)
+            self.next_at = at + self.interval
+        if at > now:
+            time.sleep(at - now)
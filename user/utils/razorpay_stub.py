@@ -0,0 +1,215 @@
+"""
+Local Razorpay stand-in for load tests and offline development.
+
+Implements just the API surface EventHub uses:
+
+  POST /v1/payment_links              create a link
+  GET  /v1/payment_links/<id>         fetch link status (+ payments)
+  GET  /v1/payments/<id>              fetch a payment
+  POST /v1/payments/<id>/refund       refund a payment
+  GET  /v1/payments/<id>/refunds      list refunds of a payment
+  GET  /pay/<link_id>                 "customer pays" → returns the signed
+                                      callback params and webhook as JSON
+
+Callbacks are signed with RAZORPAY_KEY_SECRET and webhooks with
+RAZORPAY_WEBHOOK_SECRET exactly like the real gateway, so the normal
+`payment_success` / `razorpay_webhook` views verify them unchanged.
+"""
+import hashlib
+import hmac
+import json
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def _new_id(prefix):
+    return f"{prefix}_{uuid.uuid4().hex[:14]}"
+
+
+class RazorpayStub:
+    """In-memory payment gateway served over HTTP on a background thread."""
+
+    def __init__(self, key_secret, webhook_secret, host="127.0.0.1", port=0, method="upi"):
+        self.key_secret = key_secret
+        self.webhook_secret = webhook_secret
+        self.method = method
+        self.links = {}
+        self.payments = {}
+        self.refunds = {}
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host, port), self._handler_class())
+        self.server.daemon_threads = True
+        self.thread = None
+
+    # ---------- lifecycle ----------
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # ---------- gateway behaviour ----------
+    def create_link(self, data):
+        link_id = _new_id("plink")
+        link = {
+            "id": link_id,
+            "amount": int(data.get("amount", 0)),
+            "currency": data.get("currency", "INR"),
+            "description": data.get("description", ""),
+            "customer": data.get("customer", {}),
+            "reference_id": data.get("reference_id", ""),
+            "callback_url": data.get("callback_url", ""),
+            "status": "created",
+            "payments": [],
+            "short_url": f"{self.base_url}/pay/{link_id}",
+            "created_at": int(time.time()),
+        }
+        with self.lock:
+            self.links[link_id] = link
+        return link
+
+    def pay(self, link_id):
+        """
+        Complete the payment for a link and return what the gateway would
+        send: the signed callback query params and the signed webhook.
+        """
+        with self.lock:
+            link = self.links[link_id]
+            payment_id = _new_id("pay")
+            payment = {
+                "id": payment_id,
+                "entity": "payment",
+                "amount": link["amount"],
+                "currency": link["currency"],
+                "status": "captured",
+                "method": self.method,
+                "payment_link_id": link_id,
+                "email": link["customer"].get("email"),
+                "contact": link["customer"].get("contact"),
+            }
+            self.payments[payment_id] = payment
+            link["status"] = "paid"
+            link["payments"].append({
+                "payment_id": payment_id,
+                "amount": link["amount"],
+                "method": self.method,
+                "status": "captured",
+            })
+
+        status = "paid"
+        signed = f"{link_id}|{link['reference_id']}|{status}|{payment_id}"
+        callback = {
+            "razorpay_payment_id": payment_id,
+            "razorpay_payment_link_id": link_id,
+            "razorpay_payment_link_reference_id": link["reference_id"],
+            "razorpay_payment_link_status": status,
+            "razorpay_signature": self.sign(self.key_secret, signed.encode()),
+        }
+
+        body = json.dumps({
+            "event": "payment.captured",
+            "payload": {"payment": {"entity": payment}},
+            "created_at": int(time.time()),
+        }).encode()
+        webhook = {
+            "body": body.decode(),
+            "signature": self.sign(self.webhook_secret, body),
+        }
+        return {"callback": callback, "webhook": webhook}
+
+    def refund(self, payment_id, data):
+        with self.lock:
+            payment = self.payments.get(payment_id)
+            if payment is None:
+                return None
+            receipt = data.get("receipt")
+            for existing in self.refunds.get(payment_id, []):
+                if receipt and existing.get("receipt") == receipt:
+                    return existing  # idempotent on receipt
+            refund = {
+                "id": _new_id("rfnd"),
+                "entity": "refund",
+                "payment_id": payment_id,
+                "amount": int(data.get("amount", payment["amount"])),
+                "receipt": receipt,
+                "status": "processed",
+            }
+            self.refunds.setdefault(payment_id, []).append(refund)
+        return refund
+
+    @staticmethod
+    def sign(secret, payload):
+        return hmac.new(secret.encode(), payload, hashlib.sha256).hexdigest()
+
+    # ---------- HTTP plumbing ----------
+    def _handler_class(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass  # keep load-test output clean
+
+            def _send(self, status, data):
+                body = json.dumps(data).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _not_found(self):
+                self._send(404, {"error": {"code": "BAD_REQUEST_ERROR",
+                                           "description": "The id provided does not exist"}})
+
+            def _json_body(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                raw = self.rfile.read(length) if length else b""
+                return json.loads(raw or b"{}")
+
+            def do_GET(self):
+                path = self.path.split("?")[0].rstrip("/")
+                if m := re.fullmatch(r"/v1/payment_links/([\w]+)", path):
+                    link = stub.links.get(m.group(1))
+                    return self._send(200, link) if link else self._not_found()
+                if m := re.fullmatch(r"/v1/payments/([\w]+)/refunds", path):
+                    items = stub.refunds.get(m.group(1), [])
+                    return self._send(200, {"entity": "collection", "count": len(items), "items": items})
+                if m := re.fullmatch(r"/v1/payments/([\w]+)", path):
+                    payment = stub.payments.get(m.group(1))
+                    return self._send(200, payment) if payment else self._not_found()
+                if m := re.fullmatch(r"/pay/([\w]+)", path):
+                    if m.group(1) not in stub.links:
+                        return self._not_found()
+                    return self._send(200, stub.pay(m.group(1)))
+                self._not_found()
+
+            def do_POST(self):
+                path = self.path.split("?")[0].rstrip("/")
+                data = self._json_body()
+                if path == "/v1/payment_links":
+                    return self._send(200, stub.create_link(data))
+                if m := re.fullmatch(r"/v1/payments/([\w]+)/refund", path):
+                    refund = stub.refund(m.group(1), data)
+                    return self._send(200, refund) if refund else self._not_found()
+                self._not_found()
+
+        return Handler
@@ -0,0 +1,201 @@
+"""
+Event cancellation and bulk refunds.
+
+cancel_event() cancels every booking of an event and releases all of its
+seats with set-based UPDATEs, then queues a refund (refund_status="pending")
+for each paid booking. process_refunds() works through that queue with a
+bounded thread pool, along with payments that arrived after their booking
+was canceled or expired (paid_late, queued by complete_payment()). Those
+were never sold, so their refunds stay out of the daily stats.
+
+Every refund carries a deterministic idempotency key (the Razorpay `receipt`)
+and the booking is moved to "processing" before the request is sent. After a
+crash or a failed call, any booking that was attempted before is looked up
+by receipt first, so a retry never refunds the same booking twice.
+
+The "processing" claim is a lease (`refund_claimed_at`): another worker only
+takes such a booking over once REFUND_CLAIM_LEASE has run out, i.e. the run
+that claimed it crashed.
+"""
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.utils import timezone
+
+from ..models import Booking, Event, Seat
+from .payments import get_razorpay_client
+from .stats import record_stats
+
+REFUND_MAX_ATTEMPTS = 5
+# Outlasts one claimed batch (batch_size requests over `workers` threads)
+REFUND_CLAIM_LEASE = timedelta(minutes=15)
+
+
+def refund_receipt(booking_id):
+    """Idempotency key for a booking's cancellation refund (max 40 chars)."""
+    return f"evcancel-{booking_id}"
+
+
+def live_refunds_enabled():
+    """Test-mode keys skip the gateway, same as `cancel_tickets`."""
+    return not (settings.RAZORPAY_KEY_ID or "").startswith("rzp_test")
+
+
+def cancel_event(event):
+    """
+    Cancel `event` and queue refunds for its paid bookings.
+    Safe to call twice: the second call finds nothing left to cancel.
+    """
+    with transaction.atomic():
+        Event.objects.filter(pk=event.pk, canceled_at__isnull=True).update(
+            canceled_at=timezone.now(), registrations_count=0, tickets_sold=0,
+            sales_this_window=0, sales_prev_window=0,
+        )
+
+        # 🔓 Free every seat of the event in one UPDATE
+        seats_released = Seat.objects.filter(event=event, booking__isnull=False).update(booking=None, admitted_at=None, checkin_batch="")
+
+        bookings = Booking.objects.filter(event=event)
+        # The UPDATEs below skip Booking.save(): count what they cancel for the daily stats
+        canceling = bookings.filter(payment_status="paid").aggregate(
+            bookings=Count("id"), tickets=Sum(F("tickets_booked") - F("canceled_tickets")),
+        )
+        refunds_queued = (
+            bookings.filter(payment_status="paid", razorpay_payment_id__isnull=False)
+            .exclude(razorpay_payment_id="")
+            .update(
+                payment_status="canceled",
+                canceled_tickets=F("tickets_booked"),
+                refund_status="pending",
+                refund_attempts=0,
+            )
+        )
+        # Token-only / unpaid bookings: nothing to refund through Razorpay
+        canceled = bookings.filter(payment_status__in=["paid", "pending"]).update(
+            payment_status="canceled",
+            canceled_tickets=F("tickets_booked"),
+        )
+        transaction.on_commit(lambda: record_stats(
+            event.pk, bookings_canceled=canceling["bookings"], tickets_canceled=canceling["tickets"],
+        ))
+
+    event.refresh_from_db(fields=["canceled_at", "registrations_count"])
+    return {
+        "refunds_queued": refunds_queued,
+        "canceled": refunds_queued + canceled,
+        "seats_released": seats_released,
+    }
+
+
+def _refund_one(client, row, live):
+    """Refund one booking. Runs in a worker thread → no ORM access here."""
+    receipt = refund_receipt(row["id"])
+    amount = Decimal(row["amount_to_pay"]) - Decimal(row["refund_amount"] or 0)
+    if amount <= 0 or not live:
+        return row, "refunded", None, max(amount, Decimal("0.00"))
+
+    payment_id = row["razorpay_payment_id"]
+    try:
+        if row["refund_attempts"] > 0:
+            # Retried (the last call failed or timed out) or resumed after a
+            # crash: the previous request may have gone through anyway
+            existing = client.payment.fetch_multiple_refund(payment_id)
+            for refund in existing.get("items", []):
+                if refund.get("receipt") == receipt:
+                    return row, "refunded", refund["id"], amount
+
+        refund = client.payment.refund(payment_id, {
+            "amount": int(amount * 100),
+            "speed": "optimum",
+            "receipt": receipt,
+            "notes": {"reason": "late_payment" if row["paid_late"] else "event_canceled",
+                      "booking_id": str(row["id"])},
+        })
+        return row, "refunded", refund["id"], amount
+    except Exception as e:
+        return row, "failed", str(e), amount
+
+
+def process_refunds(event_id=None, workers=8, batch_size=200, log=None):
+    """
+    Send queued cancellation refunds. Returns {"refunded", "retry", "failed"}.
+    `log` is an optional callable for per-booking error lines.
+    """
+    queue = Booking.objects.filter(
+        Q(event__canceled_at__isnull=False) | Q(paid_late=True),
+        refund_attempts__lt=REFUND_MAX_ATTEMPTS,
+    )
+    if event_id:
+        queue = queue.filter(event_id=event_id)
+
+    client = get_razorpay_client()
+    live = live_refunds_enabled()
+    totals = {"refunded": 0, "retry": 0, "failed": 0}
+    last_id = 0
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        while True:
+            with transaction.atomic():
+                now = timezone.now()
+                # Pending rows, plus in-flight ones whose claim has expired
+                claimable = Q(refund_status="pending") | (
+                    Q(refund_status="processing")
+                    & (Q(refund_claimed_at__isnull=True) | Q(refund_claimed_at__lt=now - REFUND_CLAIM_LEASE))
+                )
+                rows = list(
+                    queue.filter(claimable)
+                    .select_for_update(skip_locked=True)
+                    .filter(id__gt=last_id)
+                    .order_by("id")
+                    .values("id", "event_id", "razorpay_payment_id", "amount_to_pay",
+                            "refund_amount", "refund_status", "refund_attempts",
+                            "razorpay_refund_id", "paid_late")[:batch_size]
+                )
+                if not rows:
+                    break
+                last_id = rows[-1]["id"]
+                # Claim the batch before any request leaves the building
+                Booking.objects.filter(id__in=[r["id"] for r in rows]).update(
+                    refund_status="processing", refund_claimed_at=now,
+                    refund_attempts=F("refund_attempts") + 1,
+                )
+
+            updates, refunded = [], defaultdict(lambda: [0, Decimal("0")])
+            for row, status, detail, amount in pool.map(lambda r: _refund_one(client, r, live), rows):
+                booking = Booking(id=row["id"])
+                booking.refund_attempts = row["refund_attempts"] + 1
+                booking.razorpay_refund_id = row["razorpay_refund_id"]
+                booking.refund_amount = row["refund_amount"]
+                if status == "refunded":
+                    booking.refund_status = "refunded"
+                    booking.razorpay_refund_id = detail or row["razorpay_refund_id"]
+                    booking.refund_amount = (row["refund_amount"] or 0) + amount
+                    totals["refunded"] += 1
+                    if amount and not row["paid_late"]:
+                        # `refunds` counts bookings: not one already refunded in part
+                        refunded[row["event_id"]][0] += 0 if row["refund_amount"] else 1
+                        refunded[row["event_id"]][1] += amount
+                elif booking.refund_attempts < REFUND_MAX_ATTEMPTS:
+                    booking.refund_status = "pending"  # retried on the next run
+                    totals["retry"] += 1
+                else:
+                    booking.refund_status = "failed"
+                    totals["failed"] += 1
+                if status == "failed" and log:
+                    log(f"❌ Booking {row['id']}: {detail}")
+                updates.append(booking)
+
+            Booking.objects.bulk_update(
+                updates,
+                ["refund_status", "razorpay_refund_id", "refund_amount", "refund_attempts",
+                 "refund_claimed_at"],
+            )
+            for event_id, (count, amount) in refunded.items():
+                record_stats(event_id, refunds=count, refunded_amount=amount)
+
+    return totals
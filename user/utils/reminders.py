@@ -0,0 +1,113 @@
+"""
+Saved-event reminders.
+
+save_event() stores one EventReminder per reminder day instead of starting
+a threading.Timer in the web worker, so reminders survive restarts.
+`send_event_reminders` picks up due rows through a partial index on unsent
+reminders and moves them into the email and SMS outboxes, grouped per event.
+"""
+from datetime import datetime, time, timedelta
+
+from django.db import transaction
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from ..models import EventReminder, OutboundEmail, OutboundSMS
+from .mail import banner_attachment, build_email
+from .sms import build_sms
+
+REMINDER_DAYS = (10, 5, 1)      # days before the registration deadline
+REMINDER_TIME = time(9, 0)      # local time the reminder goes out
+
+
+def schedule_reminders(user, event):
+    """
+    Create (or re-time) `user`'s reminders for `event`. Saving the same
+    event again updates the existing rows instead of adding duplicates.
+    """
+    if not event.registration_deadline:
+        return 0
+
+    now = timezone.now()
+    reminders = []
+    for days_before in REMINDER_DAYS:
+        reminder_date = event.registration_deadline - timedelta(days=days_before)
+        send_at = timezone.make_aware(
+            datetime.combine(reminder_date, REMINDER_TIME), timezone.get_default_timezone()
+        )
+        if send_at > now:
+            reminders.append(EventReminder(
+                user=user, event=event, days_before=days_before, send_at=send_at,
+            ))
+
+    EventReminder.objects.bulk_create(
+        reminders,
+        update_conflicts=True,
+        unique_fields=["user", "event", "days_before"],
+        update_fields=["send_at"],
+    )
+    return len(reminders)
+
+
+def cancel_reminders(user, event):
+    """Drop `user`'s pending reminders for `event` (e.g. event unsaved)."""
+    return EventReminder.objects.filter(user=user, event=event, sent_at__isnull=True).delete()[0]
+
+
+def queue_due_reminders(batch_size=500, now=None):
+    """
+    Move up to `batch_size` due reminders into the email and SMS outboxes. Returns the number
+    of reminders handled (0 when nothing is due).
+    """
+    now = now or timezone.now()
+    with transaction.atomic():
+        due = list(
+            EventReminder.objects.select_for_update(skip_locked=True)
+            .filter(sent_at__isnull=True, send_at__lte=now)
+            .order_by("event_id", "id")
+            .values_list("id", flat=True)[:batch_size]
+        )
+        if not due:
+            return 0
+
+        reminders = (
+            EventReminder.objects.filter(id__in=due)
+            .select_related("user__customer", "event")
+            .order_by("event_id", "id")
+        )
+        emails, texts = [], []
+        current_event, banner, text = None, [], ""
+        for reminder in reminders:
+            event = reminder.event
+            if event.id != current_event:
+                # Per event: one banner attachment spec shared by all its reminders
+                current_event = event.id
+                banner = banner_attachment(event)
+                # Same text for every recipient → bulk-sent by `send_queued_sms`
+                text = (f"EventHub reminder: registration for {event.title} closes on "
+                        f"{event.registration_deadline or event.date:%d %b %Y}.")
+
+            if event.is_canceled:
+                continue
+            customer = getattr(reminder.user, "customer", None)
+            if customer and customer.phone:
+                texts.extend(build_sms("reminder", customer.phone, text, send_at=now))
+            if not reminder.user.email:
+                continue
+            emails.append(build_email(
+                "reminder",
+                f"⏰ Reminder: Event '{event.title}'",
+                reminder.user.email,
+                html=render_to_string("emails/saved_event_email.html", {
+                    "user": reminder.user,
+                    "event": event,
+                    "banner_cid": "banner.jpg",
+                }),
+                attachments=banner,
+                send_at=now,
+            ))
+
+        OutboundEmail.objects.bulk_create(emails, batch_size=500)
+        OutboundSMS.objects.bulk_create(texts, batch_size=500)
+        EventReminder.objects.filter(id__in=due).update(sent_at=now)
+    return len(due)
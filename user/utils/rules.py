@@ -0,0 +1,122 @@
+"""
+Event sales counters and threshold rules.
+
+Every change in an event's paid tickets goes through record_sales(), which
+updates incremental counters on the Event row (no COUNT queries) and then
+evaluates each rule in RULES against them in O(1). A rule fires its site
+notification once per event: fired rule names are kept in
+Event.fired_rules, written under the same row lock as the counters.
+
+Booking.save() feeds it through the post_init/post_save hooks in signals.py;
+bulk paths (reconciliation, event cancellation) call it directly.
+
+"Sold in the last hour" is a sliding-window estimate from two hourly
+buckets: this hour's sales plus the previous hour's, weighted by how much of
+it still falls inside the last 60 minutes.
+"""
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from ..models import Event, SiteNotification
+
+WINDOW = timedelta(hours=1)
+POPULAR_PERCENT = 50        # "X% sold"
+SELLING_FAST_PER_HOUR = 20  # "N sold in the last hour"
+LAST_SEATS = 10             # "last N seats"
+
+COUNTER_FIELDS = [
+    "registrations_count", "tickets_sold", "sales_window_start",
+    "sales_this_window", "sales_prev_window", "fired_rules",
+]
+
+
+class Counters:
+    """Read-only view of an event's counters that rules are tested against."""
+
+    def __init__(self, event, now):
+        self.title = event.title
+        self.capacity = event.capacity
+        self.sold = event.tickets_sold
+        self.remaining = max(0, event.capacity - event.tickets_sold)
+        elapsed = (now - event.sales_window_start) / WINDOW if event.sales_window_start else 1
+        self.sold_last_hour = round(
+            event.sales_this_window + event.sales_prev_window * max(0.0, 1 - elapsed)
+        )
+
+
+class Rule:
+    def __init__(self, name, notification_type, title, message, test):
+        self.name = name
+        self.notification_type = notification_type
+        self.title = title
+        self.message = message
+        self.test = test
+
+    def notification(self, event, counters):
+        return SiteNotification(
+            event=event,
+            notification_type=self.notification_type,
+            title=self.title,
+            message=self.message.format(c=counters),
+        )
+
+
+RULES = (
+    Rule("popular", "popular_event", "🔥 Popular Event",
+         "{c.title} is filling fast! Limited seats remaining.",
+         lambda c: c.capacity > 0 and c.sold * 100 >= c.capacity * POPULAR_PERCENT),
+    Rule("selling_fast", "selling_fast", "⚡ Selling Fast",
+         "{c.sold_last_hour} tickets for {c.title} sold in the last hour.",
+         lambda c: c.sold_last_hour >= SELLING_FAST_PER_HOUR),
+    Rule("last_seats", "last_seats", "⏳ Last Seats",
+         "Only {c.remaining} seats left for {c.title}. Book now!",
+         lambda c: 0 < c.remaining <= LAST_SEATS),
+)
+
+
+def _roll_window(event, now):
+    start = event.sales_window_start
+    if start is None or now >= start + 2 * WINDOW:
+        event.sales_window_start = now
+        event.sales_prev_window = event.sales_this_window = 0
+    elif now >= start + WINDOW:
+        event.sales_window_start = start + WINDOW
+        event.sales_prev_window, event.sales_this_window = event.sales_this_window, 0
+
+
+def record_sales(event_id, tickets=0, bookings=0, now=None):
+    """
+    Apply a change of `tickets` paid tickets and `bookings` paid bookings
+    (negative for cancellations) to the event's counters, and create the
+    notifications for rules it newly meets. Returns the fired rule names.
+    """
+    if not tickets and not bookings:
+        return []
+    now = now or timezone.now()
+
+    with transaction.atomic():
+        event = (
+            Event.objects.select_for_update()
+            .only("title", "capacity", "canceled_at", *COUNTER_FIELDS)
+            .get(pk=event_id)
+        )
+        _roll_window(event, now)
+        event.tickets_sold = max(0, event.tickets_sold + tickets)
+        event.registrations_count = max(0, event.registrations_count + bookings)
+        if tickets > 0:
+            event.sales_this_window += tickets
+
+        fired = []
+        if not event.is_canceled:
+            counters = Counters(event, now)
+            fired = [r for r in RULES if r.name not in event.fired_rules and r.test(counters)]
+            event.fired_rules = [*event.fired_rules, *(r.name for r in fired)]
+        event.save(update_fields=COUNTER_FIELDS)
+
+        # .save() (not bulk_create) so new notifications are pushed to open streams
+        for rule in fired:
+            rule.notification(event, counters).save()
+    return [r.name for r in fired]
+
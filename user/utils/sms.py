@@ -1,27 +1,207 @@
-import requests
+"""
+Outbound SMS through Fast2SMS.
+
+Views call queue_sms(), which only inserts OutboundSMS rows. `send_queued_sms`
+claims due rows, groups identical messages and sends each group in as few
+gateway requests as possible using the comma-separated `numbers` field. All
+requests go through one process-wide client holding a pooled requests.Session
+and a rate limiter; failures are retried with the email outbox's backoff.
+"""
+import re
+import threading
+from collections import defaultdict
+
 from django.conf import settings
-import requests
-
-def send_test_sms(phone_number, message):
-    url = "https://www.fast2sms.com/dev/bulkV2"
-
-    payload = {
-        'sender_id': 'FSTSMS',
-        'message': message,
-        'language': 'english',
-        'route': 'q',  # 'q' is promotional (no DLT needed)
-        'numbers': phone_number,
-    }
-
-    headers = {
-        'authorization': settings.FAST2SMS_API_KEY,
-        'Content-Type': "application/x-www-form-urlencoded",
-        'Cache-Control': "no-cache"
-    }
-    response = requests.post(url, data=payload, headers=headers)
-    print("Fast2SMS raw response:", response.text)  #
-
-    print(f"Sending SMS to {phone_number}: {message}")
-
-    response = requests.post(url, data=payload, headers=headers)
-    return response.json() # ✅ correct
+from django.core.signals import setting_changed
+from django.db import transaction
+from django.dispatch import receiver
+from django.utils import timezone
+from requests import RequestException, Session
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from ..models import OutboundSMS
+from .mail import CLAIM_LEASE, MAX_ATTEMPTS, backoff
+from .ratelimit import RateLimiter
+
+NUMBERS_PER_REQUEST = 100   # gateway limit on `numbers` per request
+POOL_SIZE = 8
+
+_client = None
+_client_lock = threading.Lock()
+
+
+class SMSError(Exception):
+    """A gateway request that failed; `permanent` ones are not retried."""
+
+    def __init__(self, message, permanent=False):
+        super().__init__(message)
+        self.permanent = permanent
+
+
+def normalize_number(raw):
+    """10-digit Indian mobile number from user input, or "" if it is not one."""
+    digits = re.sub(r"\D", "", raw or "")
+    if len(digits) == 12 and digits.startswith("91"):
+        digits = digits[2:]
+    elif len(digits) == 11 and digits.startswith("0"):
+        digits = digits[1:]
+    return digits if re.fullmatch(r"[6-9]\d{9}", digits) else ""
+
+
+# ---------- enqueue ----------
+def build_sms(kind, phones, message, send_at=None):
+    """Unsaved OutboundSMS rows (one per valid number), for bulk_create."""
+    if isinstance(phones, str):
+        phones = [phones]
+    numbers = dict.fromkeys(filter(None, map(normalize_number, phones)))
+    return [
+        OutboundSMS(kind=kind, phone=number, message=message,
+                    next_attempt_at=send_at or timezone.now())
+        for number in numbers
+    ]
+
+
+def queue_sms(kind, phones, message, send_at=None):
+    """Add an SMS to the outbox for each valid number. Returns the rows."""
+    return OutboundSMS.objects.bulk_create(build_sms(kind, phones, message, send_at))
+
+
+# ---------- gateway client ----------
+class Fast2SMSClient:
+    """Bulk sends over a pooled session; connect errors are retried by urllib3."""
+
+    def __init__(self, api_key, base_url, route="q", rate=5.0, timeout=10):
+        self.api_key = api_key or ""
+        self.url = f"{base_url.rstrip('/')}/dev/bulkV2"
+        self.route = route
+        self.timeout = timeout
+        self.limiter = RateLimiter(rate)
+        self.session = Session()
+        adapter = HTTPAdapter(
+            pool_connections=POOL_SIZE,
+            pool_maxsize=POOL_SIZE,
+            # Only retry failures where the request never reached the gateway
+            max_retries=Retry(total=3, connect=3, read=0, status=0, backoff_factor=0.5),
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def send(self, numbers, message):
+        """Send `message` to up to NUMBERS_PER_REQUEST numbers. Returns the request_id."""
+        self.limiter.wait()
+        try:
+            response = self.session.post(
+                self.url,
+                data={
+                    "route": self.route,
+                    "message": message,
+                    "language": "english",
+                    "numbers": ",".join(numbers),
+                },
+                headers={"authorization": self.api_key, "Cache-Control": "no-cache"},
+                timeout=self.timeout,
+            )
+        except RequestException as e:
+            raise SMSError(f"{type(e).__name__}: {e}") from e
+
+        try:
+            data = response.json()
+        except ValueError:
+            data = {}
+        if response.ok and data.get("return"):
+            return str(data.get("request_id", ""))
+
+        error = data.get("message") or response.reason
+        status = response.status_code
+        permanent = 400 <= status < 500 and status != 429
+        raise SMSError(f"HTTP {status}: {error}", permanent=permanent)
+
+
+def get_client():
+    """Return the process-wide gateway client, creating it on first use."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = Fast2SMSClient(
+                    settings.FAST2SMS_API_KEY,
+                    settings.FAST2SMS_BASE_URL,
+                    route=settings.FAST2SMS_ROUTE,
+                    rate=settings.SMS_RATE_PER_SECOND,
+                )
+    return _client
+
+
+@receiver(setting_changed)
+def _reset_client(setting, **kwargs):
+    global _client
+    if setting.startswith("FAST2SMS_") or setting == "SMS_RATE_PER_SECOND":
+        _client = None
+
+
+def send_sms(phones, message):
+    """Send right away, bypassing the outbox (admin tools, smoke tests)."""
+    numbers = list(dict.fromkeys(filter(None, map(normalize_number, phones))))
+    client = get_client()
+    return [
+        client.send(numbers[i:i + NUMBERS_PER_REQUEST], message)
+        for i in range(0, len(numbers), NUMBERS_PER_REQUEST)
+    ]
+
+
+# ---------- delivery ----------
+def claim_batch(batch_size):
+    """Lock and lease up to `batch_size` due messages, oldest first."""
+    now = timezone.now()
+    with transaction.atomic():
+        rows = list(
+            OutboundSMS.objects.select_for_update(skip_locked=True)
+            .filter(status="queued", next_attempt_at__lte=now)
+            .order_by("next_attempt_at", "id")[:batch_size]
+        )
+        if rows:
+            OutboundSMS.objects.filter(id__in=[r.id for r in rows]).update(
+                next_attempt_at=now + CLAIM_LEASE
+            )
+    return rows
+
+
+def deliver(rows, client, max_attempts=MAX_ATTEMPTS, per_request=NUMBERS_PER_REQUEST):
+    """
+    Send claimed rows, one gateway request per group of identical messages
+    (up to `per_request` numbers each), and record the outcome of every row
+    with one bulk UPDATE. Returns the number of gateway requests made.
+    """
+    groups = defaultdict(list)
+    for row in rows:
+        groups[row.message].append(row)
+
+    requests_made = 0
+    for message, group in groups.items():
+        for i in range(0, len(group), per_request):
+            chunk = group[i:i + per_request]
+            requests_made += 1
+            try:
+                request_id = client.send([row.phone for row in chunk], message)
+            except SMSError as e:
+                for row in chunk:
+                    row.attempts += 1
+                    row.last_error = str(e)[:1000]
+                    if e.permanent or row.attempts >= max_attempts:
+                        row.status = "failed"
+                    else:
+                        row.next_attempt_at = timezone.now() + backoff(row.attempts)
+            else:
+                sent_at = timezone.now()
+                for row in chunk:
+                    row.attempts += 1
+                    row.status = "sent"
+                    row.sent_at = sent_at
+                    row.request_id = request_id
+                    row.last_error = ""
+
+    OutboundSMS.objects.bulk_update(
+        rows, ["status", "attempts", "next_attempt_at", "last_error", "request_id", "sent_at"]
+    )
+    return requests_made
@@ -0,0 +1,107 @@
+"""
+Local Fast2SMS stand-in for tests and offline development.
+
+Implements the one endpoint EventHub uses:
+
+  POST /dev/bulkV2      form fields route, message, language, numbers
+                        (comma-separated); `authorization` header
+
+Each accepted request is kept in memory as (request_id, numbers, message).
+With `fail_every=N`, every Nth request answers 500 so retry paths can be
+exercised.
+"""
+import json
+import threading
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+
+class Fast2SMSStub:
+    """In-memory SMS gateway served over HTTP on a background thread."""
+
+    def __init__(self, api_key="", host="127.0.0.1", port=0, fail_every=0):
+        self.api_key = api_key
+        self.fail_every = fail_every
+        self.requests = []  # (request_id, [numbers], message)
+        self.received = 0
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host, port), self._handler_class())
+        self.server.daemon_threads = True
+        self.thread = None
+
+    # ---------- lifecycle ----------
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def messages(self):
+        """(number, message) for every SMS accepted so far."""
+        with self.lock:
+            return [(n, msg) for _, numbers, msg in self.requests for n in numbers]
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # ---------- gateway behaviour ----------
+    def bulk(self, authorization, form):
+        """(HTTP status, JSON body) for one bulkV2 request."""
+        if self.api_key and authorization != self.api_key:
+            return 401, {"return": False, "status_code": 412,
+                         "message": "Invalid Authentication, Check Authorization Key"}
+
+        message = form.get("message", "")
+        numbers = [n.strip() for n in form.get("numbers", "").split(",") if n.strip()]
+        if not message or not numbers:
+            return 400, {"return": False, "status_code": 400,
+                         "message": "Message and numbers are required"}
+
+        with self.lock:
+            self.received += 1
+            if self.fail_every and self.received % self.fail_every == 0:
+                return 500, {"return": False, "status_code": 500, "message": "Internal error"}
+            request_id = uuid.uuid4().hex[:16]
+            self.requests.append((request_id, numbers, message))
+        return 200, {"return": True, "request_id": request_id, "message": ["SMS sent successfully."]}
+
+    # ---------- HTTP plumbing ----------
+    def _handler_class(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status, data):
+                body = json.dumps(data).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                raw = self.rfile.read(length).decode() if length else ""
+                if self.path.split("?")[0].rstrip("/") != "/dev/bulkV2":
+                    return self._send(404, {"return": False, "status_code": 404, "message": "Not found"})
+                form = {k: v[-1] for k, v in parse_qs(raw).items()}
+                self._send(*stub.bulk(self.headers.get("authorization", ""), form))
+
+        return Handler
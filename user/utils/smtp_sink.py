@@ -0,0 +1,107 @@
+"""
+Local SMTP sink for tests and offline development.
+
+Accepts every message (EHLO/HELO, MAIL, RCPT, DATA, RSET, NOOP, QUIT) and
+keeps it in memory; with `out_dir`, each message is also written there as
+an .eml file. Point EMAIL_HOST / EMAIL_PORT at it with EMAIL_USE_TLS off.
+"""
+import socketserver
+import threading
+import time
+from pathlib import Path
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        sink = self.server.sink
+        self.reply("220 eventhub-smtp-sink ready")
+        mail_from, rcpt_to = None, []
+
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode("utf-8", "replace").strip()
+            verb = command[:4].upper()
+
+            if verb == "EHLO":
+                self.reply("250-eventhub-smtp-sink")
+                self.reply("250-8BITMIME")
+                self.reply("250 SIZE 52428800")
+            elif verb == "HELO":
+                self.reply("250 eventhub-smtp-sink")
+            elif verb == "MAIL":
+                mail_from, rcpt_to = command[10:].strip(" <>"), []
+                self.reply("250 OK")
+            elif verb == "RCPT":
+                rcpt_to.append(command[8:].strip(" <>"))
+                self.reply("250 OK")
+            elif verb == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                data = []
+                while True:
+                    chunk = self.rfile.readline()
+                    if not chunk or chunk in (b".\r\n", b".\n"):
+                        break
+                    data.append(chunk[1:] if chunk.startswith(b"..") else chunk)
+                sink.store(mail_from, rcpt_to, b"".join(data))
+                mail_from, rcpt_to = None, []
+                self.reply("250 OK: queued")
+            elif verb == "RSET":
+                mail_from, rcpt_to = None, []
+                self.reply("250 OK")
+            elif verb == "NOOP":
+                self.reply("250 OK")
+            elif verb == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("502 Command not implemented")
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+class SMTPSink:
+    """Collects messages sent to it; runs on a background thread."""
+
+    def __init__(self, host="127.0.0.1", port=0, out_dir=None):
+        self.messages = []  # (mail_from, rcpt_to, raw bytes)
+        self.out_dir = Path(out_dir) if out_dir else None
+        if self.out_dir:
+            self.out_dir.mkdir(parents=True, exist_ok=True)
+        self.lock = threading.Lock()
+        self.server = _Server((host, port), _SMTPHandler)
+        self.server.sink = self
+        self.thread = None
+
+    @property
+    def address(self):
+        return self.server.server_address[:2]
+
+    def store(self, mail_from, rcpt_to, raw):
+        with self.lock:
+            self.messages.append((mail_from, list(rcpt_to), raw))
+            count = len(self.messages)
+        if self.out_dir:
+            (self.out_dir / f"{time.time_ns()}-{count}.eml").write_bytes(raw)
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,188 @@
+"""
+Per-event daily booking stats (EventDailyStats).
+
+Dashboards read these rollup rows instead of aggregating raw bookings. A row
+is never recomputed on the hot path: record_stats() adds deltas to today's
+row with one conditional UPDATE (F() increments), creating it on first use.
+
+Deltas come from:
+
+* Booking.save(): the post_init/post_save hooks in signals.py compare the
+  booking before and after (booking_deltas());
+* set-based paths that bypass save() (reconciliation, event cancellation,
+  the refund worker, check-in UPDATEs) call record_stats() themselves.
+
+Figures are gross and never decremented: current paid tickets are
+tickets_sold - tickets_canceled, net revenue is revenue - refunded_amount
+(see TOTALS). `refunds` counts bookings refunded at all, not refund
+payouts: a booking refunded for a partial cancellation and again when its
+event is canceled counts once, which is all rebuild() can see. `rebuild_event_stats` recomputes the rows from bookings.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, DecimalField, F, IntegerField, Q, Sum, Value
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from ..models import Booking, EventDailyStats
+
+STAT_FIELDS = (
+    "bookings", "bookings_canceled", "tickets_sold", "tickets_canceled",
+    "revenue", "refunds", "refunded_amount", "admissions",
+)
+
+
+def totals(prefix=""):
+    """
+    Current figures over any set of rollup rows, 0 where there are none.
+    `prefix` reaches the rows through a relation, e.g. "daily_stats__" to
+    annotate Event rows (a LEFT JOIN, so events without sales still count).
+    """
+    def total(field, minus=None, output_field=IntegerField()):
+        figure = Sum(prefix + field)
+        if minus:
+            figure = figure - Sum(prefix + minus)
+        return Coalesce(figure, Value(0), output_field=output_field)
+
+    money = DecimalField(max_digits=12, decimal_places=2)
+    return {
+        "paid_bookings": total("bookings", "bookings_canceled"),
+        "tickets": total("tickets_sold", "tickets_canceled"),
+        "tickets_canceled": total("tickets_canceled"),
+        "net_revenue": total("revenue", "refunded_amount", output_field=money),
+        "admissions": total("admissions"),
+    }
+
+
+TOTALS = totals()
+
+# booking_state() of a booking that hasn't been saved yet
+UNSAVED = ("", 0, 0, Decimal("0"), Decimal("0"), False)
+
+# Bookings that were paid at some point. Canceled ones have no "was paid"
+# flag: a gateway payment id or a zero amount (paid in tokens) stands in,
+# unless the payment only arrived after the cancellation (paid_late).
+WAS_PAID = Q(payment_status="paid") | (
+    Q(payment_status="canceled", paid_late=False)
+    & (Q(razorpay_payment_id__gt="") | Q(amount_to_pay=0))
+)
+
+
+def record_stats(event_id, day=None, **deltas):
+    """Add `deltas` (STAT_FIELDS -> amount) to the event's row for `day` (today)."""
+    deltas = {field: value for field, value in deltas.items() if value}
+    if not deltas:
+        return
+    day = day or timezone.localdate()
+    row = EventDailyStats.objects.filter(event_id=event_id, day=day)
+    increments = {field: F(field) + value for field, value in deltas.items()}
+
+    if not row.update(**increments):
+        try:
+            with transaction.atomic():
+                EventDailyStats.objects.create(event_id=event_id, day=day, **deltas)
+        except IntegrityError:  # another process created today's row first
+            row.update(**increments)
+
+    if set(deltas) - {"admissions"}:
+        # Sales figures changed: the admin dashboard snapshot is stale
+        from .dashboard import invalidate_snapshot  # dashboard imports this module
+        invalidate_snapshot()
+
+
+def booking_state(booking):
+    """What the stats depend on, or None if any of it isn't loaded."""
+    fields = {"payment_status", "tickets_booked", "canceled_tickets", "total_price", "refund_amount", "attended"}
+    if fields & booking.get_deferred_fields():
+        return None
+    return (booking.payment_status, booking.tickets_booked, booking.canceled_tickets,
+            booking.total_price, booking.refund_amount or Decimal("0"), booking.attended)
+
+
+def booking_deltas(before, after):
+    """Stat deltas for a booking going from state `before` to `after`."""
+    status, booked, canceled, price, refunded, attended = after
+    was_paid = before[0] == "paid"
+    deltas = defaultdict(int)
+
+    if status == "paid" and not was_paid:
+        deltas["bookings"] += 1
+        deltas["tickets_sold"] += booked
+        deltas["revenue"] += price
+        deltas["tickets_canceled"] += canceled
+    elif was_paid:
+        deltas["tickets_canceled"] += max(0, canceled - before[2])
+        if status == "canceled":
+            deltas["bookings_canceled"] += 1
+
+    if refunded > before[4]:
+        if not before[4]:
+            deltas["refunds"] += 1  # first refund of this booking
+        deltas["refunded_amount"] += refunded - before[4]
+    if attended and not before[5]:
+        deltas["admissions"] += 1
+    return dict(deltas)
+
+
+def rebuild(event_ids=None, batch_size=1000):
+    """
+    Recompute the rollup rows (of `event_ids`, or all events) from bookings.
+
+    Bookings don't record when they were canceled or refunded, so rebuilt
+    cancellations and refunds are counted on the booking's day; admissions
+    use attended_at.
+
+    Runs in one transaction that deletes the old rows before aggregating, so
+    a concurrent record_stats() either lands before the aggregate (and is
+    counted by it) or waits on the deleted rows and applies on top.
+    """
+    bookings = Booking.objects.all()
+    stats = EventDailyStats.objects.all()
+    if event_ids is not None:
+        bookings = bookings.filter(event_id__in=event_ids)
+        stats = stats.filter(event_id__in=event_ids)
+
+    with transaction.atomic():
+        stats.delete()
+
+        rows = defaultdict(dict)
+        sales = (
+            bookings.filter(WAS_PAID)
+            .annotate(day=TruncDate("booking_date"))
+            .values("event_id", "day")
+            .annotate(
+                bookings=Count("id"),
+                bookings_canceled=Count("id", filter=Q(payment_status="canceled")),
+                tickets_sold=Sum("tickets_booked"),
+                tickets_canceled=Sum("canceled_tickets"),
+                revenue=Sum("total_price"),
+                refunds=Count("id", filter=Q(refund_amount__gt=0)),
+                refunded_amount=Sum("refund_amount"),
+            )
+            .order_by()
+        )
+        for row in sales.iterator():
+            rows[row.pop("event_id"), row.pop("day")].update(row)
+
+        admissions = (
+            bookings.filter(attended=True)
+            .annotate(day=TruncDate(Coalesce("attended_at", "booking_date")))
+            .values("event_id", "day")
+            .annotate(admissions=Count("id"))
+            .order_by()
+        )
+        for row in admissions.iterator():
+            rows[row["event_id"], row["day"]]["admissions"] = row["admissions"]
+
+        objs = [
+            EventDailyStats(event_id=event_id, day=day,
+                            **{field: values.get(field) or 0 for field in STAT_FIELDS})
+            for (event_id, day), values in rows.items()
+        ]
+        EventDailyStats.objects.bulk_create(objs, batch_size=batch_size)
+
+    from .dashboard import invalidate_snapshot  # dashboard imports this module
+    invalidate_snapshot()
+    return len(objs)
@@ -0,0 +1,136 @@
+"""
+Compact signed ticket tokens.
+
+A ticket QR carries a short token instead of a bare booking id:
+
+    version | booking_id | event_id | first_seat | last_seat | expires  + HMAC
+
+packed into 29 bytes plus a 12-byte truncated HMAC-SHA256 keyed from
+SECRET_KEY, then base64url-encoded (~55 chars). Scanners can reject forged,
+expired or wrong-event tickets from the token alone; the database is only
+touched for the final attendance write.
+
+Tickets issued before tokens carry a bare booking id, which anyone can
+guess. They are only accepted until settings.LEGACY_TICKET_QR_UNTIL (an ISO
+date; unset = never), see legacy_codes_accepted().
+"""
+import base64
+import hmac
+import struct
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.crypto import salted_hmac
+
+TOKEN_VERSION = 1
+_LAYOUT = struct.Struct(">BQQIII")
+_MAC_BYTES = 12
+_SALT = "user.utils.tickets.ticket-token"
+
+# Tickets stay valid until this long after the event day ends
+VALID_AFTER_EVENT = timedelta(days=1)
+
+
+LEGACY_REJECTED = "❌ Old-style QR code: ask the customer for their current ticket."
+
+
+class InvalidTicket(Exception):
+    """Token is malformed, forged or expired (message is user-facing)."""
+
+
+def legacy_codes_accepted(today=None):
+    """True while bare-booking-id QR codes are still honoured."""
+    until = settings.LEGACY_TICKET_QR_UNTIL
+    if not until:
+        return False
+    return (today or timezone.localdate()) <= date.fromisoformat(str(until))
+
+
+class TicketClaims:
+    __slots__ = ("booking_id", "event_id", "first_seat", "last_seat", "expires")
+
+    def __init__(self, booking_id, event_id, first_seat, last_seat, expires):
+        self.booking_id = booking_id
+        self.event_id = event_id
+        self.first_seat = first_seat
+        self.last_seat = last_seat
+        self.expires = expires
+
+    @property
+    def seat_range(self):
+        if not self.first_seat:
+            return None
+        return (self.first_seat, self.last_seat)
+
+
+def _mac(data):
+    return salted_hmac(_SALT, data, algorithm="sha256").digest()[:_MAC_BYTES]
+
+
+def _b64encode(raw):
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def _b64decode(text):
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+def ticket_expiry(event):
+    """Unix timestamp after which the event's tickets are no longer accepted."""
+    end_of_day = datetime.combine(event.date, time.max, tzinfo=dt_timezone.utc)
+    return int((end_of_day + VALID_AFTER_EVENT).timestamp())
+
+
+def make_ticket_token(booking, seat_numbers=None):
+    """
+    Token for `booking`. Pass the booking's seat numbers when already loaded
+    to avoid a query. Deterministic, so cached QR images stay valid.
+    """
+    if seat_numbers is None:
+        seat_numbers = list(booking.seats.values_list("seat_no", flat=True))
+    first_seat = min(seat_numbers) if seat_numbers else 0
+    last_seat = max(seat_numbers) if seat_numbers else 0
+    return pack_ticket_token(
+        booking.id, booking.event_id, first_seat, last_seat, ticket_expiry(booking.event)
+    )
+
+
+def pack_ticket_token(booking_id, event_id, first_seat, last_seat, expires):
+    """make_ticket_token() from plain values, for bulk callers (no model instances)."""
+    data = _LAYOUT.pack(TOKEN_VERSION, booking_id, event_id, first_seat or 0, last_seat or 0, expires)
+    return _b64encode(data + _mac(data))
+
+
+def read_ticket_token(token, event_id=None, now=None):
+    """
+    Verify `token` and return its TicketClaims without touching the DB.
+    With `event_id`, tickets for any other event are rejected too.
+    """
+    try:
+        raw = _b64decode(token)
+    except (ValueError, TypeError):
+        raise InvalidTicket("❌ QR code is not valid.")
+    if len(raw) != _LAYOUT.size + _MAC_BYTES:
+        raise InvalidTicket("❌ QR code is not valid.")
+
+    data, mac = raw[:_LAYOUT.size], raw[_LAYOUT.size:]
+    if not hmac.compare_digest(_mac(data), mac):
+        raise InvalidTicket("❌ Forged or damaged ticket.")
+
+    version, booking_id, token_event_id, first_seat, last_seat, expires = _LAYOUT.unpack(data)
+    if version != TOKEN_VERSION:
+        raise InvalidTicket("❌ QR code is not valid.")
+
+    now = now if now is not None else datetime.now(dt_timezone.utc).timestamp()
+    if now > expires:
+        raise InvalidTicket("⚠️ This ticket has expired.")
+    if event_id is not None:
+        try:
+            event_id = int(event_id)
+        except (TypeError, ValueError):
+            raise InvalidTicket("❌ Unknown event.")
+        if event_id != token_event_id:
+            raise InvalidTicket("⚠️ This ticket is for a different event.")
+
+    return TicketClaims(booking_id, token_event_id, first_seat, last_seat, expires)
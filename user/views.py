@@ -5,8 +5,10 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
-from django.http import HttpResponse
+from django.http import FileResponse, Http404, HttpResponse, JsonResponse, StreamingHttpResponse
 from django.urls import reverse
+from django.core.handlers.asgi import ASGIRequest
+from asgiref.sync import sync_to_async
 from .models import Booking, Event, Review
 from .form import ReviewForm
 from django.conf import settings
@@ -15,12 +17,39 @@ from django.template.loader import render_to_string
 from django.core.mail import EmailMultiAlternatives, send_mail   # ✅ Emails
 from django.utils.timezone import now
 from urllib.parse import urlparse
+from collections import Counter
+from itertools import chain
+import asyncio
+import csv
+import logging
 import threading
+import time as time_module
+import uuid
 # Correct imports at the top of your views.py
 import datetime
 from datetime import datetime, timedelta, time
 from django.utils import timezone
 from django.core.files.storage import default_storage
+from .utils.refunds import cancel_event as cancel_event_and_queue_refunds
+from .utils.qr import load_qr, qr_data_uri, qr_png, qr_url, KEY_RE
+from .utils.mail import attachment as email_attachment, banner_attachment, queue_template_email
+from .utils.reminders import cancel_reminders, schedule_reminders
+from .utils.sms import queue_sms
+from .utils.stats import TOTALS as STATS_TOTALS, totals as stats_totals
+from .utils.broadcast import recipient_count as broadcast_recipient_count
+from .utils.live import (
+    KEEPALIVE_SECONDS as LIVE_KEEPALIVE_SECONDS, fetch_counters as fetch_live_counters, hub as live_counters,
+)
+from .utils.checkin import (
+    MAX_SCAN_BATCH, admit_booking, admit_seat, booking_id_from_code, manifest_chunks, sync_scans,
+)
+from .utils.pdf_tickets import (
+    RenderInProgress, build_event_tickets, event_logo_path, event_tickets_path,
+    render_tickets, ticket_payload,
+)
+from .utils.tickets import (
+    LEGACY_REJECTED, InvalidTicket, legacy_codes_accepted, make_ticket_token, read_ticket_token,
+)
 
 from razorpay.errors import BadRequestError
 
@@ -35,7 +64,7 @@ from .form import *       # ✅ Import all forms (UserForm, CustomerForm, Organi
 # 🔹 Database & ORM
 # ==============================
 from django.db import IntegrityError, transaction
-from django.db.models import Sum, Count, Q
+from django.db.models import F, Sum, Count, Q
 
 # ==============================
 # 🔹 External Libraries
@@ -44,7 +73,6 @@ import razorpay
 import hmac, hashlib, json
 import base64
 import random
-import qrcode
 from decimal import Decimal, ROUND_HALF_UP
 
 # ==============================
@@ -55,6 +83,7 @@ from email.mime.image import MIMEImage
 from django.core.mail import send_mail, EmailMessage
 from django.template.loader import render_to_string
 
+logger = logging.getLogger(__name__)
 
 
 
@@ -108,13 +137,11 @@ def register(request):
                     city='', state='', description=''
                 )
 
-           # ✅ Send Welcome Email
-            print("✅ Email sent successfully")
-            subject = "Welcome to EventHub 🎉"
-            html_content = render_to_string("emails/register_email.html", {"username": username})
-            msg = EmailMultiAlternatives(subject, "", to=[email])  # use different var name
-            msg.attach_alternative(html_content, "text/html")
-            msg.send(fail_silently=True)
+           # ✅ Queue Welcome Email (sent by `send_queued_emails`)
+            queue_template_email(
+                "register", "Welcome to EventHub 🎉",
+                "emails/register_email.html", {"username": username}, email,
+            )
 
 
 
@@ -143,15 +170,11 @@ def forgot_password(request):
             request.session["reset_email"] = email
             request.session["reset_otp"] = str(otp)
 
-            # Send OTP email
-            subject = "🔑 EventHub Password Reset OTP"
-            html_content = render_to_string("emails/otp_email.html", {
+            # Queue OTP email (highest outbox priority)
+            queue_template_email("otp", "🔑 EventHub Password Reset OTP", "emails/otp_email.html", {
                 "otp": otp,
                 "username": user.username,
-            })
-            msg = EmailMultiAlternatives(subject, "", to=[email])
-            msg.attach_alternative(html_content, "text/html")
-            msg.send(fail_silently=True)
+            }, email)
 
             messages.success(request, "✅ OTP sent to your email.")
             return redirect("verify_otp")
@@ -230,12 +253,11 @@ def login_user(request):
             if user is not None:
                 login(request, user)
 
-                # ✅ Send Welcome Email
-                subject = "Welcome to EventHub 🎉"
-                html_content = render_to_string("emails/login_email.html", {"username": user.username})
-                msg = EmailMultiAlternatives(subject, "", to=[user.email])
-                msg.attach_alternative(html_content, "text/html")
-                msg.send(fail_silently=True)
+                # ✅ Queue login notice (lowest outbox priority)
+                queue_template_email(
+                    "login", "Welcome to EventHub 🎉",
+                    "emails/login_email.html", {"username": user.username}, user.email,
+                )
 
                 # Redirect according to role
                 role = user.profile.role
@@ -408,19 +430,18 @@ def organizer_profile(request):
 
     # Calculate insights
     total_events = events.count()
-    # ✅ Count only PAID bookings across all events
-    total_registrations = Booking.objects.filter(
-        event__in=events,
-        payment_status="paid"
-    ).count()
- # ✅ Find most popular event based on paid bookings
+    # ✅ Count only PAID bookings across all events (from the daily stats rollup)
+    total_registrations = EventDailyStats.objects.filter(
+        event__organizer=organizer
+    ).aggregate(paid=STATS_TOTALS["paid_bookings"])["paid"] or 0
+    # ✅ Find most popular event based on paid bookings
     most_popular_event = (
-    events.annotate(
-        paid_count=Count("bookings", filter=Q(bookings__payment_status="paid"))
+        events.annotate(
+            paid_count=Sum("daily_stats__bookings") - Sum("daily_stats__bookings_canceled")
+        )
+        .order_by(F("paid_count").desc(nulls_last=True))
+        .first()
     )
-    .order_by("-paid_count")
-    .first()
-)
     context = {
         "organizer": organizer,
         "user": request.user,
@@ -529,6 +550,39 @@ def event_detail(request, event_id):
     })
 
 
+@login_required
+async def event_live_counters(request, event_id):
+    """Server-sent events: admitted / sold / remaining counts whenever they change."""
+    user = await request.auser()
+    if not await Event.objects.filter(id=event_id, organizer__user=user).aexists():
+        raise Http404("Event not found")
+
+    if not isinstance(request, ASGIRequest):
+        # No long-lived streams under WSGI: one snapshot, then EventSource retries
+        counters = await sync_to_async(fetch_live_counters)([event_id])
+        body = f"retry: 5000\nevent: counters\ndata: {json.dumps(counters.get(event_id, {}))}\n\n"
+        return HttpResponse(body, content_type="text/event-stream")
+
+    async def stream():
+        queue = live_counters.subscribe(event_id)
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                try:
+                    snapshot = await asyncio.wait_for(queue.get(), LIVE_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"event: counters\ndata: {json.dumps(snapshot)}\n\n"
+        finally:
+            live_counters.unsubscribe(event_id, queue)
+
+    response = StreamingHttpResponse(stream(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"  # don't let nginx buffer the stream
+    return response
+
+
 # ------------------------
 # Update Event View
 # ------------------------
@@ -605,6 +659,84 @@ def confirm_delete_event(request, event_id):
     return render(request, 'organizer_profile/confirm_event_delete.html', {'event': event})
 
 
+# ------------------------
+# Cancel Event (refund everyone)
+# ------------------------
+@login_required
+def cancel_event(request, event_id):
+    """
+    Cancels an event: all bookings are canceled, seats released and
+    refunds queued for the `process_refunds` worker.
+    """
+    event = get_object_or_404(Event, id=event_id)
+
+    if not hasattr(request.user, 'organizer') or event.organizer != request.user.organizer:
+        return redirect('not_authorized')
+
+    if event.is_canceled:
+        messages.info(request, "ℹ️ This event is already canceled.")
+        return redirect('event_detail', event_id=event.id)
+
+    if request.method == 'POST':
+        result = cancel_event_and_queue_refunds(event)
+        messages.success(
+            request,
+            f"✅ Event '{event.title}' canceled. {result['refunds_queued']} refunds queued.",
+        )
+        return redirect('event_detail', event_id=event.id)
+
+    paid_count = Booking.objects.filter(event=event, payment_status="paid").count()
+    return render(request, 'organizer_profile/confirm_event_cancel.html', {
+        'event': event,
+        'paid_count': paid_count,
+    })
+
+
+@login_required
+def event_broadcast(request, event_id):
+    """
+    Organizer emails every paid attendee of an event. The POST only queues
+    a Broadcast; `send_broadcasts` delivers it.
+    """
+    event = get_object_or_404(Event, id=event_id)
+
+    if not hasattr(request.user, 'organizer') or event.organizer != request.user.organizer:
+        return redirect('not_authorized')
+
+    if request.method == 'POST':
+        subject = request.POST.get("subject", "").strip()
+        message = request.POST.get("message", "").strip()
+        if not subject or not message:
+            messages.error(request, "⚠️ Subject and message are required.")
+            return redirect('event_broadcast', event_id=event.id)
+
+        Broadcast.objects.create(event=event, sender=request.user, subject=subject[:200], message=message)
+        messages.success(request, "✅ Your message is queued and will be sent to all attendees shortly.")
+        return redirect('event_broadcast', event_id=event.id)
+
+    return render(request, 'organizer_profile/event_broadcast.html', {
+        'event': event,
+        'recipient_count': broadcast_recipient_count(event),
+        'broadcasts': event.broadcasts.order_by('-created_at')[:20],
+    })
+
+
+@login_required
+def broadcast_progress(request, broadcast_id):
+    """Progress of a broadcast, polled by the broadcast page."""
+    broadcast = get_object_or_404(
+        Broadcast, id=broadcast_id, event__organizer__user=request.user
+    )
+    return JsonResponse({
+        "status": broadcast.status,
+        "status_display": broadcast.get_status_display(),
+        "total": broadcast.total,
+        "sent": broadcast.sent_count,
+        "failed": broadcast.failed_count,
+        "progress": broadcast.progress,
+    })
+
+
 # ------------------------
 # All Events (Customer Side)
 # ------------------------
@@ -720,32 +852,23 @@ def contact(request):
         message = request.POST.get("message")
 
         try:
-            # ✅ Send message to EventHub admin
-            admin_subject = f"New Contact Message from {name}"
-            admin_html = render_to_string("emails/contact_email.html", {
+            # ✅ Queue message to EventHub admin
+            queue_template_email("contact", f"New Contact Message from {name}", "emails/contact_email.html", {
                 "name": name,
                 "email": email,
                 "message": message,
-            })
-            admin_msg = EmailMultiAlternatives(admin_subject, "", settings.DEFAULT_FROM_EMAIL, ["eventhubmk@gmail.com"])
-            admin_msg.attach_alternative(admin_html, "text/html")
-            admin_msg.send(fail_silently=True)
-
-            # ✅ Auto reply to customer
-            user_subject = "Thanks for Contacting EventHub 💬"
-            user_html = render_to_string("emails/contact_reply.html", {
+            }, "eventhubmk@gmail.com")
+
+            # ✅ Queue auto reply to customer
+            queue_template_email("contact", "Thanks for Contacting EventHub 💬", "emails/contact_reply.html", {
                 "name": name,
                 "message": message,
-            })
-            user_msg = EmailMultiAlternatives(user_subject, "", settings.DEFAULT_FROM_EMAIL, [email])
-            user_msg.attach_alternative(user_html, "text/html")
-            user_msg.send(fail_silently=True)
+            }, email)
 
             messages.success(request, "✅ Your message has been sent successfully! Please check your email for confirmation.")
-            print("✅ Contact message and auto-reply sent successfully.")
 
-        except Exception as e:
-            print("❌ Email sending failed:", e)
+        except Exception:
+            logger.exception("Queueing contact email failed")
             messages.error(request, "⚠️ Failed to send your message. Please try again later.")
 
         return redirect("contact")
@@ -755,107 +878,17 @@ def contact(request):
 
 
 
-# Razorpay client
-client = razorpay.Client(auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET))
+# Razorpay client (shared, pooled) → get_razorpay_client()
+from .utils.payments import get_razorpay_client
 
 # ------------------------
 # Book Event & Create Payment Link
 # ------------------------
 
-# Token reward rate: 1 token per ₹50 spent
-HUB_TOKEN_RATE = Decimal('50.0')
-
-
 # ============================
 # Seat allocation helpers
 # ============================
 
-@transaction.atomic
-def assign_seats_for_booking(booking):
-    """
-    Allocate concrete seat numbers for this booking.
-
-    ✅ Works only for PAID bookings
-    ✅ If seats already assigned, do nothing
-    ✅ Tries to find ONE CONTINUOUS BLOCK of `required` seats
-
-    Example:
-      Free seats:  [9, 10, 21, 22, 23, 24, 25, 26, 27, 28, ...]
-      required=10
-
-      → Skips [9,10] (only 2 seats)
-      → Finds [21..30] (10 seats) and assigns those
-    """
-    from .models import Seat  # local import to avoid circulars
-
-    # Only for paid bookings
-    if booking.payment_status != "paid":
-        return
-
-    # prevent double assignment
-    if booking.seats.exists():
-        return
-
-    event = booking.event
-
-    # You already use this in your code:
-    # active_tickets = tickets_booked - canceled_tickets
-    required = booking.active_tickets
-
-    if required <= 0:
-        return
-
-    # lock free seats for this event
-    free_qs = (
-        Seat.objects
-        .select_for_update()
-        .filter(event=event, booking__isnull=True)
-        .order_by("seat_no")
-    )
-    free_seats = list(free_qs)
-
-    if len(free_seats) < required:
-        # safety guard – should not happen since we check capacity
-        raise ValueError("Not enough free seats to assign for this booking.")
-
-    # ---------------------------------------
-    # 1️⃣ Try to find ONE continuous block
-    # ---------------------------------------
-    n = len(free_seats)
-    best_start_idx = None
-    run_start_idx = 0
-    run_length = 1
-
-    for i in range(1, n):
-        if free_seats[i].seat_no == free_seats[i - 1].seat_no + 1:
-            # still consecutive
-            run_length += 1
-        else:
-            # gap here → close previous run
-            if run_length >= required:
-                best_start_idx = run_start_idx
-                break  # we found first big-enough block
-            # start new run from current index
-            run_start_idx = i
-            run_length = 1
-
-    # after loop, also check the last run
-    if best_start_idx is None and run_length >= required:
-        best_start_idx = n - run_length
-
-    if best_start_idx is not None:
-        # ✅ Assign one continuous block
-        chosen_seats = free_seats[best_start_idx: best_start_idx + required]
-    else:
-        # ---------------------------------------
-        # 2️⃣ Fallback: not enough continuous block
-        #    but enough total seats → just take first N
-        # ---------------------------------------
-        chosen_seats = free_seats[:required]
-
-    Seat.objects.filter(id__in=[s.id for s in chosen_seats]).update(booking=booking)
-
-
 @transaction.atomic
 def release_last_n_seats(booking, cancel_count):
     """
@@ -873,9 +906,11 @@ def release_last_n_seats(booking, cancel_count):
 
     to_release = seats[-cancel_count:]  # last N seats
     from .models import Seat
-    Seat.objects.filter(id__in=[s.id for s in to_release]).update(booking=None)
+    Seat.objects.filter(id__in=[s.id for s in to_release]).update(booking=None, admitted_at=None, checkin_batch="")
 
-import uuid
+from .utils.booking import (
+    BookingError, complete_payment, create_payment_link, place_booking,
+)
 
 @login_required
 def book_event(request, event_id):
@@ -940,86 +975,44 @@ def book_event(request, event_id):
 
             tokens_used = int(request.POST.get("hub_tokens_used", 0))
 
-            if booking.tickets_booked > event.available_seats:
-                messages.error(
-                    request, f"Only {event.available_seats} seats left."
-                )
+            # -----------------------------
+            # ✅ Validate, price, apply tokens and insert in ONE write
+            # -----------------------------
+            try:
+                booking = place_booking(booking, event, profile, tokens_used)
+            except BookingError as e:
+                messages.error(request, str(e))
                 return redirect("event_detail", event_id=event.id)
 
-            # First save: total_price auto-calculated in model
-            booking.save()
-
-            # 👉 default: no tokens used → final price = total_price
-            total_price_pay = booking.total_price
-
-            if not booking.order_id:
-                     booking.order_id = f"EVT-{uuid.uuid4().hex[:10].upper()}"
-                     booking.save()
-
-            # 🪙 Apply HUB tokens
-            if tokens_used > 0:
-                if tokens_used > available_tokens:
-                    messages.error(
-                        request,
-                        f"⚠️ You only have {available_tokens} HUB tokens.",
-                    )
-                    # Optional: undo booking if you don't want it pending
-                    # booking.delete()
-                    return redirect("event_detail", event_id=event.id)
-
-                discount_value = Decimal(tokens_used)
-                booking.hub_tokens_used = tokens_used
-                booking.total_price = max(
-                    booking.total_price - discount_value, 0
-                )
-                booking.amount_to_pay = booking.total_price
-                total_price_pay = booking.total_price  # final after discount
-
-                messages.info(
-                    request,
-                    f"🪙 {tokens_used} HUB tokens will be applied after successful payment.",
-                )
-            else:
-                booking.amount_to_pay = booking.total_price
-
-            booking.payment_status = "pending"
-            booking.save()
+            # 👉 final price after HUB token discount
+            total_price_pay = booking.amount_to_pay
 
-            # If amount is fully covered by tokens → mark as paid immediately
-            if booking.amount_to_pay == 0:
-                booking.payment_status = "paid"
-                booking.save()
-                if tokens_used > 0:
-                    profile.hub_tokens = max(
-                        profile.hub_tokens - tokens_used, 0
-                    )
-                    profile.save()
+            # If amount is fully covered by tokens → already marked as paid
+            if booking.payment_status == "paid":
+                try:
+                    booking, _, _ = complete_payment(booking)  # assigns its seats
+                except ValueError as e:
+                    messages.error(request, f"Seat allocation failed: {e}")
+                _send_ticket(request, booking)
                 messages.success(
                     request,
                     "🎟 Booking successful using HUB tokens!",
                 )
                 return redirect("payment_success")
 
+            if booking.hub_tokens_used > 0:
+                messages.info(
+                    request,
+                    f"🪙 {booking.hub_tokens_used} HUB tokens will be applied after successful payment.",
+                )
+
             # -----------------------------
             # ✅ Razorpay call with try/except
             # -----------------------------
             try:
-                payment_link = client.payment_link.create(
-                    {
-                        "amount": int(booking.amount_to_pay * 100),
-                        "currency": "INR",
-                        "description": f"Booking for {event.title}",
-                        "customer": {
-                            "name": booking.booking_name,
-                            "email": booking.customer_email,
-                            "contact": booking.customer_phone,  # cleaned 10-digit
-                        },
-                        "notify": {"sms": True, "email": True},
-                        "callback_url": request.build_absolute_uri(
-                            reverse("payment_success")
-                        ),
-                        "callback_method": "get",
-                    }
+                payment_link = create_payment_link(
+                    booking,
+                    request.build_absolute_uri(reverse("payment_success")),
                 )
             except BadRequestError as e:
                 # Razorpay rejected the data (e.g., contact, email, etc.)
@@ -1028,9 +1021,6 @@ def book_event(request, event_id):
                     "Payment provider rejected the details. "
                     "Please check your mobile number / email and try again.",
                 )
-                # Optional: mark booking as failed or delete:
-                # booking.payment_status = "failed"
-                # booking.save()
                 return render(
                     request,
                     "booking_form.html",
@@ -1042,14 +1032,7 @@ def book_event(request, event_id):
                     },
                 )
 
-            booking.razorpay_link_id = payment_link["id"]
-            booking.save()
-
             short_url = payment_link["short_url"]
-            qr = qrcode.make(short_url)
-            buffer = BytesIO()
-            qr.save(buffer, format="PNG")
-            qr_base64 = base64.b64encode(buffer.getvalue()).decode()
 
             return render(
                 request,
@@ -1057,7 +1040,8 @@ def book_event(request, event_id):
                 {
                     "booking": booking,
                     "payment_link": short_url,
-                    "qr_code": qr_base64,
+                    # The link expires with the booking: don't keep its QR
+                    "qr_url": qr_data_uri(short_url),
                     "event": event,
                     "available_tokens": profile.hub_tokens,
                     "final": total_price_pay,
@@ -1110,10 +1094,14 @@ def razorpay_webhook(request):
 
         booking = Booking.objects.filter(razorpay_link_id=link_id).first()
         if booking:
-            booking.payment_status = "paid"
-            booking.razorpay_payment_id = payment_id
-            booking.payment_method = method
-            booking.save()
+            try:
+                booking, _, transitioned = complete_payment(booking, payment_id=payment_id, method=method)
+            except ValueError as e:
+                # The customer's callback reports the seat error
+                booking.refresh_from_db()
+                transitioned = getattr(e, "transitioned", False)
+            if transitioned:
+                _send_ticket(None, booking)
 
     elif event_type == "payment.failed":
         payment = data["payload"]["payment"]["entity"]
@@ -1151,23 +1139,14 @@ def payment_success(request):
 
     # ================= FREE / TOKEN EVENT =================
     if booking.event.price == 0 or booking.amount_to_pay == 0:
-        if booking.payment_status != "paid":
-            booking.payment_status = "paid"
-            booking.save()
-
-        profile = getattr(request.user, "profile", None)
-        if profile and booking.hub_tokens_used > 0:
-            profile.hub_tokens = max(profile.hub_tokens - booking.hub_tokens_used, 0)
-            profile.save()
-
         try:
-            assign_seats_for_booking(booking)
+            booking, _, transitioned = complete_payment(booking)
         except ValueError as e:
+            transitioned = getattr(e, "transitioned", False)
             messages.error(request, f"Seat allocation failed: {e}")
 
-        # 🔥 POPULAR EVENT CHECK
-        _check_and_mark_popular_event(booking.event)
-
+        if transitioned:
+            _send_ticket(request, booking)
         return _render_ticket(request, booking)
 
     # ================= PAID EVENT =================
@@ -1187,34 +1166,28 @@ def payment_success(request):
         return render(request, "payment_failed.html")
 
     if status == "paid":
-        booking.payment_status = "paid"
-        booking.razorpay_payment_id = payment_id
-        booking.razorpay_signature = signature
-
-        payment = client.payment.fetch(payment_id)
-        booking.payment_method = payment.get("method", "Unknown")
-        booking.save()
-
-        profile = getattr(request.user, "profile", None)
-        if profile and booking.hub_tokens_used > 0:
-            profile.hub_tokens = max(profile.hub_tokens - booking.hub_tokens_used, 0)
-
-        tokens_earned = (float(booking.amount_to_pay) / 500) * 10
-        profile.hub_tokens += Decimal(tokens_earned)
-        profile.save()
-
+        payment = get_razorpay_client().payment.fetch(payment_id)
         try:
-            assign_seats_for_booking(booking)
+            booking, tokens_earned, transitioned = complete_payment(
+                booking, payment_id=payment_id, method=payment.get("method", "Unknown"), signature=signature,
+            )
         except ValueError as e:
+            booking.refresh_from_db()
+            tokens_earned = 0
+            transitioned = getattr(e, "transitioned", False)
             messages.error(request, f"Seat allocation failed: {e}")
 
-        # 🔥 POPULAR EVENT CHECK
-        _check_and_mark_popular_event(booking.event)
+        if booking.paid_late:
+            messages.error(request, "⚠️ This booking was canceled before your payment arrived. It will be refunded.")
+            return render(request, "payment_failed.html")
 
-        messages.success(
-            request,
-            f"🎁 You earned {tokens_earned:.0f} HUB tokens for this booking!"
-        )
+        if tokens_earned:
+            messages.success(
+                request,
+                f"🎁 You earned {tokens_earned} HUB tokens for this booking!"
+            )
+        if transitioned:
+            _send_ticket(request, booking)
         return _render_ticket(request, booking)
 
     booking.payment_status = "failed"
@@ -1222,49 +1195,52 @@ def payment_success(request):
     return render(request, "payment_failed.html")
 
 
-def _check_and_mark_popular_event(event):
+from decimal import Decimal  # make sure this is imported
+
+def _ticket_verify_url(request, booking, seat_numbers):
     """
-    Create ONE popular-event notification
-    when >= 50% seats are booked (paid).
+    Absolute URL the ticket QR points to (carries a signed ticket token).
+    Without a request (webhooks) it is built on SITE_URL.
     """
+    token = make_ticket_token(booking, seat_numbers)
+    base_url = f"http://{request.get_host()}" if request else settings.SITE_URL
+    return f"{base_url}{reverse('verify_ticket_token', args=[token])}"
 
-    paid_bookings = Booking.objects.filter(
-        event=event,
-        payment_status="paid"
-    ).count()
-
-    threshold = int(event.capacity * 0.5)
-
-    if paid_bookings >= threshold:
-        already_created = SiteNotification.objects.filter(
-            event=event,
-            notification_type="popular_event"
-        ).exists()
-
-        if not already_created:
-            SiteNotification.objects.create(
-                title="🔥 Popular Event",
-                message=f"{event.title} is filling fast! Limited seats remaining.",
-                notification_type="popular_event",
-                event=event
-            )
 
+def _send_ticket(request, booking):
+    """
+    Queue the ticket email and SMS. Called once per booking, by whichever
+    path made it paid (complete_payment()'s `transitioned`).
+    """
+    seat_numbers = list(
+        booking.seats.order_by("seat_no").values_list("seat_no", flat=True)
+    )
+    verify_url = _ticket_verify_url(request, booking, seat_numbers)
+
+    queue_template_email("ticket", f"🎟 Your Ticket for {booking.event.title}", "emails/ticket_email.html", {
+        "booking": booking,
+        "event": booking.event,
+        "verify_url": verify_url,
+        "seat_numbers": seat_numbers,  # for email template
+    }, booking.customer_email, attachments=[
+        email_attachment("ticket_qr.png", qr_png(verify_url), "image/png"),
+    ])
+    if booking.customer_phone:
+        seats = f" Seats: {', '.join(map(str, seat_numbers))}." if seat_numbers else ""
+        queue_sms("ticket", booking.customer_phone,
+                  f"EventHub: booking {booking.order_id} confirmed for {booking.event.title} "
+                  f"on {booking.event.date:%d %b %Y}.{seats} Ticket sent to {booking.customer_email}.")
 
-from decimal import Decimal  # make sure this is imported
 
 def _render_ticket(request, booking):
     """Generate QR that organizer can scan directly to verify"""
 
-    host = request.get_host()
-    verify_path = reverse("verify_ticket_qr", args=[booking.id])
-    verify_url = f"http://{host}{verify_path}"
+    # 🔹 Seat numbers (ordered)
+    seat_numbers = list(
+        booking.seats.order_by("seat_no").values_list("seat_no", flat=True)
+    )
 
-    # QR
-    qr_pil = qrcode.make(verify_url)
-    buffer = BytesIO()
-    qr_pil.save(buffer, format="PNG")
-    qr_png = buffer.getvalue()
-    qr_base64 = base64.b64encode(qr_png).decode()
+    verify_url = _ticket_verify_url(request, booking, seat_numbers)
 
     # 🔹 HUB token + price info
     tokens_used = booking.hub_tokens_used or 0
@@ -1275,37 +1251,10 @@ def _render_ticket(request, booking):
     # final amount after discount (1 token = ₹1)
     final_amount = original_amount - Decimal(tokens_used)
 
-    # 🔹 Seat numbers (ordered)
-    seat_numbers = list(
-        booking.seats.order_by("seat_no").values_list("seat_no", flat=True)
-    )
-
-    subject = f"🎟 Your Ticket for {booking.event.title}"
-    message = render_to_string("emails/ticket_email.html", {
-        "booking": booking,
-        "event": booking.event,
-        "verify_url": verify_url,
-        "seat_numbers": seat_numbers,  # for email template
-    })
-
-    email = EmailMessage(
-        subject,
-        message,
-        settings.DEFAULT_FROM_EMAIL,
-        [booking.customer_email],
-    )
-    email.content_subtype = "html"
-    email.attach("ticket_qr.png", qr_png, "image/png")
-
-    try:
-        email.send()
-    except Exception as e:
-        print("❌ Email sending failed:", e)
-
     return render(request, "payment_success.html", {
         "booking": booking,
         "event": booking.event,
-        "qr_code": qr_base64,
+        "qr_url": qr_url(verify_url),
         "verify_url": verify_url,
         "tokens_used": tokens_used,
         "original_amount": original_amount,
@@ -1351,8 +1300,7 @@ def cancel_tickets(request, booking_id):
                 # If LIVE mode → issue refund from Razorpay
                 if not settings.RAZORPAY_KEY_ID.startswith("rzp_test"):
                     try:
-                        client = razorpay.Client(auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET))
-                        refund = client.payment.refund(
+                        refund = get_razorpay_client().payment.refund(
                             booking.razorpay_payment_id,
                             {"amount": int(refund_amount * 100), "speed": "optimum"}
                         )
@@ -1389,65 +1337,162 @@ def my_bookings(request):
     return render(request, "profile/my_bookings.html", {"bookings": bookings})
 
 
+@login_required
 def ticket_view(request, booking_id):
-    booking = get_object_or_404(Booking, id=booking_id)
+    """Ticket page with its signed QR (customer or event organizer)."""
+    booking = get_object_or_404(Booking.objects.select_related("event__organizer"), id=booking_id)
     event = booking.event
+    if booking.customer_id != request.user.id and event.organizer.user_id != request.user.id:
+        raise Http404
 
     # Calculate tickets remaining (after cancellations)
     active_tickets = booking.tickets_booked - booking.canceled_tickets
 
-    # ------------------------------
-    # Dynamic QR URL
-    # ------------------------------
-    host = request.get_host()
-    verify_path = reverse("verify_ticket_qr", args=[booking.id])
-    verify_url = f"http://{host}{verify_path}"
-
-    qr = qrcode.make(verify_url)
-    buffer = BytesIO()
-    qr.save(buffer, format="PNG")
-    qr_code_base64 = base64.b64encode(buffer.getvalue()).decode("utf-8")
-
     seat_numbers = list(
         booking.seats.order_by("seat_no").values_list("seat_no", flat=True)
     )
 
+    # ------------------------------
+    # Dynamic QR URL (signed ticket token)
+    # ------------------------------
+    verify_url = _ticket_verify_url(request, booking, seat_numbers)
+
     return render(request, "profile/ticket.html", {
         "booking": booking,
         "event": event,
-        "qr_code": qr_code_base64,
+        "qr_url": qr_url(verify_url),
         "verify_url": verify_url,  # manual backup link
         "active_tickets": active_tickets,
         "seat_numbers": seat_numbers,
     })
 
 
+@login_required
+def ticket_pdf(request, booking_id):
+    """Single PDF ticket, rendered on demand (customer or event organizer)."""
+    booking = get_object_or_404(
+        Booking.objects.select_related("event__organizer"),
+        id=booking_id,
+        payment_status="paid",
+    )
+    event = booking.event
+    if booking.customer_id != request.user.id and event.organizer.user_id != request.user.id:
+        raise Http404
+
+    seat_numbers = list(
+        booking.seats.order_by("seat_no").values_list("seat_no", flat=True)
+    )
+    verify_url = _ticket_verify_url(request, booking, seat_numbers)
+    pdf = render_tickets(
+        [ticket_payload(booking, verify_url, seat_numbers)],
+        event_logo_path(event),
+    )
+
+    response = HttpResponse(pdf, content_type="application/pdf")
+    response["Content-Disposition"] = f'inline; filename="ticket_{booking.id}.pdf"'
+    return response
+
+
+@login_required
+def event_tickets_pdf(request, event_id):
+    """
+    All paid tickets of an event as one PDF. Streams the file made by
+    `generate_event_tickets` if it is current, otherwise renders it first
+    with a small process pool. While another request (or the command) is
+    rendering the same event, the organizer is asked to come back shortly.
+    """
+    event = get_object_or_404(Event.objects.select_related("organizer"), id=event_id)
+
+    if not hasattr(request.user, 'organizer') or event.organizer != request.user.organizer:
+        return redirect('not_authorized')
+
+    path = event_tickets_path(event)
+    if not path.exists():
+        try:
+            path = build_event_tickets(
+                event, f"http://{request.get_host()}", workers=settings.TICKET_PDF_REQUEST_WORKERS,
+            )
+        except RenderInProgress:
+            messages.info(request, "⏳ Your tickets are being prepared. Try the download again in a minute.")
+            return redirect('event_detail', event_id=event.id)
+
+    return FileResponse(
+        open(path, "rb"),
+        as_attachment=True,
+        filename=f"tickets_event_{event.id}.pdf",
+        content_type="application/pdf",
+    )
+
+
 
 @login_required
 def organizer_bookings(request):
+    """
+    Per-event booking totals, a page of the organizer's events at a time.
+    Totals come from the daily stats rollup, LEFT JOINed in the same query,
+    so events without paid bookings yet are listed too; each event's booking
+    list is fetched on demand from organizer_event_bookings.
+    """
     organizer = request.user.organizer
-    bookings = Booking.objects.filter(event__organizer=organizer)
-
-    # Prepare grouped data with totals
-    event_data = {}
-    for booking in bookings:
-        event = booking.event
-        if event.id not in event_data:
-            event_data[event.id] = {
-                "event": event,
-                "bookings": [],
-                "total_tickets": 0,
-                "total_canceled": 0,
-                "total_revenue": 0,
-            }
-        event_data[event.id]["bookings"].append(booking)
-        event_data[event.id]["total_tickets"] += booking.tickets_booked
-        event_data[event.id]["total_canceled"] += getattr(booking, "canceled_tickets", 0)
-        if booking.payment_status == "paid":
-            event_data[event.id]["total_revenue"] += booking.total_price
+    rollup = stats_totals("daily_stats__")
+    events = (
+        Event.objects.filter(organizer=organizer)
+        .annotate(
+            paid_bookings=rollup["paid_bookings"],
+            total_tickets=rollup["tickets"],
+            total_canceled=rollup["tickets_canceled"],
+            total_revenue=rollup["net_revenue"],
+        )
+        .order_by("-date", "-id")
+    )
+    page_obj = Paginator(events, 10).get_page(request.GET.get("page"))
 
     return render(request, "organizer_profile/organizer_bookings.html", {
-        "event_data": event_data.values(),
+        "event_data": [
+            {"event": event, "paid_bookings": event.paid_bookings, "total_tickets": event.total_tickets,
+             "total_canceled": event.total_canceled, "total_revenue": event.total_revenue}
+            for event in page_obj
+        ],
+        "page_obj": page_obj,
+    })
+
+
+BOOKINGS_PER_PAGE = 50
+BOOKING_EXPORT_FIELDS = [
+    ("Name", "booking_name"), ("Username", "customer__username"), ("Email", "customer_email"),
+    ("Phone", "customer_phone"), ("Tickets", "tickets_booked"), ("Canceled", "canceled_tickets"),
+    ("Total", "total_price"), ("Status", "payment_status"), ("Payment", "payment_method"),
+    ("Date", "booking_date"),
+]
+
+
+class _Echo:
+    """File-like object for csv.writer that hands each row straight back."""
+
+    def write(self, value):
+        return value
+
+
+@login_required
+def organizer_event_bookings(request, event_id):
+    """One page of an event's bookings (HTML fragment), or all of them as a streamed CSV."""
+    event = get_object_or_404(Event, id=event_id, organizer__user=request.user)
+    bookings = Booking.objects.filter(event=event).order_by("-booking_date", "-id")
+
+    if request.GET.get("format") == "csv":
+        writer = csv.writer(_Echo())
+        rows = bookings.values_list(*(field for _, field in BOOKING_EXPORT_FIELDS)).iterator(chunk_size=2000)
+        response = StreamingHttpResponse(
+            (writer.writerow(row) for row in chain([[label for label, _ in BOOKING_EXPORT_FIELDS]], rows)),
+            content_type="text/csv",
+        )
+        response["Content-Disposition"] = f'attachment; filename="event_{event.id}_bookings.csv"'
+        return response
+
+    page_obj = Paginator(bookings.select_related("customer"), BOOKINGS_PER_PAGE).get_page(request.GET.get("page"))
+    return render(request, "organizer_profile/event_bookings_page.html", {
+        "event": event,
+        "page_obj": page_obj,
     })
 
 
@@ -1468,75 +1513,19 @@ def save_event(request, event_id):
     messages.success(request, "✅ Event saved successfully!")
 
     # -----------------------------
-    # 1️⃣ Immediate email with inline banner
+    # 1️⃣ Queue email with inline banner (email-sized derivative, built at send time)
     # -----------------------------
-    def send_email():
-        subject = f"🎉 Event Saved: {event.title}"
-        from_email = settings.DEFAULT_FROM_EMAIL
-        to_email = [request.user.email]
-
-        html_content = render_to_string("emails/saved_event_email.html", {
-            "user": request.user,
-            "event": event,
-            "banner_cid": "banner.jpg"
-        })
-
-        msg = EmailMultiAlternatives(subject, "", from_email, to_email)
-        msg.attach_alternative(html_content, "text/html")
-
-        # Attach banner image inline
-        if event.banner:
-            with default_storage.open(event.banner.name, "rb") as f:
-                banner_data = f.read()
-            msg.attach("banner.jpg", banner_data, "image/jpeg")
-            msg.mixed_subtype = 'related'
-
-        msg.send(fail_silently=True)
-
-    threading.Thread(target=send_email).start()
+    queue_template_email("saved_event", f"🎉 Event Saved: {event.title}", "emails/saved_event_email.html", {
+        "user": request.user,
+        "event": event,
+        "banner_cid": "banner.jpg"
+    }, request.user.email, attachments=banner_attachment(event))
 
     # -----------------------------
     # 2️⃣ Schedule reminders (10, 5, 1 days before registration deadline)
+    #    stored in EventReminder → queued by `send_event_reminders`
     # -----------------------------
-    if event.registration_deadline:
-        today = timezone.now().date()
-        reminder_days = [10, 5, 1]
-
-        for days_before in reminder_days:
-            reminder_date = event.registration_deadline - timedelta(days=days_before)
-            if reminder_date > today:
-                # Combine date & time (9:00 AM) and make timezone-aware
-                naive_dt = datetime.combine(reminder_date, time(9, 0))
-                reminder_datetime = timezone.make_aware(naive_dt, timezone.get_default_timezone())
-                delay_seconds = (reminder_datetime - timezone.now()).total_seconds()
-                if delay_seconds > 0:
-                    # Threaded reminder function
-                    def send_reminder(user_id=request.user.id, event_id=event.id):
-                        from django.contrib.auth.models import User
-                        user = User.objects.get(id=user_id)
-                        event_obj = Event.objects.get(id=event_id)
-                        subject = f"⏰ Reminder: Event '{event_obj.title}'"
-                        from_email = settings.DEFAULT_FROM_EMAIL
-                        to_email = [user.email]
-
-                        html_content = render_to_string("emails/saved_event_email.html", {
-                            "user": user,
-                            "event": event_obj,
-                            "banner_cid": "banner.jpg"
-                        })
-
-                        msg = EmailMultiAlternatives(subject, "", from_email, to_email)
-                        msg.attach_alternative(html_content, "text/html")
-
-                        if event_obj.banner:
-                            with default_storage.open(event_obj.banner.name, "rb") as f:
-                                banner_data = f.read()
-                            msg.attach("banner.jpg", banner_data, "image/jpeg")
-                            msg.mixed_subtype = 'related'
-
-                        msg.send(fail_silently=True)
-
-                    threading.Timer(delay_seconds, send_reminder).start()
+    schedule_reminders(request.user, event)
 
     return redirect("user_event_detail", event_id=event.id)
 
@@ -1545,6 +1534,7 @@ def save_event(request, event_id):
 def remove_saved_event(request, event_id):
     event = get_object_or_404(Event, id=event_id)
     SavedEvent.objects.filter(user=request.user, event=event).delete()
+    cancel_reminders(request.user, event)
     messages.success(request, "❌ Event removed from saved list.")
     return redirect("saved_events")
 
@@ -1608,7 +1598,12 @@ def verify_customers(request):
 @login_required
 def verify_event_customers(request, event_id):
     event = get_object_or_404(Event, id=event_id, organizer=request.user.organizer)
-    bookings = Booking.objects.filter(event=event, payment_status="paid").select_related("customer")
+    bookings = (
+        Booking.objects.filter(event=event, payment_status="paid")
+        .select_related("customer")
+        # Admission is per seat: partly admitted bookings can still be completed
+        .annotate(seat_count=Count("seats"), seats_admitted=Count("seats__admitted_at"))
+    )
 
     return render(request, "organizer_profile/verify_customers.html", {
         "event": event,
@@ -1628,8 +1623,8 @@ def mark_attended(request, booking_id):
     )
 
     if booking.payment_status == "paid":
-        booking.attended = True
-        booking.save()
+        # Every remaining seat on the booking, like scanning it once per person
+        admit_booking(request.user, booking.event_id, booking.id)
         messages.success(request, f"✅ {booking.customer.username} marked as attended.")
     else:
         messages.error(request, "⚠️ Only paid bookings can be verified.")
@@ -1646,11 +1641,72 @@ def scan_qr_page(request, event_id):
     })
 
 
+@login_required
+def checkin_manifest(request, event_id):
+    """Attendee manifest the scanner page validates tickets against offline."""
+    event = get_object_or_404(Event, id=event_id, organizer__user=request.user)
+
+    response = StreamingHttpResponse(manifest_chunks(event), content_type="application/json")
+    response["Content-Disposition"] = f'attachment; filename="event-{event.id}-manifest.json"'
+    response["Cache-Control"] = "no-store"
+    return response
+
+
+@login_required
+def sync_attendance(request, event_id):
+    """
+    Batch check-in API for scanners: POST {"batch_id", "codes": [...]} and
+    get one ok / already-used / invalid result per code. Scanners reuse the
+    batch_id when retrying, so a replayed batch gives the same answers.
+    """
+    if request.method != "POST":
+        return JsonResponse({"error": "POST required"}, status=405)
+    event = get_object_or_404(Event, id=event_id, organizer__user=request.user)
+
+    try:
+        payload = json.loads(request.body)
+        codes = [str(code) for code in payload["codes"]][:MAX_SCAN_BATCH]
+        batch_id = str(payload.get("batch_id") or uuid.uuid4())[:36]
+    except (ValueError, TypeError, KeyError, AttributeError):
+        return JsonResponse({"error": "Expected {\"batch_id\": ..., \"codes\": [...]}"}, status=400)
+
+    results = sync_scans(request.user, event, codes, batch_id)
+    counts = Counter(r["status"] for r in results)
+    return JsonResponse({"batch_id": batch_id, "counts": counts, "results": results})
+
+
+@login_required
+def gate_scan(request, event_id):
+    """
+    Door scan: POST code=<QR text>, admits one seat per scan and answers
+    with a small JSON body (no template, no messages) so gates keep moving.
+    """
+    started = time_module.perf_counter()
+    if request.method != "POST":
+        return JsonResponse({"error": "POST required"}, status=405)
+
+    try:
+        booking_id = booking_id_from_code(request.POST.get("code"), event_id)
+    except InvalidTicket as e:
+        result = {"status": "invalid", "message": str(e)}
+    else:
+        result = admit_seat(request.user, event_id, booking_id)
+
+    response = JsonResponse(result)
+    response["Server-Timing"] = f"scan;dur={(time_module.perf_counter() - started) * 1000:.1f}"
+    return response
+
+
 # -------------------------------
 # QR verification endpoint
 # -------------------------------
 @login_required
 def verify_ticket_qr(request, booking_id):
+    if not legacy_codes_accepted():
+        return render(request, "organizer_profile/verify_result.html", {
+            "status": "error",
+            "message": LEGACY_REJECTED,
+        })
     booking = get_object_or_404(Booking, id=booking_id)
 
     # Organizer ownership check
@@ -1661,19 +1717,60 @@ def verify_ticket_qr(request, booking_id):
             "booking": booking,
         })
 
-    # Only paid tickets can be verified
-    if booking.payment_status == "paid":
-        if not booking.attended:
-            booking.attended = True
-            booking.save()
-            status = "success"
-            message = f"✅ Ticket for {booking.customer.username} verified successfully!"
-        else:
-            status = "info"
-            message = f"ℹ️ Ticket for {booking.customer.username} was already verified."
-    else:
-        status = "error"
-        message = "⚠️ Cannot verify unpaid ticket."
+    status, message = _admit_ticket(request.user, booking.event_id, booking.id)
+
+    return render(request, "organizer_profile/verify_result.html", {
+        "status": status,
+        "message": message,
+        "booking": booking,
+    })
+
+
+def _admit_ticket(user, event_id, booking_id):
+    """
+    Admit one seat of a verified ticket (see admit_seat).
+    Returns (status, message) where status is success / info / error.
+    """
+    result = admit_seat(user, event_id, booking_id)
+    if result["status"] == "admitted":
+        return "success", result["message"]
+    if result["status"] == "already-used":
+        return "info", result["message"]
+
+    # Slow path: only reached for rejected tickets, to explain why
+    booking = (
+        Booking.objects.filter(id=booking_id, event_id=event_id)
+        .select_related("event__organizer")
+        .first()
+    )
+    if booking is None:
+        return "error", "❌ Booking not found."
+    if booking.event.organizer.user_id != user.id:
+        return "error", "⚠️ You are not authorized to verify this ticket."
+    if booking.payment_status != "paid":
+        return "error", "❌ Cannot verify unpaid ticket."
+    return "error", result["message"]
+
+
+# -------------------------------
+# QR verification endpoint (signed token)
+# -------------------------------
+@login_required
+def verify_ticket_token(request, token):
+    try:
+        claims = read_ticket_token(token)
+    except InvalidTicket as e:
+        return render(request, "organizer_profile/verify_result.html", {
+            "status": "error",
+            "message": str(e),
+        })
+
+    status, message = _admit_ticket(request.user, claims.event_id, claims.booking_id)
+    booking = (
+        Booking.objects.filter(id=claims.booking_id, event__organizer__user=request.user)
+        .select_related("event", "customer")
+        .first()
+    )
 
     return render(request, "organizer_profile/verify_result.html", {
         "status": status,
@@ -1685,16 +1782,36 @@ def verify_ticket_qr(request, booking_id):
 @login_required
 def verify_ticket(request):
     code = request.GET.get("code")
+    event_id = request.GET.get("event") or None  # set by the per-event scanner page
+
+    def back():
+        if event_id and event_id.isdigit():
+            return redirect("scan_qr_page", event_id=event_id)
+        return redirect("organizer_dashboard")
 
     if not code:
         messages.error(request, "❌ Invalid QR code.")
         return redirect("organizer_dashboard")
 
-    try:
-        booking_id = int(code.strip("/").split("/")[-1])
-    except Exception:
-        messages.error(request, "❌ QR code is not valid.")
-        return redirect("organizer_dashboard")
+    last_segment = code.strip().strip("/").split("/")[-1]
+
+    # ---------- Signed token: checked without touching the DB ----------
+    if not last_segment.isdigit():
+        try:
+            claims = read_ticket_token(last_segment, event_id=event_id)
+        except InvalidTicket as e:
+            messages.error(request, str(e))
+            return back()
+
+        status, message = _admit_ticket(request.user, claims.event_id, claims.booking_id)
+        {"success": messages.success, "info": messages.info}.get(status, messages.error)(request, message)
+        return redirect("verify_event_customers", event_id=claims.event_id)
+
+    # ---------- Legacy QR codes: plain booking id (until LEGACY_TICKET_QR_UNTIL) ----------
+    if not legacy_codes_accepted():
+        messages.error(request, LEGACY_REJECTED)
+        return back()
+    booking_id = int(last_segment)
 
     booking = get_object_or_404(Booking, id=booking_id)
 
@@ -1703,16 +1820,8 @@ def verify_ticket(request):
         messages.error(request, "⚠️ You are not authorized to verify this ticket.")
         return redirect("organizer_dashboard")
 
-    # Check payment + attendance
-    if booking.payment_status == "paid":
-        if not booking.attended:
-            booking.attended = True
-            booking.save()
-            messages.success(request, f"✅ Ticket for {booking.booking_name or booking.customer.username} verified!")
-        else:
-            messages.info(request, f"ℹ️ Ticket for {booking.booking_name or booking.customer.username} already verified.")
-    else:
-        messages.error(request, "❌ Cannot verify unpaid ticket.")
+    status, message = _admit_ticket(request.user, booking.event_id, booking.id)
+    {"success": messages.success, "info": messages.info}.get(status, messages.error)(request, message)
 
     # ✅ Redirect to the customer list page of this booking's event
     return redirect("verify_event_customers", event_id=booking.event.id)
@@ -1815,28 +1924,88 @@ def organizer_reviews(request):
 from django.http import JsonResponse
 from django.contrib.auth.decorators import login_required
 from .models import SiteNotification
+from .utils.notifications import (
+    KEEPALIVE_SECONDS as NOTIFICATION_KEEPALIVE_SECONDS, hub as notification_hub,
+    UNSEEN_BATCH as NOTIFICATION_BATCH, is_member as is_notification_member,
+    mark_seen as mark_notification_seen, take_unseen,
+)
 
 @login_required
 def fetch_site_notifications(request):
-    user = request.user
+    # Cheap version check: the client's newest known id vs. this process's
+    after = request.GET.get("after", "")
+    latest = notification_hub.latest_id()
+    if after.isdigit() and int(after) >= latest:
+        return HttpResponse(status=204)
 
-    # Only unseen notifications
-    notifications = SiteNotification.objects.exclude(
-        seen_by=user
-    ).order_by("-created_at")[:3]  # max 3 only
+    # Only unseen notifications (oldest first, max 3), marked seen immediately
+    notifications = take_unseen(request.user)
+    if len(notifications) == NOTIFICATION_BATCH:
+        # More may be waiting: don't let the client's `after` skip past them
+        latest = notifications[-1]["id"]
+    return JsonResponse({"notifications": notifications, "latest": latest})
 
-    data = []
 
-    for n in notifications:
-        data.append({
-            "id": n.id,
-            "title": n.title,
-            "message": n.message,
-            "type": n.notification_type,
-        })
-        n.seen_by.add(user)  # mark as seen immediately
+@login_required
+async def notification_stream(request):
+    """Server-sent events: new site notifications pushed as they are created."""
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse(status=204)  # tells EventSource not to reconnect; nav.html polls instead
+
+    user = await request.auser()
+    after = request.GET.get("after", "")
+    after = int(after) if after.isdigit() else -1
+
+    async def stream():
+        queue = notification_hub.subscribe()
+        try:
+            yield "retry: 5000\n\n"
+            seen = after
+            if await sync_to_async(notification_hub.latest_id)() > after:
+                for n in await sync_to_async(take_unseen)(user):
+                    seen = max(seen, n["id"])
+                    yield f"event: notification\ndata: {json.dumps(n)}\n\n"
+            while True:
+                try:
+                    n = await asyncio.wait_for(queue.get(), NOTIFICATION_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if n["id"] <= seen:
+                    continue
+                seen = n["id"]
+                if n["targeted"] and not await sync_to_async(is_notification_member)(user, n["id"]):
+                    continue
+                await sync_to_async(mark_notification_seen)(user, n["id"])
+                yield f"event: notification\ndata: {json.dumps(n)}\n\n"
+        finally:
+            notification_hub.unsubscribe(queue)
+
+    response = StreamingHttpResponse(stream(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
+
 
-    return JsonResponse({"notifications": data})
+# -------------------------------
+# Cached QR images (content-addressed → cache forever)
+# -------------------------------
+def qr_image(request, key):
+    if not KEY_RE.match(key):
+        raise Http404("Unknown QR code")
+
+    etag = f'"{key}"'
+    if request.headers.get("If-None-Match") == etag:
+        response = HttpResponse(status=304)
+    else:
+        png = load_qr(key)
+        if png is None:
+            raise Http404("Unknown QR code")
+        response = HttpResponse(png, content_type="image/png")
+
+    response["ETag"] = etag
+    response["Cache-Control"] = "public, max-age=31536000, immutable"
+    return response
 
 
 def upcoming_features(request):